@@ -1,7 +1,14 @@
+import os
+import time
+from datetime import datetime
+
 import pika
-import json
 import logging
 
+from models.broker import EXCHANGE, QUEUES, connection_parameters, declare_topology, retry_or_dead_letter
+from models.codec import decode
+from models.metrics import CONSUMER_LAG, CONSUMER_MESSAGES, CONSUMER_PROCESSING, start_http_server
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -9,25 +16,15 @@ class RabbitMQConsumer:
     def __init__(self):
         self.connection = None
         self.channel = None
-        self.exchange_name = 'defood_exchange'
-        # Обновляем маршрутизацию
-        self.bindings = {
-            'defood.orders.created': 'orders_queue',
-            'defood.users.created': 'users_queue'
-        }
+        self.exchange_name = EXCHANGE
+        self.bindings = QUEUES
 
     def connect(self):
         try:
-            self.connection = pika.BlockingConnection(
-                pika.ConnectionParameters(
-                    host='localhost',
-                    port=5672,
-                    credentials=pika.PlainCredentials('guest', 'guest'),
-                    heartbeat=600,
-                    connection_attempts=3
-                )
-            )
+            self.connection = pika.BlockingConnection(connection_parameters())
             self.channel = self.connection.channel()
+            # Публикация в retry/DLQ подтверждается брокером до ack исходного сообщения
+            self.channel.confirm_delivery()
             self.setup_exchange()
             return True
         except Exception as e:
@@ -35,27 +32,23 @@ class RabbitMQConsumer:
             return False
 
     def setup_exchange(self):
-        # Объявляем exchange
-        self.channel.exchange_declare(
-            exchange=self.exchange_name,
-            exchange_type='topic',
-            durable=True
-        )
-
-        # Объявляем очереди и привязываем их к exchange
+        # Exchange, очереди, retry-очереди с TTL и DLQ - см. models.broker
+        declare_topology(self.channel)
         for routing_key, queue_name in self.bindings.items():
-            self.channel.queue_declare(queue=queue_name, durable=True)
-            self.channel.queue_bind(
-                exchange=self.exchange_name,
-                queue=queue_name,
-                routing_key=routing_key  # Используем точный routing key
-            )
             logger.info(f"Declared queue {queue_name} with routing key {routing_key}")
 
     def process_message(self, ch, method, properties, body):
+        started = time.perf_counter()
+        queue = self.bindings.get(method.routing_key, '')
         try:
-            data = json.loads(body)
+            try:
+                data = decode(body, getattr(properties, 'content_type', None))
+            except (ValueError, TypeError) as e:
+                # Повтор не поможет - сразу в DLQ
+                self.reject(ch, method, properties, body, queue, e, retryable=False)
+                return
             routing_key = method.routing_key
+            self.observe_lag(queue, data)
             logger.info(f"""
             ====== New Message ======
             Routing Key: {routing_key}
@@ -64,15 +57,51 @@ class RabbitMQConsumer:
             ======================
             """)
             
-            if 'orders' in routing_key:
-                self.handle_order(data)
-            elif 'users' in routing_key:
-                self.handle_user(data)
-            
+            try:
+                if 'orders' in routing_key:
+                    self.handle_order(data)
+                elif 'users' in routing_key:
+                    self.handle_user(data)
+            except Exception as e:
+                self.reject(ch, method, properties, body, queue, e)
+                return
+
             ch.basic_ack(delivery_tag=method.delivery_tag)
+            CONSUMER_MESSAGES.inc(queue=queue, result='ack')
+        finally:
+            CONSUMER_PROCESSING.observe(time.perf_counter() - started, queue=queue)
+
+    def reject(self, ch, method, properties, body, queue, error, retryable=True):
+        """
+        Отложенный повтор через брокер: сообщение публикуется в retry-очередь
+        (или DLQ) и только потом подтверждается. Consumer не ждет задержку и
+        сразу берет следующее сообщение.
+        """
+        logger.error(f"Error processing message from {queue}: {error}")
+        try:
+            result = retry_or_dead_letter(
+                ch, queue, method.routing_key, body, properties, error, retryable=retryable,
+            )
         except Exception as e:
-            logger.error(f"Error processing message: {e}")
+            # Retry-очередь недоступна - старое поведение, сообщение вернется в очередь
+            logger.error(f"Failed to schedule retry: {e}")
             ch.basic_nack(delivery_tag=method.delivery_tag)
+            CONSUMER_MESSAGES.inc(queue=queue, result='nack')
+            return
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+        CONSUMER_MESSAGES.inc(queue=queue, result=result)
+
+    def observe_lag(self, queue, data):
+        # timestamp проставляется продюсером через datetime.now().isoformat()
+        timestamp = data.get('timestamp') if isinstance(data, dict) else None
+        if not timestamp:
+            return
+        try:
+            produced_at = datetime.fromisoformat(timestamp)
+        except ValueError:
+            return
+        now = datetime.now(produced_at.tzinfo)
+        CONSUMER_LAG.observe(max((now - produced_at).total_seconds(), 0.0), queue=queue)
 
     def handle_order(self, data):
         try:
@@ -87,8 +116,21 @@ class RabbitMQConsumer:
             Timestamp: {timestamp}
             ============================
             """)
+
+            # SSE-подписчики получают события через OrderStatusFeed своего ASGI-процесса
+            if event_type == 'order_created':
+                self.project_order(data)
         except Exception as e:
             logger.error(f"Error processing order: {e}")
+            raise
+
+    def project_order(self, data):
+        # Django ORM нужен только здесь: read-модель OrderSummary
+        from django.db import close_old_connections
+        from models.projections import apply_order_created
+
+        close_old_connections()
+        apply_order_created(data)
 
     def handle_user(self, data):
         try:
@@ -107,6 +149,11 @@ class RabbitMQConsumer:
             if not self.connect():
                 return
 
+            metrics_port = os.getenv('CONSUMER_METRICS_PORT')
+            if metrics_port:
+                start_http_server(int(metrics_port))
+                logger.info(f"Serving metrics on port {metrics_port}")
+
             self.channel.basic_qos(prefetch_count=1)
 
             # Подписываемся на очереди
@@ -128,5 +175,11 @@ class RabbitMQConsumer:
                 self.connection.close()
 
 if __name__ == '__main__':
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    os.environ.setdefault('DEFOOD_ROLE', 'consumer')
+    django.setup()
+
     consumer = RabbitMQConsumer()
     consumer.start_consuming()
\ No newline at end of file
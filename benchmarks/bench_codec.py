@@ -0,0 +1,50 @@
+"""
+Кодирование order_created: JSON vs msgpack v1 (models.codec) - размер и
+скорость encode/decode на заказах разного размера.
+
+    python -m benchmarks.bench_codec
+    python -m benchmarks.bench_codec --orders 500 --items 1 3 10
+"""
+import argparse
+import statistics
+
+from .common import measure, report, seed_orders, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--items', type=int, nargs='+', default=[1, 3, 8])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from models import codec
+    from models.models import Order
+    from models.tasks import build_order_message
+
+    if codec.msgpack is None:
+        parser.error('msgpack is not installed')
+
+    for seed, items in enumerate(args.items):
+        ids = seed_orders(args.orders, items_per_order=items, seed=seed)
+        messages = [build_order_message(order) for order in Order.objects.filter(id__in=ids).prefetch_related('items')]
+
+        rows = []
+        for message_format in ('json', 'msgpack'):
+            encoded = [codec.encode(message, message_format) for message in messages]
+            assert all(codec.decode(*pair) == message for pair, message in zip(encoded, messages))
+            sizes = [len(body) for body, _ in encoded]
+            encode_time = measure(lambda: [codec.encode(m, message_format) for m in messages], repeat=args.repeat)
+            decode_time = measure(lambda: [codec.decode(*pair) for pair in encoded], repeat=args.repeat)
+            rows.append((message_format, (
+                f'{statistics.mean(sizes):7.1f} B/msg  '
+                f'encode {encode_time / len(messages) * 1e6:6.2f} us  '
+                f'decode {decode_time / len(messages) * 1e6:6.2f} us'
+            )))
+        report(f'order_created, {items} item(s) per order, {len(messages)} orders', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Микробенчмарки горячих путей: сериализаторы, задача публикации, publisher и consumer.
+
+    python -m benchmarks.bench_hotpaths                      # замер и сравнение с baseline
+    python -m benchmarks.bench_hotpaths --save               # записать baseline
+    python -m benchmarks.bench_hotpaths --check --threshold 0.25
+
+Baseline (benchmarks/baselines.json) - лучшее время одной операции на
+машине, где он снят; сравнивать имеет смысл на той же машине / в том же CI
+раннере. --check завершается с кодом 1, если какой-то случай медленнее
+baseline больше чем на threshold.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from .common import measure, report, seed_orders, setup_django
+
+BASELINES = Path(__file__).with_name('baselines.json')
+
+CASES = {}
+
+
+def case(name, number=None):
+    """
+    Регистрирует фабрику: подготовка данных -> функция одной операции.
+    number - свое число вызовов на замер для медленных случаев.
+    """
+    def register(factory):
+        CASES[name] = (factory, number)
+        return factory
+    return register
+
+
+class FakeChannel:
+    def __init__(self):
+        self.published = 0
+
+    def basic_publish(self, **kwargs):
+        self.published += 1
+
+    def basic_ack(self, delivery_tag):
+        pass
+
+    def basic_nack(self, delivery_tag):
+        pass
+
+
+class FakeConnection:
+    is_closed = False
+
+
+@case('order_serializer.create')
+def order_create(ctx):
+    from django.db import transaction
+    from models.serializers import OrderSerializer
+
+    data = {
+        'restaurant': ctx.order.restaurant_id,
+        'address': ctx.order.address_id,
+        'items': [{'menu_item': item.menu_item_id, 'quantity': 2} for item in ctx.order.items.all()],
+    }
+    context = {'request': SimpleNamespace(user=ctx.order.user)}
+
+    def run():
+        # Откат после каждого заказа: таблицы не растут между повторами
+        with transaction.atomic():
+            serializer = OrderSerializer(data=data, context=context)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            transaction.set_rollback(True)
+    return run
+
+
+@case('order_serializer.to_representation')
+def order_representation(ctx):
+    from models.serializers import OrderSerializer
+
+    serializer = OrderSerializer()
+    return lambda: serializer.to_representation(ctx.order)
+
+
+# PBKDF2 при проверке пароля - сотни миллисекунд на вызов
+@case('login_serializer.validate', number=2)
+def login_validate(ctx):
+    from models.serializers import LoginSerializer
+
+    data = {'phone_number': ctx.order.user.phone_number, 'password': 'benchmark'}
+    return lambda: LoginSerializer(data=data).is_valid(raise_exception=True)
+
+
+@case('send_order_to_queue.message')
+def order_message(ctx):
+    from models.models import Order
+    from models.tasks import build_order_message
+
+    # Как в задаче: заказ читается заново, позиции - отдельным запросом
+    return lambda: build_order_message(Order.objects.get(id=ctx.order.id))
+
+
+@case('send_order_to_queue.prebuilt')
+def order_task_prebuilt(ctx):
+    from django.test.utils import override_settings
+    from models.models import Order
+    from models.tasks import build_order_message, send_order_to_queue
+
+    # Путь воркера после OrderSerializer.create: событие уже собрано, БД не читается
+    override_settings(RABBITMQ_PUBLISHER_CLASS='models.testing.InMemoryPublisher').enable()
+    message = build_order_message(Order.objects.prefetch_related('items').get(id=ctx.order.id))
+    return lambda: send_order_to_queue.run(str(ctx.order.id), message)
+
+
+@case('publisher.publish')
+def publisher_publish(ctx):
+    from models.models import Order
+    from models.tasks import RabbitMQPublisher, build_order_message
+
+    publisher = RabbitMQPublisher()
+    publisher.connection, publisher.channel = FakeConnection(), FakeChannel()
+    message = build_order_message(Order.objects.prefetch_related('items').get(id=ctx.order.id))
+    return lambda: publisher.publish('defood.orders.created', message)
+
+
+@case('consumer.process_message')
+def consumer_process(ctx):
+    from models.models import Order
+    from models.tasks import build_order_message
+    from RabbitMQ import RabbitMQConsumer
+
+    consumer = RabbitMQConsumer()
+    channel = FakeChannel()
+    method = SimpleNamespace(routing_key='defood.orders.created', delivery_tag=1)
+    body = json.dumps(build_order_message(Order.objects.prefetch_related('items').get(id=ctx.order.id)))
+    return lambda: consumer.process_message(channel, method, None, body)
+
+
+def run_cases(names, repeat, number):
+    from models.models import Order
+    from models.transitions import transition_log
+
+    # Журнал статусов пишется синхронно - без фонового потока в замерах
+    transition_log.flush_interval = 0
+    order_id = seed_orders(1)[0]
+    ctx = SimpleNamespace(order=Order.objects.select_related('user').prefetch_related('items').get(id=order_id))
+    results = {}
+    for name in names:
+        factory, case_number = CASES[name]
+        func = factory(ctx)
+        func()  # прогрев: кэши запросов, ленивые импорты
+        results[name] = measure(func, repeat=repeat, number=case_number or number)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--case', choices=sorted(CASES), action='append')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=200)
+    parser.add_argument('--baselines', type=Path, default=BASELINES)
+    parser.add_argument('--save', action='store_true', help='store results as the new baseline')
+    parser.add_argument('--check', action='store_true', help='exit 1 on a regression above --threshold')
+    parser.add_argument('--threshold', type=float, default=0.25)
+    args = parser.parse_args()
+
+    setup_django()
+    # Логи consumer'а форматируются как в проде (root INFO из LOGGING), но не засоряют вывод
+    devnull = open(os.devnull, 'w')
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(devnull)
+
+    results = run_cases(args.case or list(CASES), args.repeat, args.number)
+    baselines = json.loads(args.baselines.read_text()) if args.baselines.exists() else {}
+
+    rows, regressions = [], []
+    for name, seconds in results.items():
+        line = f'{seconds * 1e6:10.1f} us/op'
+        if name in baselines:
+            change = seconds / baselines[name] - 1
+            line += f'  baseline {baselines[name] * 1e6:10.1f} us  {change:+.0%}'
+            if change > args.threshold:
+                regressions.append(name)
+                line += '  REGRESSION'
+        rows.append((name, line))
+    report(f'Hot paths (best of {args.repeat} x {args.number})', rows)
+
+    if args.save:
+        baselines.update({name: round(seconds, 9) for name, seconds in results.items()})
+        args.baselines.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n')
+        print(f'\nBaselines written to {args.baselines}')
+    if args.check and regressions:
+        print(f'\nRegressions above {args.threshold:.0%}: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Массовый импорт меню: parse + validate + bulk upsert, первый импорт и повторный (update).
+
+    python -m benchmarks.bench_menu_import --rows 100000
+"""
+import argparse
+import csv
+import io
+import random
+import time
+
+from .common import report, setup_django
+
+
+def build_csv(count, seed=0):
+    rnd = random.Random(seed)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['name', 'description', 'price', 'is_available', 'preparation_time'])
+    for i in range(count):
+        writer.writerow([
+            f'Блюдо {i}', 'Описание блюда', f'{rnd.randrange(10000, 90000) / 100:.2f}',
+            rnd.choice(['true', 'false']), rnd.randrange(5, 60),
+        ])
+    return buffer.getvalue().encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from decimal import Decimal
+    from models.menu_import import import_menu, parse_menu, validate_menu_rows
+    from models.models import Restaurant
+    from models.serializers import MenuItemSerializer
+
+    restaurant = Restaurant.objects.create(
+        name='Плов Центр', description='Национальная кухня', address='Tashkent', phone='998711234567',
+        delivery_radius=5, min_order_amount=Decimal('30000.00'), working_hours={'monday': '09:00-21:00'},
+    )
+    data = build_csv(args.rows)
+
+    results = []
+    for label in ('insert', 'upsert'):
+        started = time.perf_counter()
+        rows = parse_menu(data, 'csv')
+        parsed = time.perf_counter()
+        validate_menu_rows(rows)
+        validated = time.perf_counter()
+        import_menu(restaurant.id, rows, chunk_size=args.chunk_size)
+        finished = time.perf_counter()
+        results += [
+            (f'{label}: parse', f'{(parsed - started) * 1000:.0f} ms'),
+            (f'{label}: validate', f'{(validated - parsed) * 1000:.0f} ms'),
+            (f'{label}: total (validate + write)', f'{(finished - parsed) * 1000:.0f} ms'),
+            (f'{label}: throughput', f'{args.rows / (finished - started):,.0f} rows/s'),
+        ]
+
+    # Базовая линия: то, что делает MenuItemViewSet на каждый POST (без HTTP)
+    sample = parse_menu(build_csv(2000, seed=1), 'csv')
+    started = time.perf_counter()
+    for row in sample:
+        serializer = MenuItemSerializer(data={**row, 'name': row['name'] + ' *', 'restaurant': restaurant.id})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+    results.append(('per-row MenuItemSerializer', f'{len(sample) / (time.perf_counter() - started):,.0f} rows/s'))
+    report(f'Menu import, {args.rows} rows, chunk {args.chunk_size} (SQLite in-memory)', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+ModelSerializer(many=True) vs ValuesReader на list-эндпоинтах.
+
+    python -m benchmarks.bench_readers --rows 10000
+"""
+import argparse
+from decimal import Decimal
+
+from .common import measure, report, seed_orders, setup_django
+
+
+def seed_restaurants(count):
+    from models.models import Restaurant
+
+    Restaurant.objects.bulk_create([
+        Restaurant(
+            name=f'Ресторан {i}', description='Описание', address='Tashkent', phone='998711234567',
+            delivery_radius=5.5, min_order_amount=Decimal('30000.00'),
+            working_hours={'monday': '09:00-21:00', 'tuesday': '09:00-21:00'},
+        )
+        for i in range(count)
+    ], batch_size=1000)
+
+
+def seed_menu_items(count):
+    from models.models import MenuItem, Restaurant
+
+    # Отдельный ресторан: имена позиций уникальны в пределах ресторана,
+    # а seed_orders уже создал свои 'Блюдо {i}'
+    restaurant = Restaurant.objects.create(
+        name='Меню для бенчмарка', description='Описание', address='Tashkent', phone='998711234567',
+        delivery_radius=5, min_order_amount=Decimal('30000.00'), working_hours={},
+    )
+    MenuItem.objects.bulk_create([
+        MenuItem(
+            restaurant=restaurant, name=f'Блюдо {i}', description='Описание блюда',
+            price=Decimal(10000 + i % 500 * 100) / 100, preparation_time=15,
+        )
+        for i in range(count)
+    ], batch_size=1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_framework.renderers import JSONRenderer
+    from models.models import MenuItem, Order, Restaurant
+    from models.readers import ValuesReader
+    from models.serializers import MenuItemSerializer, OrderSerializer, RestaurantSerializer
+
+    seed_orders(args.rows)
+    seed_restaurants(args.rows)
+    seed_menu_items(args.rows)
+
+    cases = [
+        ('orders', OrderSerializer, Order.objects.prefetch_related('items')),
+        ('restaurants', RestaurantSerializer, Restaurant.objects.all()),
+        ('menu items', MenuItemSerializer, MenuItem.objects.all()),
+    ]
+    renderer = JSONRenderer()
+    rows = []
+    for name, serializer_class, queryset in cases:
+        reader = ValuesReader(serializer_class)
+        count = queryset.count()
+
+        expected = renderer.render(serializer_class(queryset.all(), many=True).data)
+        assert renderer.render(reader.read(queryset.all())) == expected, f'{name}: output differs'
+
+        before = measure(lambda: serializer_class(queryset.all(), many=True).data, repeat=args.repeat)
+        after = measure(lambda: reader.read(queryset.all()), repeat=args.repeat)
+        rows.append((
+            f'{name} ({count} rows)',
+            f'{count / before:>10,.0f} rows/s -> {count / after:>10,.0f} rows/s  (x{before / after:.1f})',
+        ))
+
+    report('ModelSerializer -> ValuesReader (output identical)', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+JSONRenderer/JSONParser vs ORJSONRenderer/ORJSONParser на OrderSerializer(many=True).
+
+    python -m benchmarks.bench_renderers --orders 2000
+"""
+import argparse
+import io
+
+from .common import measure, report, seed_orders, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from models.models import Order
+    from models.renderers import ORJSONParser, ORJSONRenderer
+    from models.serializers import OrderSerializer
+
+    seed_orders(args.orders)
+    data = OrderSerializer(Order.objects.prefetch_related('items'), many=True).data
+
+    std_renderer, fast_renderer = JSONRenderer(), ORJSONRenderer()
+    body = std_renderer.render(data)
+    assert fast_renderer.render(data) == body, 'ORJSONRenderer output differs from JSONRenderer'
+
+    std_parser, fast_parser = JSONParser(), ORJSONParser()
+    assert fast_parser.parse(io.BytesIO(body)) == std_parser.parse(io.BytesIO(body))
+
+    render_std = measure(lambda: std_renderer.render(data), repeat=args.repeat)
+    render_fast = measure(lambda: fast_renderer.render(data), repeat=args.repeat)
+    parse_std = measure(lambda: std_parser.parse(io.BytesIO(body)), repeat=args.repeat)
+    parse_fast = measure(lambda: fast_parser.parse(io.BytesIO(body)), repeat=args.repeat)
+
+    report(f'{args.orders} orders, payload {len(body) / 1024:.1f} KiB', [
+        ('render JSONRenderer', f'{render_std * 1000:.2f} ms'),
+        ('render ORJSONRenderer', f'{render_fast * 1000:.2f} ms  (x{render_std / render_fast:.1f})'),
+        ('parse JSONParser', f'{parse_std * 1000:.2f} ms'),
+        ('parse ORJSONParser', f'{parse_fast * 1000:.2f} ms  (x{parse_std / parse_fast:.1f})'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
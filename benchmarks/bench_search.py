@@ -0,0 +1,78 @@
+"""
+Typeahead-поиск по индексу в памяти: сборка индекса и латентность запросов.
+
+    python -m benchmarks.bench_search --items 100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from .common import report, setup_django
+
+WORDS = [
+    'плов', 'лагман', 'самса', 'манты', 'шашлык', 'чучвара', 'нарын', 'шурпа', 'димлама', 'казан',
+    'kabob', 'burger', 'pizza', 'margherita', 'pepperoni', 'chicken', 'beef', 'salad', 'caesar', 'soup',
+    'острый', 'домашний', 'тандырный', 'говядина', 'баранина', 'курица', 'овощи', 'сыр', 'соус', 'хлеб',
+]
+QUERIES = ['пло', 'плов', 'плоф', 'лагм', 'шашлык гов', 'pizz', 'pepperoini', 'chicken sa', 'тандыр', 'самс']
+
+
+def seed(restaurants, items, rnd):
+    from decimal import Decimal
+    from models.models import MenuItem, Restaurant
+
+    created = Restaurant.objects.bulk_create([
+        Restaurant(
+            name=f'{rnd.choice(WORDS).title()} {i}', description=' '.join(rnd.sample(WORDS, 3)),
+            address='Tashkent', phone='998711234567', delivery_radius=5, min_order_amount=Decimal('30000.00'),
+            latitude=Decimal('41.2') + Decimal(rnd.randrange(2000)) / 10000,
+            longitude=Decimal('69.1') + Decimal(rnd.randrange(3000)) / 10000,
+            working_hours={},
+        )
+        for i in range(restaurants)
+    ], batch_size=1000)
+    MenuItem.objects.bulk_create([
+        MenuItem(
+            restaurant=created[i % restaurants], name=f'{" ".join(rnd.sample(WORDS, 2))} {i}',
+            description=' '.join(rnd.sample(WORDS, 5)), price=Decimal(rnd.randrange(10000, 90000)),
+            preparation_time=15,
+        )
+        for i in range(items)
+    ], batch_size=2000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--restaurants', type=int, default=2000)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    from models.search import load_index
+
+    rnd = random.Random(0)
+    seed(args.restaurants, args.items, rnd)
+
+    started = time.perf_counter()
+    index = load_index()
+    build = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(args.queries):
+        query = rnd.choice(QUERIES)
+        started = time.perf_counter()
+        index.search(query, 41.31, 69.24, limit=10)
+        latencies.append(time.perf_counter() - started)
+    quantiles = statistics.quantiles(latencies, n=100)
+    report(f'Search index, {args.items} menu items / {args.restaurants} restaurants', [
+        ('build', f'{build * 1000:.0f} ms'),
+        ('query p50', f'{quantiles[49] * 1000:.2f} ms'),
+        ('query p95', f'{quantiles[94] * 1000:.2f} ms'),
+        ('query p99', f'{quantiles[98] * 1000:.2f} ms'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Холодный старт процессов по ролям (DEFOOD_ROLE) и время импорта по модулям.
+
+Каждая роль запускается в чистом интерпретаторе с `python -X importtime`:
+web/api - django.setup() и загрузка URLconf, celery - приложение Celery
+с задачами, consumer - модуль RabbitMQ.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --role celery --top 25
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from .common import report
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ROLE_ENTRYPOINTS = {
+    'web': 'import django; django.setup(); from django.urls import get_resolver; get_resolver().url_patterns',
+    'api': 'import django; django.setup(); from django.urls import get_resolver; get_resolver().url_patterns',
+    'celery': 'from config.celery import app; import django; django.setup(); app.loader.import_default_modules()',
+    'consumer': 'import django; django.setup(); import RabbitMQ',
+}
+
+
+def run_role(role):
+    """Возвращает (время процесса в секундах, {модуль: собственное время импорта в мкс})."""
+    env = dict(os.environ, DEFOOD_ROLE=role)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    env.setdefault('SECRET_KEY', 'benchmark')
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', ROLE_ENTRYPOINTS[role]],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode:
+        raise RuntimeError(f'{role}: {result.stderr.strip().splitlines()[-1]}')
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        # import time:       self [us] |  cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(self_us)
+    return elapsed, modules
+
+
+def by_package(modules):
+    packages = defaultdict(int)
+    for name, self_us in modules.items():
+        packages[name.split('.')[0]] += self_us
+    return sorted(packages.items(), key=lambda item: -item[1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--role', choices=sorted(ROLE_ENTRYPOINTS), action='append')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    summary = []
+    for role in args.role or list(ROLE_ENTRYPOINTS):
+        runs = [run_role(role) for _ in range(args.repeat)]
+        elapsed, modules = min(runs, key=lambda run: run[0])
+        summary.append((
+            role,
+            f'{elapsed * 1000:.0f} ms process, {sum(modules.values()) / 1000:.0f} ms imports, {len(modules)} modules',
+        ))
+        if args.top:
+            report(f'{role}: top packages by import time', [
+                (package, f'{self_us / 1000:.1f} ms') for package, self_us in by_package(modules)[:args.top]
+            ])
+    report(f'Cold start (best of {args.repeat})', summary)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Общие утилиты для бенчмарков: настройка Django на SQLite в памяти,
+генерация данных и замер времени.
+
+Запуск из корня проекта: python -m benchmarks.<name>
+"""
+import os
+import random
+import timeit
+from decimal import Decimal
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+    import django
+    from django.conf import settings
+
+    # Бенчмарки не должны зависеть от локального Postgres
+    settings.DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+    settings.STATICFILES_DIRS = []
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def seed_orders(count, items_per_order=3, seed=0):
+    """Создает count заказов (по items_per_order позиций) и возвращает их id."""
+    from django.utils import timezone
+    from models.models import Address, CustomUser, MenuItem, Order, OrderItem, Restaurant
+
+    rnd = random.Random(seed)
+    user = CustomUser.objects.create_user(phone_number=f'99890{seed:07d}', password='benchmark')
+    address = Address.objects.create(
+        user=user, street='Amir Temur', house_number='1', city='Tashkent',
+        postal_code='100000', address_label='HOME',
+    )
+    restaurant = Restaurant.objects.create(
+        name='Плов Центр', description='Национальная кухня', address='Tashkent',
+        phone='998711234567', delivery_radius=5, min_order_amount=Decimal('30000.00'),
+        working_hours={'monday': '09:00-21:00'},
+    )
+    menu_items = MenuItem.objects.bulk_create([
+        MenuItem(
+            restaurant=restaurant, name=f'Блюдо {i}', description='Описание блюда',
+            price=Decimal(rnd.randrange(10000, 90000)) / 100, preparation_time=rnd.randrange(5, 40),
+        )
+        for i in range(20)
+    ])
+
+    now = timezone.now()
+    orders = []
+    for _ in range(count):
+        chosen = rnd.sample(menu_items, items_per_order)
+        total = sum(item.price for item in chosen)
+        orders.append(Order(
+            user=user, restaurant=restaurant, address=address, total_amount=total,
+            details={
+                'items': [{
+                    'menu_item_id': str(item.id), 'name': item.name,
+                    'quantity': 1, 'price': str(item.price),
+                } for item in chosen],
+                'total_amount': str(total),
+                'address': {'street': 'Amir Temur', 'house': '1', 'apartment': '', 'floor': '', 'entrance': ''},
+                'restaurant': {'name': restaurant.name, 'address': restaurant.address, 'phone': restaurant.phone},
+                'created_at': now.isoformat(),
+            },
+        ))
+    orders = Order.objects.bulk_create(orders, batch_size=1000)
+
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, menu_item_id=int(item['menu_item_id']), quantity=1, price_at_time=Decimal(item['price']))
+        for order in orders
+        for item in order.details['items']
+    ], batch_size=1000)
+    return [order.id for order in orders]
+
+
+def measure(func, repeat=5, number=1):
+    """Лучшее время одного вызова func (секунды)."""
+    timer = timeit.Timer(func)
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def report(title, rows):
+    print(f'\n{title}')
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f'  {name.ljust(width)}  {value}')
@@ -0,0 +1,137 @@
+"""
+Нагрузочный тест внутренних эндпоинтов: одинаковая нагрузка на WSGI и ASGI.
+
+Поднимите оба варианта на одной БД, например:
+
+    gunicorn config.wsgi -w 4 --threads 8 -b :8000
+    gunicorn config.asgi -w 4 -k uvicorn.workers.UvicornWorker -b :8001
+
+и сравните:
+
+    python -m benchmarks.load_internal_api --url http://127.0.0.1:8000 --order-id 1 --concurrency 200
+    python -m benchmarks.load_internal_api --url http://127.0.0.1:8001 --order-id 1 --concurrency 200
+
+Клиент - asyncio с keep-alive соединениями, без внешних зависимостей.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+class Connection:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=b'', headers=()):
+        """Возвращает (status, тело ответа)."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [
+            f'{method} {path} HTTP/1.1',
+            f'Host: {self.host}:{self.port}',
+            'Connection: keep-alive',
+            f'Content-Length: {len(body)}',
+            *headers,
+        ]
+        if body:
+            lines.append('Content-Type: application/json')
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('connection closed by server')
+        status = int(status_line.split()[1])
+        length, close = 0, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name = name.strip().lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'connection' and value.strip().lower() == 'close':
+                close = True
+        payload = await self.reader.readexactly(length)
+        if close:
+            self.close()
+        return status, payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def worker(target, requests, method, path, body, latencies, errors):
+    connection = Connection(target.hostname, target.port or 80)
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            try:
+                status, _ = await connection.request(method, path, body)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                connection.close()
+                errors.append('connection')
+                continue
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        connection.close()
+
+
+async def run(args):
+    target = urlsplit(args.url)
+    if args.endpoint == 'detail':
+        method, path, body = 'GET', f'/internal/order/{args.order_id}/', b''
+    else:
+        method, path = 'POST', f'/internal/order/{args.order_id}/complete/'
+        body = json.dumps({'status': args.status}).encode()
+
+    latencies, errors = [], []
+    per_worker = max(args.requests // args.concurrency, 1)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        worker(target, per_worker, method, path, body, latencies, errors)
+        for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    result = {
+        'url': args.url,
+        'endpoint': args.endpoint,
+        'concurrency': args.concurrency,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'duration_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(quantiles[49] * 1000, 2),
+        'p95_ms': round(quantiles[94] * 1000, 2),
+        'p99_ms': round(quantiles[98] * 1000, 2),
+    }
+    print(json.dumps(result, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--order-id', required=True)
+    parser.add_argument('--endpoint', choices=['detail', 'complete'], default='detail')
+    parser.add_argument('--status', default='PREPARING', help='status for --endpoint complete')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=10000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
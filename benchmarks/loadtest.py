@@ -0,0 +1,308 @@
+"""
+Нагрузочный стенд: синтетический трафик по профилям против локального сервера.
+
+Брокер заменяется публикацией в память, задачи Celery выполняются прямо в
+веб-процессе - RabbitMQ и воркеры не нужны:
+
+    export RABBITMQ_PUBLISHER_CLASS=models.testing.InMemoryPublisher CELERY_TASK_ALWAYS_EAGER=True
+    gunicorn config.asgi -w 4 -k uvicorn.workers.UvicornWorker -b :8000
+
+Данные (рестораны, меню, пользователи с адресами) создаются в той же БД,
+что у сервера, и описываются файлом состояния:
+
+    python -m benchmarks.loadtest seed --state loadtest_state.json
+    python -m benchmarks.loadtest run --state loadtest_state.json --profile lunch --duration 60 \\
+        --output results/lunch.json
+
+Нагрузка открытая: каждый эндпоинт получает запросы с заданной частотой
+независимо от ответов, а задержка считается от запланированного момента
+(ожидание свободного соединения входит в нее). В --output пишется JSON с
+p50/p95/p99 и пропускной способностью по каждому эндпоинту.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+from .common import report
+from .load_internal_api import Connection
+
+PASSWORD = 'loadtest'
+SEARCH_QUERIES = ['плов', 'лагман', 'самса', 'шашлык', 'pizza', 'burger', 'salad', 'суп']
+
+# Запросов в секунду на эндпоинт
+PROFILES = {
+    'smoke': {'register': 1, 'login': 1, 'restaurants': 2, 'menu': 2, 'search': 2, 'create_order': 1, 'internal_detail': 2},
+    'browse': {'register': 2, 'login': 5, 'restaurants': 50, 'menu': 50, 'search': 80, 'create_order': 5, 'internal_detail': 10},
+    'lunch': {'register': 2, 'login': 10, 'restaurants': 30, 'menu': 40, 'search': 40, 'create_order': 40, 'internal_detail': 80},
+}
+
+
+# --- seed -------------------------------------------------------------------
+
+def unique_phone_prefix(code):
+    # 3 + 6 цифр от времени + 6 цифр счетчика = 15 (max_length): повторные прогоны не пересекаются
+    return f'{code}{int(time.time()) % 10 ** 6:06d}'
+
+
+def seed(args):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+
+    from django.contrib.auth.hashers import make_password
+    from models.models import Address, CustomUser, MenuItem, Restaurant
+
+    rnd = random.Random(args.seed)
+    restaurants = Restaurant.objects.bulk_create([
+        Restaurant(
+            name=f'Loadtest {rnd.choice(SEARCH_QUERIES).title()} {i}', description='loadtest', address='Tashkent',
+            phone='998711234567', delivery_radius=5, min_order_amount=Decimal('0.00'),
+            latitude=Decimal('41.2') + Decimal(rnd.randrange(2000)) / 10000,
+            longitude=Decimal('69.1') + Decimal(rnd.randrange(3000)) / 10000,
+            working_hours={'monday': '09:00-21:00'},
+        )
+        for i in range(args.restaurants)
+    ])
+    menu = {}
+    for restaurant in restaurants:
+        items = MenuItem.objects.bulk_create([
+            MenuItem(
+                restaurant=restaurant, name=f'{rnd.choice(SEARCH_QUERIES)} {j}', description='loadtest',
+                price=Decimal(rnd.randrange(10, 200) * 1000), preparation_time=rnd.randrange(5, 40),
+            )
+            for j in range(args.menu_items)
+        ])
+        menu[str(restaurant.id)] = [item.id for item in items]
+
+    # Один хэш на всех: PBKDF2 на каждого пользователя занял бы минуты
+    password = make_password(PASSWORD)
+    prefix = unique_phone_prefix('996')
+    users = CustomUser.objects.bulk_create([
+        CustomUser(phone_number=f'{prefix}{i:06d}', password=password, first_name='Load', last_name='Test')
+        for i in range(args.users)
+    ])
+    addresses = Address.objects.bulk_create([
+        Address(user=user, street='Amir Temur', house_number=str(i), city='Tashkent', postal_code='100000',
+                address_label='HOME')
+        for i, user in enumerate(users)
+    ])
+
+    state = {
+        'menu': menu,
+        'users': [{'phone_number': user.phone_number, 'address': address.id} for user, address in zip(users, addresses)],
+    }
+    Path(args.state).write_text(json.dumps(state, indent=2))
+    report('Seeded', [
+        ('restaurants', len(restaurants)),
+        ('menu items', sum(len(items) for items in menu.values())),
+        ('users', len(state['users'])),
+        ('state', args.state),
+    ])
+
+
+# --- run --------------------------------------------------------------------
+
+class Harness:
+    def __init__(self, target, state, connections, seed):
+        self.target = target
+        self.state = state
+        self.pool = asyncio.Queue()
+        for _ in range(connections):
+            self.pool.put_nowait(Connection(target.hostname, target.port or 80))
+        self.rnd = random.Random(seed)
+        self.tokens = []
+        self.order_ids = []
+        self.registered = 0
+        self.register_prefix = unique_phone_prefix('997')
+        self.latencies = {}
+        self.statuses = {}
+
+    async def call(self, method, path, payload=None, token=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        headers = (f'Authorization: Bearer {token}',) if token else ()
+        connection = await self.pool.get()
+        try:
+            return await connection.request(method, path, body, headers)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError):
+            connection.close()
+            return None, b''
+        finally:
+            self.pool.put_nowait(connection)
+
+    async def login(self, user):
+        status, body = await self.call('POST', '/login/', {'phone_number': user['phone_number'], 'password': PASSWORD})
+        if status != 200:
+            raise RuntimeError(f"login failed for {user['phone_number']}: {status} {body[:200]!r}")
+        return json.loads(body)['access']
+
+    async def prepare(self):
+        """Токены пользователей из состояния - до замера, не входят в результаты."""
+        self.tokens = await asyncio.gather(*(self.login(user) for user in self.state['users']))
+
+    # Сценарии: (method, path, payload, token, обработчик ответа)
+
+    def register(self):
+        self.registered += 1
+        phone = f'{self.register_prefix}{self.registered:06d}'
+        payload = {'phone_number': phone, 'password': PASSWORD, 'first_name': 'Load', 'last_name': 'Test'}
+        return 'POST', '/register/', payload, None, None
+
+    def login_request(self):
+        user = self.rnd.choice(self.state['users'])
+        return 'POST', '/login/', {'phone_number': user['phone_number'], 'password': PASSWORD}, None, None
+
+    def restaurants(self):
+        return 'GET', '/api/restaurants/', None, self.rnd.choice(self.tokens), None
+
+    def menu(self):
+        return 'GET', '/api/menu-items/', None, self.rnd.choice(self.tokens), None
+
+    def search(self):
+        query = quote(self.rnd.choice(SEARCH_QUERIES)[:self.rnd.randrange(3, 7)])
+        return 'GET', f'/api/search/?q={query}&lat=41.3&lon=69.25', None, self.rnd.choice(self.tokens), None
+
+    def create_order(self):
+        index = self.rnd.randrange(len(self.tokens))
+        restaurant, items = self.rnd.choice(list(self.state['menu'].items()))
+        chosen = self.rnd.sample(items, min(len(items), self.rnd.randrange(1, 4)))
+        payload = {
+            'restaurant': int(restaurant),
+            'address': self.state['users'][index]['address'],
+            'items': [{'menu_item': item, 'quantity': self.rnd.randrange(1, 3)} for item in chosen],
+        }
+
+        def remember(status, body):
+            if status == 201:
+                self.order_ids.append(json.loads(body)['order']['id'])
+
+        return 'POST', '/api/orders/', payload, self.tokens[index], remember
+
+    def internal_detail(self):
+        if not self.order_ids:
+            return None
+        return 'GET', f'/internal/order/{self.rnd.choice(self.order_ids)}/', None, None, None
+
+    async def request(self, endpoint, scheduled):
+        spec = getattr(self, 'login_request' if endpoint == 'login' else endpoint)()
+        if spec is None:
+            return
+        method, path, payload, token, handle = spec
+        status, body = await self.call(method, path, payload, token)
+        self.latencies[endpoint].append(asyncio.get_running_loop().time() - scheduled)
+        self.statuses[endpoint][status or 'connection'] += 1
+        if handle is not None:
+            handle(status, body)
+
+    async def drive(self, endpoint, rate, duration):
+        """Открытая нагрузка: запрос каждые 1/rate секунд, не дожидаясь предыдущих."""
+        self.latencies[endpoint], self.statuses[endpoint] = [], Counter()
+        loop = asyncio.get_running_loop()
+        started, interval, tasks = loop.time(), 1 / rate, set()
+        for n in range(int(duration * rate)):
+            scheduled = started + n * interval
+            await asyncio.sleep(max(scheduled - loop.time(), 0))
+            task = asyncio.create_task(self.request(endpoint, scheduled))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+
+    def summary(self, duration):
+        endpoints = {}
+        for endpoint, latencies in self.latencies.items():
+            if not latencies:
+                continue
+            latencies.sort()
+            quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+            statuses = self.statuses[endpoint]
+            endpoints[endpoint] = {
+                'requests': len(latencies),
+                'errors': sum(count for status, count in statuses.items() if status == 'connection' or status >= 400),
+                'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+                'throughput_rps': round(len(latencies) / duration, 1),
+                'p50_ms': round(quantiles[49] * 1000, 2),
+                'p95_ms': round(quantiles[94] * 1000, 2),
+                'p99_ms': round(quantiles[98] * 1000, 2),
+                'max_ms': round(latencies[-1] * 1000, 2),
+            }
+        return endpoints
+
+
+def parse_rates(profile, overrides):
+    rates = dict(PROFILES[profile])
+    for override in overrides:
+        endpoint, _, rate = override.partition('=')
+        if endpoint not in rates:
+            raise SystemExit(f'unknown endpoint {endpoint!r}, expected one of {sorted(rates)}')
+        rates[endpoint] = float(rate)
+    return {endpoint: rate for endpoint, rate in rates.items() if rate > 0}
+
+
+async def run(args):
+    rates = parse_rates(args.profile, args.rate)
+    harness = Harness(urlsplit(args.url), json.loads(Path(args.state).read_text()), args.connections, args.seed)
+    await harness.prepare()
+
+    started_at = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    await asyncio.gather(*(harness.drive(endpoint, rate, args.duration) for endpoint, rate in rates.items()))
+    elapsed = time.perf_counter() - started
+
+    result = {
+        'url': args.url,
+        'profile': args.profile,
+        'rates': rates,
+        'connections': args.connections,
+        'started_at': started_at.isoformat(),
+        'duration_s': round(elapsed, 3),
+        'endpoints': harness.summary(elapsed),
+    }
+    report(f'{args.profile}: {elapsed:.1f} s, {args.connections} connections', [
+        (endpoint, f"{stats['throughput_rps']} rps, p50 {stats['p50_ms']} ms, p95 {stats['p95_ms']} ms, "
+                   f"p99 {stats['p99_ms']} ms, errors {stats['errors']}")
+        for endpoint, stats in result['endpoints'].items()
+    ])
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed')
+    seed_parser.add_argument('--state', default='loadtest_state.json')
+    seed_parser.add_argument('--restaurants', type=int, default=20)
+    seed_parser.add_argument('--menu-items', type=int, default=30)
+    seed_parser.add_argument('--users', type=int, default=200)
+    seed_parser.add_argument('--seed', type=int, default=0)
+
+    run_parser = commands.add_parser('run')
+    run_parser.add_argument('--url', default='http://127.0.0.1:8000')
+    run_parser.add_argument('--state', default='loadtest_state.json')
+    run_parser.add_argument('--profile', choices=sorted(PROFILES), default='smoke')
+    run_parser.add_argument('--rate', action='append', default=[], metavar='ENDPOINT=RPS',
+                            help='override a profile rate, 0 disables the endpoint')
+    run_parser.add_argument('--duration', type=float, default=30)
+    run_parser.add_argument('--connections', type=int, default=100)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--output', help='machine-readable results (JSON)')
+
+    args = parser.parse_args()
+    if args.command == 'seed':
+        seed(args)
+    else:
+        asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# Лента событий заказов для SSE-подписчиков /api/orders/stream/ этого процесса:
+# собственная exclusive-очередь, общие orders_queue/users_queue не читаются
+if os.getenv('ORDER_STREAM_CONSUMER') == 'True':
+    from models.events import order_status_feed
+
+    order_status_feed.start()
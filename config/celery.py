@@ -1,8 +1,16 @@
 import os
+import time
 from celery import Celery
+from celery.signals import task_prerun, task_postrun, worker_process_init
 from kombu import Exchange, Queue
 
+from models.metrics import TASK_RUNTIME, start_http_server
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Воркер не прогоняет system checks: они грузят URLconf, а с ним views и
+# сериализаторы. Проверки делает web-процесс (manage.py check при деплое)
+if os.getenv('DEFOOD_ROLE') == 'celery':
+    os.environ.setdefault('CELERY_SKIP_CHECKS', 'True')
 
 app = Celery('defood_startapp')
 
@@ -33,6 +41,64 @@ app.conf.update(
     result_serializer='json',
     timezone='Asia/Tashkent',
     enable_utc=True,
+    # Результаты - только у задач без ignore_result, без args/kwargs (result_extended).
+    # result_expires=None отключает встроенный celery.backend_cleanup (один большой
+    # DELETE): просроченные строки удаляет models.tasks.cleanup_task_results чанками
+    result_backend=os.getenv('CELERY_RESULT_BACKEND', 'django-db'),
+    result_extended=False,
+    result_expires=None,
+    # True - задачи выполняются в процессе веб-сервера (нагрузочный стенд без воркеров и брокера)
+    task_always_eager=os.getenv('CELERY_TASK_ALWAYS_EAGER', 'False') == 'True',
+    # apply_async из API не должен висеть на переподключениях: после коротких
+    # попыток ошибка уходит в circuit breaker, событие - в outbox (models.outbox)
+    broker_connection_timeout=float(os.getenv('CELERY_BROKER_CONNECTION_TIMEOUT', '2')),
+    task_publish_retry_policy={
+        'max_retries': int(os.getenv('CELERY_PUBLISH_MAX_RETRIES', '1')),
+        'interval_start': 0,
+        'interval_step': 0.2,
+        'interval_max': 0.2,
+    },
 )
 
+# Периодическая сверка агрегатов рейтингов (celery beat)
+app.conf.beat_schedule = {
+    'reconcile-rating-aggregates': {
+        'task': 'models.tasks.reconcile_rating_aggregates',
+        'schedule': float(os.getenv('RATING_RECONCILE_INTERVAL', '900')),
+    },
+    'relay-outbox-messages': {
+        'task': 'models.tasks.relay_outbox_messages',
+        'schedule': float(os.getenv('OUTBOX_RELAY_INTERVAL', '10')),
+    },
+    'cleanup-task-results': {
+        'task': 'models.tasks.cleanup_task_results',
+        'schedule': float(os.getenv('TASK_RESULT_CLEANUP_INTERVAL', '3600')),
+    },
+}
+
 app.autodiscover_tasks()
+
+
+# Метрики времени выполнения задач
+_task_started = {}
+
+
+@task_prerun.connect
+def _task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_RUNTIME.observe(time.perf_counter() - started, task=task.name, state=state or '')
+
+
+# CELERY_METRICS_PORT: каждый процесс пула слушает порт + свой индекс
+@worker_process_init.connect
+def _start_metrics_server(**kwargs):
+    port = os.getenv('CELERY_METRICS_PORT')
+    if port:
+        from billiard.process import current_process
+        start_http_server(int(port) + getattr(current_process(), 'index', 0))
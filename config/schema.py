@@ -0,0 +1,114 @@
+"""
+OpenAPI-схема, сгенерированная один раз.
+
+drf-yasg на каждый запрос схемы заново обходит все viewset'ы и
+сериализаторы. Схема не зависит от запроса (public=True, фиксированный url),
+поэтому она берется из файла OPENAPI_SCHEMA_FILE (пишется командой
+generate_openapi_schema при сборке) или генерируется при первом запросе,
+и дальше отдается готовыми байтами с ETag.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.encoding import force_bytes
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+API_INFO = openapi.Info(
+    title="DeFood API",
+    default_version='v1',
+    description="API documentation for DeFood service",
+    terms_of_service="https://www.defood.com/terms/",
+    contact=openapi.Contact(email="contact@defood.com"),
+    license=openapi.License(name="BSD License"),
+)
+API_URL = 'http://127.0.0.1:8000'  # Add your base URL here
+
+schema_view = get_schema_view(
+    API_INFO,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+    authentication_classes=(),
+    url=API_URL,
+)
+
+SCHEMA_CONTENT_TYPES = {
+    'json': 'application/json',
+    'yaml': 'application/yaml',
+}
+
+
+def generate_schema_json():
+    """Генерирует схему так же, как schema_view, и возвращает JSON-байты."""
+    generator = schema_view.generator_class(API_INFO, url=API_URL)
+    spec = OpenAPICodecJson([]).generate_swagger_object(generator.get_schema(None, public=True))
+    return force_bytes(OpenAPICodecJson([])._dump_dict(spec))
+
+
+class CachedSchema:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._documents = None
+
+    def _load(self):
+        path = settings.OPENAPI_SCHEMA_FILE
+        if path and Path(path).is_file():
+            content = Path(path).read_bytes()
+        else:
+            content = generate_schema_json()
+        spec = json.loads(content, object_pairs_hook=OrderedDict)
+        encoded = {'json': content, 'yaml': force_bytes(OpenAPICodecYaml([])._dump_dict(spec))}
+        return {
+            schema_format: (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+            for schema_format, body in encoded.items()
+        }
+
+    def get(self, schema_format):
+        if self._documents is None:
+            with self._lock:
+                if self._documents is None:
+                    self._documents = self._load()
+        return self._documents[schema_format]
+
+    def reset(self):
+        self._documents = None
+
+
+cached_schema = CachedSchema()
+
+
+def _schema_response(request, schema_format):
+    content, etag = cached_schema.get(schema_format)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type=SCHEMA_CONTENT_TYPES[schema_format])
+    response['ETag'] = etag
+    # Браузер перепроверяет схему каждый раз, но получает 304 без тела
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def schema_spec(request, format):
+    schema_format = format.lstrip('.')
+    if schema_format not in SCHEMA_CONTENT_TYPES:
+        raise Http404
+    return _schema_response(request, schema_format)
+
+
+def schema_ui(renderer):
+    """Swagger/Redoc UI: сама страница - drf-yasg, а ее запрос ?format=openapi - из кэша."""
+    ui_view = schema_view.with_ui(renderer, cache_timeout=0)
+
+    def view(request, *args, **kwargs):
+        if request.GET.get('format') == 'openapi':
+            return _schema_response(request, 'json')
+        return ui_view(request, *args, **kwargs)
+    return view
@@ -0,0 +1,8 @@
+from django.test.runner import DiscoverRunner, get_max_test_processes
+
+
+class ParallelDiscoverRunner(DiscoverRunner):
+    """DiscoverRunner, который без --parallel запускает по процессу на ядро."""
+
+    def __init__(self, *args, parallel=0, **kwargs):
+        super().__init__(*args, parallel=parallel or get_max_test_processes(), **kwargs)
@@ -14,35 +14,27 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
-from django.urls import path, include, re_path
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
-schema_view = get_schema_view(
-   openapi.Info(
-      title="DeFood API",
-      default_version='v1',
-      description="API documentation for DeFood service",
-      terms_of_service="https://www.defood.com/terms/",
-      contact=openapi.Contact(email="contact@defood.com"),
-      license=openapi.License(name="BSD License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-   authentication_classes=(),
-   url='http://127.0.0.1:8000',  # Add your base URL here
-)
-
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('', include('models.urls')),
-    
-    # Updated Swagger URLs
-    path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
+
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
+
+if settings.DOCS_ENABLED:
+    from config.schema import schema_spec, schema_ui
+
+    # Swagger/Redoc: схема генерируется один раз и отдается с ETag (config/schema.py)
+    urlpatterns += [
+        path('swagger<format>/', schema_spec, name='schema-json'),
+        path('swagger/', schema_ui('swagger'), name='schema-swagger-ui'),
+        path('redoc/', schema_ui('redoc'), name='schema-redoc'),
+    ]
+
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -2,7 +2,7 @@ from django.contrib import admin
 from .models import (
     Restaurant, MenuItem, 
     Order, OrderItem, Courier,
-    Address
+    Address, Rating
 )
 
 admin.site.register(Restaurant)
@@ -10,4 +10,5 @@ admin.site.register(MenuItem)
 admin.site.register(Order)
 admin.site.register(OrderItem)
 admin.site.register(Courier)
-admin.site.register(Address)
\ No newline at end of file
+admin.site.register(Address)
+admin.site.register(Rating)
@@ -0,0 +1,94 @@
+"""
+Circuit breaker вокруг обращений к RabbitMQ.
+
+closed -> open после failure_threshold ошибок подряд; в open вызовы сразу
+отклоняются (CircuitOpenError) без попытки подключения. Через reset_timeout
+breaker переходит в half_open и пропускает до half_open_max_calls пробных
+вызовов: успех закрывает его, ошибка снова открывает.
+
+Состояние - в памяти процесса: у каждого web/Celery процесса свой breaker,
+общий для его потоков.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .metrics import BREAKER_REJECTED, BREAKER_STATE, BREAKER_TRANSITIONS
+
+CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, half_open_max_calls=1, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trials = 0
+        self._lock = threading.Lock()
+        BREAKER_STATE.set(STATE_VALUES[CLOSED], breaker=name)
+
+    def _set_state(self, state):
+        self.state = state
+        BREAKER_STATE.set(STATE_VALUES[state], breaker=self.name)
+        BREAKER_TRANSITIONS.inc(breaker=self.name, state=state)
+
+    def allow(self):
+        """True - вызов можно выполнять; после него обязателен record_success/record_failure."""
+        if self.state == CLOSED:
+            return True
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+                self.trials = 0
+            if self.state == HALF_OPEN and self.trials < self.half_open_max_calls:
+                self.trials += 1
+                return True
+            if self.state == CLOSED:
+                return True
+        BREAKER_REJECTED.inc(breaker=self.name)
+        return False
+
+    def record_success(self):
+        if self.state == CLOSED and not self.failures:
+            return
+        with self._lock:
+            self.failures = 0
+            if self.state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = self.clock()
+                self._set_state(OPEN)
+
+    def call(self, func, *args, **kwargs):
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit breaker '{self.name}' is open")
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+# Общий для API-диспатча задач, RabbitMQPublisher и health-пробы
+broker_breaker = CircuitBreaker(
+    'rabbitmq',
+    failure_threshold=settings.BROKER_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.BROKER_BREAKER_RESET_TIMEOUT,
+)
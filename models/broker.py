@@ -0,0 +1,119 @@
+"""
+Топология RabbitMQ: основные очереди, очереди отложенных повторов и DLQ.
+
+Повтор без sleep в процессе: consumer подтверждает сообщение и публикует
+его в <queue>.retry.<n> с x-message-ttl = BROKER_RETRY_DELAYS[n-1]; по
+истечении TTL брокер возвращает его (dead-letter) в defood_exchange с
+исходным routing key, то есть обратно в основную очередь. После всех
+попыток сообщение уходит в <queue>.dlq, откуда его возвращает команда
+replay_dead_letters.
+
+Аргументы основных очередей не меняются, поэтому существующие durable
+очереди объявляются без PRECONDITION_FAILED.
+"""
+import pika
+from django.conf import settings
+
+EXCHANGE = 'defood_exchange'
+QUEUES = {
+    'defood.orders.created': 'orders_queue',
+    'defood.users.created': 'users_queue',
+}
+ROUTING_KEYS = {queue: routing_key for routing_key, queue in QUEUES.items()}
+
+# Смены статуса заказа для SSE: в durable-очереди не попадают (их ключи точные),
+# их читают только exclusive-очереди OrderStatusFeed в ASGI-процессах
+ORDER_STATUS_ROUTING_KEY = 'defood.orders.status_changed'
+ORDER_EVENTS_PATTERN = 'defood.orders.*'
+
+RETRY_HEADER = 'x-retry-count'
+ROUTING_KEY_HEADER = 'x-original-routing-key'
+ERROR_HEADER = 'x-last-error'
+
+
+def connection_parameters():
+    return pika.URLParameters(settings.RABBITMQ_URL)
+
+
+def retry_queue(queue, attempt):
+    return f'{queue}.retry.{attempt}'
+
+
+def dead_letter_queue(queue):
+    return f'{queue}.dlq'
+
+
+def declare_topology(channel):
+    channel.exchange_declare(exchange=EXCHANGE, exchange_type='topic', durable=True)
+    for routing_key, queue in QUEUES.items():
+        channel.queue_declare(queue=queue, durable=True)
+        channel.queue_bind(exchange=EXCHANGE, queue=queue, routing_key=routing_key)
+        for attempt, delay in enumerate(settings.BROKER_RETRY_DELAYS, start=1):
+            channel.queue_declare(queue=retry_queue(queue, attempt), durable=True, arguments={
+                'x-message-ttl': int(delay * 1000),
+                'x-dead-letter-exchange': EXCHANGE,
+                'x-dead-letter-routing-key': routing_key,
+            })
+        channel.queue_declare(queue=dead_letter_queue(queue), durable=True)
+
+
+def retry_or_dead_letter(channel, queue, routing_key, body, properties, error, retryable=True):
+    """
+    Публикует сообщение в следующую retry-очередь или в DLQ и возвращает
+    'retry' / 'dead_letter'. Исходное сообщение подтверждает вызывающий -
+    после успешной публикации.
+    """
+    headers = dict(getattr(properties, 'headers', None) or {})
+    attempt = int(headers.get(RETRY_HEADER, 0)) + 1
+    headers.update({
+        RETRY_HEADER: attempt,
+        ROUTING_KEY_HEADER: routing_key,
+        ERROR_HEADER: f'{type(error).__name__}: {error}'[:500],
+    })
+    if retryable and attempt <= len(settings.BROKER_RETRY_DELAYS):
+        target, result = retry_queue(queue, attempt), 'retry'
+    else:
+        target, result = dead_letter_queue(queue), 'dead_letter'
+    channel.basic_publish(
+        exchange='',
+        routing_key=target,
+        body=body,
+        properties=pika.BasicProperties(
+            delivery_mode=2,
+            content_type=getattr(properties, 'content_type', None) or 'application/json',
+            headers=headers,
+        ),
+        mandatory=True,
+    )
+    return result
+
+
+def replay_dead_letters(channel, queue, limit=None):
+    """Возвращает сообщения из DLQ в defood_exchange со сброшенным счетчиком попыток."""
+    replayed = 0
+    while limit is None or replayed < limit:
+        method, properties, body = channel.basic_get(queue=dead_letter_queue(queue))
+        if method is None:
+            break
+        headers = dict(properties.headers or {})
+        routing_key = headers.pop(ROUTING_KEY_HEADER, ROUTING_KEYS[queue])
+        headers.pop(RETRY_HEADER, None)
+        headers.pop(ERROR_HEADER, None)
+        channel.basic_publish(
+            exchange=EXCHANGE,
+            routing_key=routing_key,
+            body=body,
+            properties=pika.BasicProperties(
+                delivery_mode=2, content_type=properties.content_type, headers=headers or None,
+            ),
+            mandatory=True,
+        )
+        channel.basic_ack(delivery_tag=method.delivery_tag)
+        replayed += 1
+    return replayed
+
+
+def retry_countdown(retries):
+    """Задержка повтора Celery-задачи публикации (retry с countdown, без sleep в воркере)."""
+    delays = settings.BROKER_RETRY_DELAYS
+    return delays[min(retries, len(delays) - 1)]
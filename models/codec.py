@@ -0,0 +1,137 @@
+"""
+Кодирование событий для RabbitMQ. Формат определяется content_type сообщения.
+
+application/json - исходный формат, все id и суммы строками. Его
+понимают все потребители, и он остается форматом по умолчанию на время
+миграции.
+
+application/vnd.defood.order-created.v1+msgpack - компактный формат
+order_created. Это msgpack-массив фиксированной схемы, без имен полей:
+
+    [order_id, timestamp_us, user_id, restaurant_id, total_amount_minor, status,
+     [[menu_item_id, quantity, price_minor], ...]]
+
+id - целые числа. Суммы - целые в минимальных единицах (x100, у DecimalField
+два знака). timestamp_us - микросекунды от 1970-01-01 для наивного
+datetime.now() продюсера. Поля добавляются только с новой версией
+content_type (v2), а v1 декодируется, пока есть продюсеры со старым кодом.
+
+Отправку в msgpack включает BROKER_MESSAGE_FORMAT=msgpack. Если событие не
+укладывается в схему без потерь (нецелые id, другие поля), оно уходит в
+JSON. Если msgpack не установлен, все события тоже уходят в JSON. decode()
+принимает оба формата, так что потребители переключаются раньше продюсеров.
+"""
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = 'application/json'
+ORDER_CREATED_MSGPACK_V1 = 'application/vnd.defood.order-created.v1+msgpack'
+
+_ORDER_KEYS = {'order_id', 'event_type', 'timestamp', 'data'}
+_ORDER_DATA_KEYS = {'user_id', 'restaurant_id', 'total_amount', 'status', 'items'}
+_ITEM_KEYS = {'menu_item_id', 'quantity', 'price'}
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _id(value):
+    if not (value.isascii() and value.isdigit()) or (value[0] == '0' and value != '0'):
+        raise ValueError(f"Not a canonical integer id: {value!r}")
+    return int(value)
+
+
+def _minor(value):
+    # str(Decimal) поля с decimal_places=2: '25000.00' -> 2500000, без Decimal на горячем пути
+    units, dot, cents = value.partition('.')
+    if not dot or len(cents) != 2:
+        raise ValueError(f"Not a 2-decimal amount: {value!r}")
+    minor = int(units + cents)
+    # Отсекает '+1.00', '007.00', '-0.00', '1_0.00' и т.п. - декодер вернул бы другую строку
+    if _amount(minor) != value:
+        raise ValueError(f"Amount does not round-trip: {value!r}")
+    return minor
+
+
+def _amount(minor):
+    # Как str(Decimal) с двумя знаками: 2500000 -> '25000.00'
+    units, cents = divmod(abs(minor), 100)
+    return f"{'-' if minor < 0 else ''}{units}.{cents:02d}"
+
+
+def _timestamp(value):
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None or moment.isoformat() != value:
+        raise ValueError(f"Timestamp does not round-trip: {value!r}")
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def _pack_order_created(message):
+    data = message['data']
+    if message.keys() != _ORDER_KEYS or data.keys() != _ORDER_DATA_KEYS:
+        raise ValueError("Unexpected order_created fields")
+    items = []
+    for item in data['items']:
+        if item.keys() != _ITEM_KEYS or type(item['quantity']) is not int:
+            raise ValueError("Unexpected order item fields")
+        items.append([_id(item['menu_item_id']), item['quantity'], _minor(item['price'])])
+    return msgpack.packb([
+        _id(message['order_id']),
+        _timestamp(message['timestamp']),
+        _id(data['user_id']),
+        _id(data['restaurant_id']),
+        _minor(data['total_amount']),
+        data['status'],
+        items,
+    ])
+
+
+def _unpack_order_created(body):
+    order_id, timestamp_us, user_id, restaurant_id, total_minor, status, items = msgpack.unpackb(body)
+    return {
+        'order_id': str(order_id),
+        'event_type': 'order_created',
+        'timestamp': (_EPOCH + timestamp_us * _MICROSECOND).isoformat(),
+        'data': {
+            'user_id': str(user_id),
+            'restaurant_id': str(restaurant_id),
+            'total_amount': _amount(total_minor),
+            'status': status,
+            'items': [{
+                'menu_item_id': str(menu_item_id),
+                'quantity': quantity,
+                'price': _amount(price_minor),
+            } for menu_item_id, quantity, price_minor in items],
+        },
+    }
+
+
+def encode(message, message_format=None):
+    """Возвращает (body, content_type)."""
+    message_format = message_format or settings.BROKER_MESSAGE_FORMAT
+    if message_format == 'msgpack' and msgpack is not None and message.get('event_type') == 'order_created':
+        try:
+            return _pack_order_created(message), ORDER_CREATED_MSGPACK_V1
+        except (KeyError, TypeError, ValueError, ArithmeticError):
+            pass
+    return json.dumps(message).encode(), JSON
+
+
+def decode(body, content_type=None):
+    """
+    Тело сообщения -> событие в JSON-виде. Без content_type - JSON, как у
+    сообщений до появления кодеков. Ошибки формата - ValueError/TypeError.
+    """
+    if content_type == ORDER_CREATED_MSGPACK_V1:
+        if msgpack is None:
+            raise ValueError(f"{content_type} requires msgpack")
+        return _unpack_order_created(body)
+    if content_type in (None, '', JSON):
+        return json.loads(body)
+    raise ValueError(f"Unsupported content type: {content_type}")
@@ -0,0 +1,21 @@
+"""
+swagger_auto_schema / openapi для views без обязательного импорта drf-yasg.
+
+При DOCS_ENABLED=False (роли api, celery, consumer) drf-yasg не в
+INSTALLED_APPS и не импортируется: декоратор возвращает view как есть, а
+openapi.Schema(...), openapi.Parameter(...) и константы - заглушки.
+"""
+from django.conf import settings
+
+if settings.DOCS_ENABLED:
+    from drf_yasg import openapi
+    from drf_yasg.utils import swagger_auto_schema
+else:
+    def swagger_auto_schema(*args, **kwargs):
+        return lambda view: view
+
+    class _OpenAPIStub:
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: None
+
+    openapi = _OpenAPIStub()
@@ -0,0 +1,197 @@
+"""
+In-process fan-out статусов заказов для SSE-подписчиков.
+
+publish() можно вызывать из любого потока (sync view, consumer);
+события доставляются в asyncio.Queue подписчика через call_soon_threadsafe.
+Хаб живет в памяти процесса, поэтому между ASGI-процессами события ходят
+через брокер: OrderStatusFeed (ORDER_STREAM_CONSUMER=True) читает
+defood.orders.* из собственной exclusive-очереди и публикует в хаб, а
+publish_order_status() отправляет смены статуса в defood_exchange.
+"""
+import asyncio
+import functools
+import logging
+import threading
+import time
+from datetime import datetime
+
+import pika
+
+from .broker import EXCHANGE, ORDER_EVENTS_PATTERN, ORDER_STATUS_ROUTING_KEY, connection_parameters
+from .codec import decode, encode
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, user_id, loop, maxsize):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def get(self):
+        return self.queue.get()
+
+    def _deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Медленный клиент: пропускаем событие, а не копим память
+            logger.warning(f"Dropping order event for user {self.user_id}: subscriber queue is full")
+
+
+class OrderStatusHub:
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(str(user_id), asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(subscription.user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(str(user_id), ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:
+                # Event loop подписчика уже закрыт
+                self.unsubscribe(subscription)
+        return len(subscribers)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+order_status_hub = OrderStatusHub()
+
+
+def build_status_message(order):
+    return {
+        'order_id': str(order.id),
+        'event_type': 'status_changed',
+        'timestamp': datetime.now().isoformat(),
+        'data': {
+            'user_id': str(order.user_id),
+            'status': order.status,
+            'updated_at': order.updated_at.isoformat(),
+        },
+    }
+
+
+def hub_event(message):
+    """Событие брокера (order_created, status_changed) -> (user_id, событие для SSE) или None."""
+    if not isinstance(message, dict) or not isinstance(message.get('data'), dict):
+        return None
+    data = message['data']
+    if not data.get('user_id'):
+        return None
+    return data['user_id'], {
+        'event': message.get('event_type'),
+        'order_id': message.get('order_id'),
+        'status': data.get('status'),
+        'updated_at': data.get('updated_at') or message.get('timestamp'),
+    }
+
+
+class OrderStatusFeed:
+    """
+    Лента событий заказов для хаба одного ASGI-процесса. Очередь без имени,
+    exclusive и auto-delete: каждый процесс получает копию всех событий и не
+    конкурирует с RabbitMQConsumer за durable orders_queue. Только
+    публикует в хаб - проекции и прочие побочные эффекты здесь не выполняются.
+    """
+
+    def __init__(self, hub, reconnect_delay=5):
+        self.hub = hub
+        self.reconnect_delay = reconnect_delay
+        self._connection = None
+        self._channel = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name='order-status-feed', daemon=True)
+            self._thread.start()
+
+    def run(self):
+        while True:
+            try:
+                self.consume()
+            except Exception as e:
+                logger.error(f"Order status feed disconnected: {e}")
+            time.sleep(self.reconnect_delay)
+
+    def consume(self):
+        connection = pika.BlockingConnection(connection_parameters())
+        try:
+            channel = connection.channel()
+            channel.exchange_declare(exchange=EXCHANGE, exchange_type='topic', durable=True)
+            queue = channel.queue_declare(queue='', exclusive=True, auto_delete=True).method.queue
+            channel.queue_bind(exchange=EXCHANGE, queue=queue, routing_key=ORDER_EVENTS_PATTERN)
+            channel.basic_consume(queue=queue, on_message_callback=self.handle, auto_ack=True)
+            self._connection, self._channel = connection, channel
+            channel.start_consuming()
+        finally:
+            self._connection = self._channel = None
+            if not connection.is_closed:
+                connection.close()
+
+    def handle(self, ch, method, properties, body):
+        # Сообщения Celery-задач с тем же routing key (send_order_to_queue) - не события
+        if 'task' in (getattr(properties, 'headers', None) or {}):
+            return
+        try:
+            message = decode(body, getattr(properties, 'content_type', None))
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Skipping undecodable order event: {e}")
+            return
+        event = hub_event(message)
+        if event is not None:
+            self.hub.publish(*event)
+
+    def publish(self, message):
+        """
+        Публикует событие в defood_exchange через соединение ленты (из любого
+        потока). False - лента не подключена, событие не отправлено.
+        """
+        connection, channel = self._connection, self._channel
+        if connection is None or connection.is_closed:
+            return False
+        body, content_type = encode(message)
+        try:
+            # BlockingConnection не потокобезопасен: публикация выполняется в потоке ленты
+            connection.add_callback_threadsafe(functools.partial(
+                channel.basic_publish, exchange=EXCHANGE, routing_key=ORDER_STATUS_ROUTING_KEY, body=body,
+                properties=pika.BasicProperties(content_type=content_type),
+            ))
+        except Exception as e:
+            logger.warning(f"Order status event not published: {e}")
+            return False
+        return True
+
+
+order_status_feed = OrderStatusFeed(order_status_hub)
+
+
+def publish_order_status(order):
+    """
+    Смена статуса для SSE-подписчиков всех процессов. Без ленты (один
+    процесс, тесты) - сразу в локальный хаб.
+    """
+    message = build_status_message(order)
+    if not order_status_feed.publish(message):
+        order_status_hub.publish(*hub_event(message))
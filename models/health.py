@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .breaker import broker_breaker
+from .metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+DEPENDENCY_UP = Gauge('defood_dependency_up', 'Result of the last health probe (1 = up)', ['dependency'])
+
+
+class HealthProber:
+    """
+    Фоновый поток, который периодически проверяет БД и RabbitMQ и кэширует
+    результат. Health-эндпоинты только читают готовый снимок и не ждут брокер.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.snapshot = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='health-prober', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.probe()
+            except Exception as e:
+                logger.error(f"Health probe failed: {e}")
+            self._stopped.wait(self.interval)
+
+    def probe(self):
+        checks = {
+            'database': self.check_database(),
+            'rabbitmq': self.check_broker(),
+        }
+        checks['rabbitmq']['breaker'] = broker_breaker.state
+        for name, check in checks.items():
+            DEPENDENCY_UP.set(1 if check['ok'] else 0, dependency=name)
+        # Снимок заменяется целиком - читателям не нужна блокировка
+        self.snapshot = {'checks': checks, 'checked_at': time.time()}
+        return self.snapshot
+
+    def check_database(self):
+        started = time.perf_counter()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return self._result(True, started)
+        except Exception as e:
+            return self._result(False, started, e)
+        finally:
+            connection.close()
+
+    def check_broker(self):
+        from .tasks import RabbitMQPublisher
+
+        # Проба идет через общий breaker: при недоступном брокере он открывается
+        # фоновым потоком еще до пользовательских запросов, а после reset_timeout
+        # пробным (half-open) вызовом обычно оказывается именно проба
+        started = time.perf_counter()
+        if not broker_breaker.allow():
+            return self._result(False, started, 'circuit breaker open')
+        publisher = RabbitMQPublisher()
+        try:
+            if publisher.connect():
+                broker_breaker.record_success()
+                return self._result(True, started)
+            broker_breaker.record_failure()
+            return self._result(False, started, 'RabbitMQ connection failed')
+        except Exception as e:
+            broker_breaker.record_failure()
+            return self._result(False, started, e)
+        finally:
+            publisher.close()
+
+    def _result(self, ok, started, error=None):
+        result = {'ok': ok, 'latency_ms': round((time.perf_counter() - started) * 1000, 2)}
+        if error is not None:
+            result['error'] = str(error)
+        return result
+
+    def readiness(self):
+        """Возвращает (ready, payload) по последнему снимку."""
+        self.ensure_started()
+        snapshot = self.snapshot
+        if snapshot is None:
+            return False, {'status': 'starting'}
+
+        age = time.time() - snapshot['checked_at']
+        payload = {'checks': snapshot['checks'], 'age_seconds': round(age, 3)}
+        if age > self.interval * 3:
+            payload['status'] = 'stale'
+            return False, payload
+
+        ready = all(check['ok'] for check in snapshot['checks'].values())
+        payload['status'] = 'healthy' if ready else 'error'
+        return ready, payload
+
+
+prober = HealthProber(interval=settings.HEALTH_CHECK_INTERVAL)
@@ -0,0 +1,94 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Статистика текущего запроса (None вне запроса: Celery, consumer, shell)
+_request_stats = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'broker_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.broker_time = 0.0
+
+
+def current_stats():
+    return _request_stats.get()
+
+
+@contextmanager
+def collect_request_stats():
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+def _db_execute_wrapper(execute, sql, params, many, context):
+    # Статистика берется из contextvar, поэтому запросы из sync_to_async-потоков
+    # (async ORM) тоже попадают в счетчик своего запроса
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - start
+
+
+def _install_wrapper(connection, **kwargs):
+    if _db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_execute_wrapper)
+
+
+def install_db_instrumentation():
+    """Вешает счетчик запросов на все соединения с БД, текущие и будущие."""
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    connection_created.connect(_install_wrapper, dispatch_uid='models.instrumentation')
+    for connection in connections.all(initialized_only=True):
+        _install_wrapper(connection)
+
+
+@contextmanager
+def track_broker_publish():
+    stats = _request_stats.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.broker_time += time.perf_counter() - start
+
+
+def query_budget(max_queries):
+    """Declares the maximum number of SQL queries a view may issue."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def get_query_budget(view_func, method=None):
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is not None:
+        return budget
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return None
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get((method or '').lower())
+    budgets = getattr(view_class, 'query_budgets', None) or {}
+    if action in budgets:
+        return budgets[action]
+    return getattr(view_class, 'query_budget', None)
@@ -0,0 +1,38 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from models.models import Order
+from models.rollups import backfill_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild hourly/daily restaurant revenue rollups from order history, one day per transaction"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="First day to rebuild (ISO date), defaults to the first order")
+        parser.add_argument('--until', help="Day to stop before (ISO date), defaults to today")
+        parser.add_argument('--restaurant', type=int, help="Only this restaurant")
+
+    def handle(self, *args, **options):
+        try:
+            until = date.fromisoformat(options['until']) if options['until'] else timezone.localdate()
+            if options['since']:
+                since = date.fromisoformat(options['since'])
+            else:
+                first = Order.objects.order_by('created_at').values_list('created_at', flat=True).first()
+                if first is None:
+                    self.stdout.write("No orders, nothing to backfill")
+                    return
+                since = timezone.localtime(first).date()
+        except ValueError as e:
+            raise CommandError(e)
+
+        total = 0
+        for day, buckets in backfill_rollups(since, until, options['restaurant']):
+            total += buckets
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{day}: {buckets} hourly buckets")
+        days = max((until - since).days, 0)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} hourly buckets over {days} days"))
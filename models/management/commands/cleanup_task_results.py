@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from models.results import delete_expired_results
+
+
+class Command(BaseCommand):
+    help = "Delete Celery task results older than TASK_RESULT_TTL, in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl', type=int, help=f"Seconds, defaults to TASK_RESULT_TTL ({settings.TASK_RESULT_TTL})")
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, **options):
+        deleted = delete_expired_results(ttl=options['ttl'], chunk_size=options['chunk_size'])
+        for model, count in deleted.items():
+            self.stdout.write(self.style.SUCCESS(f"{model}: deleted {count} rows"))
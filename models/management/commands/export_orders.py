@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from models.exports import EXPORT_FORMATS, export_rows, parse_bound, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream orders (or order items) to CSV/NDJSON without loading the range into memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--level', choices=['orders', 'items'], default='orders')
+        parser.add_argument('--since', help="ISO date or datetime, inclusive")
+        parser.add_argument('--until', help="ISO date or datetime, exclusive")
+        parser.add_argument('--restaurant', type=int)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--output', '-o', help="File path, defaults to stdout")
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_bound(options['since'])
+            until = parse_bound(options['until'])
+        except ValueError as e:
+            raise CommandError(e)
+
+        headers, rows = export_rows(
+            options['level'], since, until, options['restaurant'], chunk_size=options['chunk_size']
+        )
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in stream_export(options['format'], headers, rows):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.schema import generate_schema_json
+
+
+class Command(BaseCommand):
+    help = "Pre-generate the OpenAPI schema served by /swagger.json, /swagger/ and /redoc/"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help="Defaults to OPENAPI_SCHEMA_FILE")
+        parser.add_argument('--check', action='store_true', help="Fail if the file differs from the live schema")
+
+    def handle(self, *args, **options):
+        output = options['output'] or settings.OPENAPI_SCHEMA_FILE
+        if not output:
+            raise CommandError("Pass --output or set OPENAPI_SCHEMA_FILE")
+        path = Path(output)
+        content = generate_schema_json()
+
+        if options['check']:
+            if not path.is_file() or path.read_bytes() != content:
+                raise CommandError(f"{path} is out of date, run generate_openapi_schema")
+            self.stdout.write(self.style.SUCCESS(f"{path} is up to date"))
+            return
+
+        path.write_bytes(content)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(content)} bytes to {path}"))
@@ -0,0 +1,53 @@
+import time
+from datetime import date, datetime, time as dt_time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from models.synthetic import PASSWORD, Plan, default_until, generate
+
+
+class Command(BaseCommand):
+    help = "Generate users, addresses, restaurants, menus and orders around Tashkent for performance work"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--restaurants', type=int, default=2000)
+        parser.add_argument('--menu-size', type=int, default=30, help="Median menu items per restaurant")
+        parser.add_argument('--orders', type=int, default=1000000)
+        parser.add_argument('--days', type=int, default=180, help="Order history length")
+        parser.add_argument('--until', help="End of the history (ISO date), defaults to today")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--chunk-size', type=int, default=20000)
+        parser.add_argument('--workers', type=int, default=4, help="Parallel writer processes (Postgres only)")
+
+    def handle(self, *args, **options):
+        tz = timezone.get_current_timezone()
+        try:
+            until = (
+                datetime.combine(date.fromisoformat(options['until']), dt_time.min, tzinfo=tz)
+                if options['until'] else default_until(tz)
+            )
+        except ValueError as e:
+            raise CommandError(e)
+        if min(options['users'], options['restaurants'], options['chunk_size'], options['days']) < 1:
+            raise CommandError("--users, --restaurants, --chunk-size and --days must be positive")
+
+        started = time.perf_counter()
+        plan = Plan.build(
+            options['seed'], options['users'], options['restaurants'], options['orders'],
+            options['chunk_size'], until, options['days'], menu_size=options['menu_size'],
+        )
+        totals = {}
+        for phase, rows in generate(plan, workers=options['workers']):
+            totals[phase] = totals.get(phase, 0) + rows
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{phase}: {totals[phase]} rows")
+
+        elapsed = time.perf_counter() - started
+        summary = ', '.join(f"{count} {phase}" for phase, count in totals.items())
+        self.stdout.write(self.style.SUCCESS(f"Generated {summary} in {elapsed:.1f}s (password '{PASSWORD}')"))
+        self.stdout.write(
+            "Raw inserts skip signals: run rebuild_order_summaries and backfill_restaurant_stats "
+            "to fill the read models"
+        )
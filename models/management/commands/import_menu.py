@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from models.menu_import import MENU_IMPORT_FORMATS, MenuImportError, import_menu, parse_menu
+from models.models import Restaurant
+
+
+class Command(BaseCommand):
+    help = "Bulk upsert a restaurant menu from a CSV or JSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('restaurant_id', type=int)
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=MENU_IMPORT_FORMATS, help="Defaults to the file extension")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not Restaurant.objects.filter(pk=options['restaurant_id']).exists():
+            raise CommandError(f"Restaurant {options['restaurant_id']} does not exist")
+        path = Path(options['path'])
+        import_format = options['format'] or ('csv' if path.suffix.lower() == '.csv' else 'json')
+        try:
+            rows = parse_menu(path.read_bytes(), import_format)
+            result = import_menu(options['restaurant_id'], rows, chunk_size=options['chunk_size'])
+        except MenuImportError as e:
+            for error in e.errors[:50]:
+                self.stderr.write(f"row {error['row']}: {'; '.join(error['errors'])}")
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['imported']} menu items, menu version {result['menu_version']}"
+        ))
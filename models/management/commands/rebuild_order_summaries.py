@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from models.models import Order
+from models.projections import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the OrderSummary read model from orders, streaming in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--since', help="Only orders created at or after this ISO date")
+
+    def handle(self, *args, **options):
+        queryset = Order.objects.all()
+        if options['since']:
+            queryset = queryset.filter(created_at__gte=options['since'])
+        total = rebuild_summaries(queryset, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} order summaries"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from models.ratings import recompute_all_ratings
+
+
+class Command(BaseCommand):
+    help = "Recompute restaurant and courier rating aggregates from individual ratings, in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        fixed = recompute_all_ratings(chunk_size=options['chunk_size'])
+        for model, count in fixed.items():
+            self.stdout.write(self.style.SUCCESS(f"{model}: fixed {count} rows"))
@@ -0,0 +1,32 @@
+import pika
+from django.core.management.base import BaseCommand, CommandError
+
+from models.broker import QUEUES, connection_parameters, dead_letter_queue, declare_topology, replay_dead_letters
+
+
+class Command(BaseCommand):
+    help = "Move messages from <queue>.dlq back to defood_exchange with the retry counter reset"
+
+    def add_arguments(self, parser):
+        parser.add_argument('queue', choices=sorted(QUEUES.values()))
+        parser.add_argument('--limit', type=int, help="Replay at most this many messages")
+        parser.add_argument('--dry-run', action='store_true', help="Only report the DLQ depth")
+
+    def handle(self, *args, **options):
+        queue = options['queue']
+        try:
+            connection = pika.BlockingConnection(connection_parameters())
+        except pika.exceptions.AMQPConnectionError as e:
+            raise CommandError(f"RabbitMQ is unavailable: {e}")
+        try:
+            channel = connection.channel()
+            channel.confirm_delivery()
+            declare_topology(channel)
+            if options['dry_run']:
+                depth = channel.queue_declare(queue=dead_letter_queue(queue), passive=True).method.message_count
+                self.stdout.write(f"{dead_letter_queue(queue)}: {depth} messages")
+                return
+            replayed = replay_dead_letters(channel, queue, limit=options['limit'])
+        finally:
+            connection.close()
+        self.stdout.write(self.style.SUCCESS(f"{dead_letter_queue(queue)}: replayed {replayed} messages"))
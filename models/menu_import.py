@@ -0,0 +1,157 @@
+"""
+Массовый импорт меню ресторана из CSV / JSON.
+
+Строки проверяются за один проход заранее собранными конвертерами колонок
+(все ошибки файла сразу, без ModelSerializer на строку), затем пишутся
+bulk_create(update_conflicts=True) чанками по ключу (restaurant, name) в
+одной транзакции. menu_version ресторана увеличивается один раз в конце.
+"""
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import MenuItem, Restaurant
+from .search import reindex_restaurant_menu
+
+MENU_IMPORT_FORMATS = ('csv', 'json')
+UPDATE_FIELDS = ['description', 'price', 'is_available', 'preparation_time']
+
+_TRUE = {'1', 'true', 'yes', 'y', 'да'}
+_FALSE = {'0', 'false', 'no', 'n', 'нет'}
+_MAX_PRICE = Decimal('100000000')  # max_digits=10, decimal_places=2
+_CENT = Decimal('0.01')
+
+
+class MenuImportError(Exception):
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} invalid menu rows")
+
+
+def _name(value):
+    value = str(value or '').strip()
+    if not value:
+        raise ValueError("required")
+    if len(value) > 255:
+        raise ValueError("longer than 255 characters")
+    return value
+
+
+def _description(value):
+    return '' if value is None else str(value)
+
+
+def _price(value):
+    if value in (None, ''):
+        raise ValueError("required")
+    try:
+        price = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"'{value}' is not a number")
+    if not price.is_finite() or price < 0 or price >= _MAX_PRICE:
+        raise ValueError(f"'{value}' is out of range")
+    if price != price.quantize(_CENT):
+        raise ValueError("more than 2 decimal places")
+    return price
+
+
+def _is_available(value):
+    if value in (None, ''):
+        return True
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError(f"'{value}' is not a boolean")
+
+
+def _preparation_time(value):
+    try:
+        minutes = int(str(value).strip())
+    except (TypeError, ValueError):
+        raise ValueError("required integer")
+    if not 0 <= minutes <= 1440:
+        raise ValueError("must be between 0 and 1440")
+    return minutes
+
+
+_CONVERTERS = (
+    ('name', _name),
+    ('description', _description),
+    ('price', _price),
+    ('is_available', _is_available),
+    ('preparation_time', _preparation_time),
+)
+
+
+def parse_menu(data, import_format):
+    """CSV с заголовком или JSON-список (или {"items": [...]}) -> список dict."""
+    if isinstance(data, bytes):
+        try:
+            data = data.decode('utf-8-sig')
+        except UnicodeDecodeError as e:
+            # Например, CSV из Excel в cp1251 - ошибка клиента, а не 500
+            raise MenuImportError([{'row': None, 'errors': [f"File must be UTF-8 encoded: {e}"]}])
+    if import_format == 'csv':
+        return list(csv.DictReader(io.StringIO(data)))
+    try:
+        rows = json.loads(data)
+    except ValueError as e:
+        raise MenuImportError([{'row': None, 'errors': [f"Invalid JSON: {e}"]}])
+    if isinstance(rows, dict):
+        rows = rows.get('items')
+    if not isinstance(rows, list):
+        raise MenuImportError([{'row': None, 'errors': ["Expected a list of menu items"]}])
+    return rows
+
+
+def validate_menu_rows(rows):
+    """Возвращает (values, errors); номера строк в ошибках - с 1."""
+    values, errors, seen = [], [], set()
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({'row': number, 'errors': ["Expected an object"]})
+            continue
+        item, row_errors = {}, []
+        for field, convert in _CONVERTERS:
+            try:
+                item[field] = convert(row.get(field))
+            except ValueError as e:
+                row_errors.append(f"{field}: {e}")
+        if 'name' in item:
+            if item['name'] in seen:
+                row_errors.append(f"name: duplicate '{item['name']}' in file")
+            seen.add(item['name'])
+        if row_errors:
+            errors.append({'row': number, 'errors': row_errors})
+        else:
+            values.append(item)
+    return values, errors
+
+
+def import_menu(restaurant_id, rows, chunk_size=1000):
+    """Всё или ничего: при ошибках валидации ничего не пишется (MenuImportError)."""
+    values, errors = validate_menu_rows(rows)
+    if errors:
+        raise MenuImportError(errors)
+
+    with transaction.atomic():
+        for start in range(0, len(values), chunk_size):
+            MenuItem.objects.bulk_create(
+                [MenuItem(restaurant_id=restaurant_id, **item) for item in values[start:start + chunk_size]],
+                update_conflicts=True,
+                unique_fields=['restaurant', 'name'],
+                update_fields=UPDATE_FIELDS,
+            )
+        Restaurant.objects.filter(pk=restaurant_id).update(menu_version=F('menu_version') + 1)
+        menu_version = Restaurant.objects.filter(pk=restaurant_id).values_list('menu_version', flat=True).get()
+        # bulk_create не шлет post_save - поисковый индекс обновляем явно
+        transaction.on_commit(lambda: reindex_restaurant_menu(restaurant_id))
+    return {'imported': len(values), 'menu_version': menu_version}
@@ -0,0 +1,310 @@
+"""
+Минимальные метрики в формате Prometheus (text exposition 0.0.4).
+
+Запись идет в шард текущего потока без блокировок; при чтении (/metrics)
+шарды суммируются. Шарды завершившихся потоков сливаются в базовый шард
+(при создании нового шарда и при чтении), поэтому их число не растет при
+пересоздании потоков (executor'ы sync_to_async, пулы Celery). Модуль не зависит от Django, поэтому его можно
+использовать и в consumer'е (RabbitMQ.py), и в Celery worker'ах.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._base = {}
+        self._shards = []  # [(поток, шард)]
+        self._shards_lock = threading.Lock()
+        registry.register(self)
+
+    def _shard(self):
+        # Блокировка берется один раз на поток - при создании его шарда
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._prune()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _prune(self):
+        # Вызывается под _shards_lock. В шард мертвого потока больше никто не пишет
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                for key, value in list(shard.items()):
+                    self._base[key] = self._merge(self._base.get(key), value)
+        self._shards = alive
+
+    def _all_shards(self):
+        with self._shards_lock:
+            self._prune()
+            return [self._base] + [shard for _, shard in self._shards]
+
+    def _merge(self, total, value):
+        raise NotImplementedError
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    def samples(self):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def _merge(self, total, value):
+        return (total or 0) + value
+
+    def value(self, **labels):
+        key = self._key(labels)
+        return sum(shard.get(key, 0) for shard in self._all_shards())
+
+    def samples(self):
+        totals = {}
+        for shard in self._all_shards():
+            for key, value in list(shard.items()):
+                totals[key] = totals.get(key, 0) + value
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in sorted(totals.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Gauge хранит последнее значение; set() - атомарное присваивание."""
+    type = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = {}
+        self._functions = {}
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def set_function(self, func, **labels):
+        self._functions[self._key(labels)] = func
+
+    def value(self, **labels):
+        key = self._key(labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0)
+
+    def samples(self):
+        values = dict(self._values)
+        for key, func in list(self._functions.items()):
+            values[key] = func()
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        state = shard.get(key)
+        if state is None:
+            # [счетчики по бакетам (+Inf последний), сумма, количество]
+            state = shard[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _merge(self, total, value):
+        # Новый список, а не изменение на месте: _merged() может читать базовый шард параллельно
+        counts, value_sum, count = value
+        if total is None:
+            return [list(counts), value_sum, count]
+        return [[a + b for a, b in zip(total[0], counts)], total[1] + value_sum, total[2] + count]
+
+    def _merged(self):
+        merged = {}
+        for shard in self._all_shards():
+            for key, state in list(shard.items()):
+                merged[key] = self._merge(merged.get(key), state)
+        return merged
+
+    def count(self, **labels):
+        state = self._merged().get(self._key(labels))
+        return state[2] if state else 0
+
+    def samples(self):
+        lines = []
+        for key, (counts, total, count) in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}'
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+# API
+REQUEST_LATENCY = Histogram(
+    'defood_http_request_duration_seconds', 'HTTP request latency by view',
+    ['view', 'method'],
+)
+REQUESTS_TOTAL = Counter(
+    'defood_http_requests_total', 'HTTP requests by view and status code',
+    ['view', 'method', 'status'],
+)
+ORDER_CREATE_LATENCY = Histogram(
+    'defood_order_create_duration_seconds', 'Order creation latency (validation, DB writes, task dispatch)',
+)
+
+# Публикация в RabbitMQ
+PUBLISH_LATENCY = Histogram(
+    'defood_broker_publish_duration_seconds', 'RabbitMQPublisher.publish latency',
+    ['routing_key'],
+)
+PUBLISH_FAILURES = Counter(
+    'defood_broker_publish_failures_total', 'Failed RabbitMQPublisher.publish calls',
+    ['routing_key'],
+)
+
+# Circuit breaker (models.breaker): 0 - closed, 1 - half-open, 2 - open
+BREAKER_STATE = Gauge(
+    'defood_circuit_breaker_state', 'Circuit breaker state (0 closed, 1 half-open, 2 open)',
+    ['breaker'],
+)
+BREAKER_TRANSITIONS = Counter(
+    'defood_circuit_breaker_transitions_total', 'Circuit breaker state changes',
+    ['breaker', 'state'],
+)
+BREAKER_REJECTED = Counter(
+    'defood_circuit_breaker_rejected_total', 'Calls rejected by an open circuit breaker',
+    ['breaker'],
+)
+OUTBOX_MESSAGES = Counter(
+    'defood_outbox_messages_total', 'Events stored in / relayed from the local outbox',
+    ['routing_key', 'result'],
+)
+TRANSITION_LOG_DROPPED = Counter(
+    'defood_transition_log_dropped_total', 'Order status transitions dropped by the log writer',
+    ['reason'],
+)
+
+# Celery
+TASK_RUNTIME = Histogram(
+    'defood_celery_task_duration_seconds', 'Celery task runtime',
+    ['task', 'state'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+# Consumer
+CONSUMER_MESSAGES = Counter(
+    'defood_consumer_messages_total', 'Messages handled by RabbitMQConsumer',
+    ['queue', 'result'],
+)
+CONSUMER_LAG = Histogram(
+    'defood_consumer_lag_seconds', 'Delay between event timestamp and consumption',
+    ['queue'],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0),
+)
+CONSUMER_PROCESSING = Histogram(
+    'defood_consumer_processing_duration_seconds', 'RabbitMQConsumer.process_message duration',
+    ['queue'],
+)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, addr='0.0.0.0'):
+    """Отдает /metrics из процессов без Django HTTP (consumer, Celery worker)."""
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True)
+    thread.start()
+    return server
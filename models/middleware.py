@@ -0,0 +1,104 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .instrumentation import collect_request_stats, get_query_budget, install_db_instrumentation
+from .metrics import REQUEST_LATENCY, REQUESTS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+
+class _HybridMiddleware:
+    """
+    Как django.utils.deprecation.MiddlewareMixin: работает и в sync, и в async
+    цепочке, чтобы async view под ASGI не прыгали между потоками.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def __acall__(self, request):
+        raise NotImplementedError
+
+
+class MetricsMiddleware(_HybridMiddleware):
+    """Латентность и количество запросов по view для /metrics."""
+
+    def handle(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    def observe(self, request, response, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        REQUEST_LATENCY.observe(elapsed, view=view, method=request.method)
+        REQUESTS_TOTAL.inc(view=view, method=request.method, status=response.status_code)
+
+
+class QueryBudgetMiddleware(_HybridMiddleware):
+    """
+    Считает SQL-запросы, время БД и время публикации в брокер для каждого запроса.
+    Включается только вне продакшена (QUERY_STATS_ENABLED).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_STATS_ENABLED', settings.DEBUG):
+            raise MiddlewareNotUsed
+        install_db_instrumentation()
+        super().__init__(get_response)
+
+    def handle(self, request):
+        with collect_request_stats() as stats:
+            response = self.get_response(request)
+        return self.report(request, response, stats)
+
+    async def __acall__(self, request):
+        with collect_request_stats() as stats:
+            response = await self.get_response(request)
+        return self.report(request, response, stats)
+
+    def report(self, request, response, stats):
+        match = getattr(request, 'resolver_match', None)
+        budget = get_query_budget(match.func, request.method) if match else None
+
+        response['X-DB-Query-Count'] = str(stats.queries)
+        response['X-DB-Time-Ms'] = f'{stats.db_time * 1000:.2f}'
+        response['X-Broker-Publish-Ms'] = f'{stats.broker_time * 1000:.2f}'
+        if budget is not None:
+            response['X-Query-Budget'] = str(budget)
+
+        logger.info(
+            f"{request.method} {request.path} -> {response.status_code}: "
+            f"queries={stats.queries} db={stats.db_time * 1000:.2f}ms "
+            f"broker={stats.broker_time * 1000:.2f}ms"
+        )
+        if budget is not None and stats.queries > budget:
+            logger.warning(
+                f"Query budget exceeded for {request.method} {request.path}: "
+                f"{stats.queries} > {budget}"
+            )
+        return response
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-19 07:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0003_order_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='OrderStatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=20)),
+                ('to_status', models.CharField(max_length=20)),
+                ('duration', models.DurationField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_transitions', to='models.order')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='models.restaurant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['order', 'created_at'], name='models_orde_order_i_6a45db_idx'), models.Index(fields=['from_status', 'created_at'], name='models_orde_from_st_177427_idx'), models.Index(fields=['restaurant', 'from_status', 'created_at'], name='models_orde_restaur_cec19e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.7 on 2026-10-19 07:30
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_menu_items(apps, schema_editor):
+    # Перед уникальным ограничением: названия позиций видны клиентам, поэтому
+    # дубликаты не переименовываются автоматически - миграция останавливается
+    # со списком, оператор разрешает их вручную и запускает migrate снова
+    MenuItem = apps.get_model('models', 'MenuItem')
+    duplicates = list(
+        MenuItem.objects.values('restaurant_id', 'name')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .order_by('restaurant_id', 'name')
+    )
+    if not duplicates:
+        return
+    lines = []
+    for row in duplicates:
+        ids = list(
+            MenuItem.objects.filter(restaurant_id=row['restaurant_id'], name=row['name'])
+            .order_by('id').values_list('id', flat=True)
+        )
+        lines.append(f"  restaurant {row['restaurant_id']}, name {row['name']!r}: menu items {ids}")
+    raise RuntimeError(
+        f"{len(duplicates)} duplicate menu item names per restaurant must be resolved "
+        "before adding menu_item_restaurant_name_unique:\n" + '\n'.join(lines)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0006_restaurant_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='menu_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(check_duplicate_menu_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='menuitem',
+            constraint=models.UniqueConstraint(fields=('restaurant', 'name'), name='menu_item_restaurant_name_unique'),
+        ),
+    ]
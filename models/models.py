@@ -80,11 +80,17 @@ class Restaurant(models.Model):
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=False, default=41.2995)  # Обязательное
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=False, default=69.2401)  # Обязательное
     phone = models.CharField(max_length=15)
-    rating = models.FloatField(default=0.0)
+    rating = models.FloatField(default=0.0)  # rating_sum / rating_count, обновляется вместе с ними
+    rating_sum = models.PositiveBigIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     delivery_radius = models.FloatField(help_text="Delivery radius in kilometers")
     min_order_amount = models.DecimalField(max_digits=10, decimal_places=2)
     working_hours = models.JSONField()  # Формат: {"monday": "09:00-21:00", ...}
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='owned_restaurants'
+    )  # Доступ к дашборду выручки
+    menu_version = models.PositiveIntegerField(default=0)  # Растет при каждом изменении меню (кэш клиентов)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -109,6 +115,10 @@ class MenuItem(models.Model):
         indexes = [
             models.Index(fields=['restaurant', 'is_available']),  # Ускорение фильтрации по ресторану
         ]
+        constraints = [
+            # Ключ upsert'а при массовом импорте меню
+            models.UniqueConstraint(fields=['restaurant', 'name'], name='menu_item_restaurant_name_unique'),
+        ]
 
 # Заказ
 class Order(models.Model):
@@ -126,6 +136,7 @@ class Order(models.Model):
         ('DELIVERED', 'Delivered'),
         ('CANCELLED', 'Cancelled'),
     ], default='PENDING')
+    status_changed_at = models.DateTimeField(null=True, blank=True)  # Время последней смены статуса
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -154,9 +165,100 @@ class Courier(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     vehicle_type = models.CharField(max_length=50)
     is_active = models.BooleanField(default=True)
-    average_rating = models.FloatField(default=0.0)
+    average_rating = models.FloatField(default=0.0)  # rating_sum / rating_count
+    rating_sum = models.PositiveBigIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         indexes = [
             models.Index(fields=['is_active']),  # Ускорение фильтрации активных курьеров
-        ]
\ No newline at end of file
+        ]
+
+# Оценка заказа: ресторан и (если был) курьер, одна на заказ
+class Rating(models.Model):
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='rating')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='ratings')
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='ratings')
+    courier = models.ForeignKey(Courier, on_delete=models.SET_NULL, null=True, blank=True, related_name='ratings')
+    restaurant_score = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
+    courier_score = models.PositiveSmallIntegerField(
+        null=True, blank=True, validators=[MinValueValidator(1), MaxValueValidator(5)]
+    )
+    comment = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['restaurant', 'created_at']),  # Сверка агрегатов ресторана
+            models.Index(fields=['courier', 'created_at']),  # Сверка агрегатов курьера
+            models.Index(fields=['created_at']),  # Окно периодической сверки
+        ]
+
+# Почасовые агрегаты ресторана (выручка - по доставленным заказам)
+class RestaurantHourlyStats(models.Model):
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='hourly_stats')
+    hour = models.DateTimeField()  # Начало часа
+    orders_created = models.PositiveIntegerField(default=0)
+    orders_delivered = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['restaurant', 'hour'], name='restaurant_hourly_stats_unique'),
+        ]
+
+# Дневные агрегаты ресторана (день - в TIME_ZONE)
+class RestaurantDailyStats(models.Model):
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    orders_created = models.PositiveIntegerField(default=0)
+    orders_delivered = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['restaurant', 'day'], name='restaurant_daily_stats_unique'),
+        ]
+
+# Журнал смен статуса заказа (только добавление)
+class OrderStatusTransition(models.Model):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_transitions')
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='+')  # Денормализовано для SLA
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20)
+    duration = models.DurationField(null=True, blank=True)  # Сколько заказ пробыл в from_status
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['order', 'created_at']),  # История заказа
+            models.Index(fields=['from_status', 'created_at']),  # Длительность этапов
+            models.Index(fields=['restaurant', 'from_status', 'created_at']),  # SLA ресторана
+        ]
+
+# Плоская read-модель заказа для истории и дашбордов (обновляется из событий)
+class OrderSummary(models.Model):
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='order_summaries')
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='order_summaries')
+    restaurant_name = models.CharField(max_length=255)
+    item_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    status = models.CharField(max_length=20)
+    eta = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at']),  # История заказов пользователя
+            models.Index(fields=['restaurant', 'status']),  # Дашборд ресторана
+        ]
+
+# Локальный outbox: события, которые не удалось отдать брокеру (breaker открыт).
+# Строки публикует и удаляет задача relay_outbox
+class OutboxMessage(models.Model):
+    routing_key = models.CharField(max_length=100)
+    payload = models.JSONField()
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
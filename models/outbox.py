@@ -0,0 +1,67 @@
+"""
+Отправка событий из API с учетом circuit breaker'а брокера.
+
+Пока breaker закрыт, задача уходит в Celery как обычно. Если он открыт или
+apply_async упал, событие пишется в OutboxMessage - запрос не ждет
+переподключений к RabbitMQ. Задача relay_outbox (celery beat) публикует
+накопленные строки, когда брокер снова доступен.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .breaker import broker_breaker
+from .metrics import OUTBOX_MESSAGES
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def dispatch(task, args, routing_key, build_message):
+    """
+    Возвращает id Celery-задачи или None, если событие сохранено в outbox.
+    build_message вызывается только для outbox и должен вернуть готовое событие.
+    """
+    if broker_breaker.allow():
+        try:
+            result = task.apply_async(args=args, routing_key=routing_key)
+        except Exception as e:
+            broker_breaker.record_failure()
+            logger.error(f"Task dispatch to {routing_key} failed, storing event in outbox: {e}")
+        else:
+            broker_breaker.record_success()
+            return result.id
+    OutboxMessage.objects.create(routing_key=routing_key, payload=build_message())
+    OUTBOX_MESSAGES.inc(routing_key=routing_key, result='stored')
+    return None
+
+
+def relay_outbox(publisher, batch_size=None):
+    """
+    Публикует строки outbox по порядку пачками и удаляет опубликованные.
+    Останавливается на первой ошибке (в т.ч. CircuitOpenError) - остаток
+    уйдет при следующем запуске. Возвращает число опубликованных событий.
+    """
+    batch_size = batch_size or settings.OUTBOX_RELAY_BATCH_SIZE
+    relayed = 0
+    while True:
+        with transaction.atomic():
+            # skip_locked: параллельные relay_outbox не публикуют одни и те же строки
+            rows = list(OutboxMessage.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size])
+            if not rows:
+                return relayed
+            published = []
+            try:
+                for row in rows:
+                    publisher.publish(row.routing_key, row.payload)
+                    published.append(row.id)
+                    OUTBOX_MESSAGES.inc(routing_key=row.routing_key, result='relayed')
+            except Exception as e:
+                logger.warning(f"Outbox relay stopped after {relayed + len(published)} events: {e}")
+                OutboxMessage.objects.filter(id=rows[len(published)].id).update(attempts=F('attempts') + 1)
+                OutboxMessage.objects.filter(id__in=published).delete()
+                return relayed + len(published)
+            OutboxMessage.objects.filter(id__in=published).delete()
+        relayed += len(published)
@@ -0,0 +1,111 @@
+"""
+Поддержка read-модели OrderSummary.
+
+Строка создается из события order_created (consumer) и обновляется при
+смене статуса, поэтому чтение истории - один index scan по одной таблице.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, Sum
+
+from .models import MenuItem, Order, OrderSummary
+from .rollups import record_order_created
+
+logger = logging.getLogger(__name__)
+
+# Поля, которые перезаписываются при повторной доставке события.
+# status/updated_at не трогаем: событие создания не должно откатывать статус.
+SUMMARY_UPSERT_FIELDS = ['restaurant_name', 'item_count', 'total_amount', 'eta']
+
+
+def estimate_eta(created_at, preparation_minutes):
+    if created_at is None:
+        return None
+    return created_at + timedelta(minutes=(preparation_minutes or 0) + settings.ORDER_DELIVERY_MINUTES)
+
+
+def upsert_summaries(summaries, update_fields=SUMMARY_UPSERT_FIELDS):
+    OrderSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=['order'],
+        update_fields=update_fields,
+    )
+
+
+def apply_order_created(event):
+    data = event.get('data') or {}
+    order_id = int(event['order_id'])
+    items = data.get('items') or []
+
+    order = Order.objects.filter(pk=order_id).values(
+        'user_id', 'restaurant_id', 'restaurant__name', 'status', 'created_at', 'updated_at'
+    ).first()
+    if order is None:
+        logger.warning(f"Order {order_id} from event does not exist, skipping summary")
+        return None
+
+    preparation = MenuItem.objects.filter(
+        id__in=[int(item['menu_item_id']) for item in items]
+    ).aggregate(minutes=Max('preparation_time'))['minutes']
+
+    # Повторная доставка события не должна второй раз попасть в счетчики
+    is_new = not OrderSummary.objects.filter(order_id=order_id).exists()
+    summary = OrderSummary(
+        order_id=order_id,
+        user_id=order['user_id'],
+        restaurant_id=order['restaurant_id'],
+        restaurant_name=order['restaurant__name'],
+        item_count=sum(int(item['quantity']) for item in items),
+        total_amount=data.get('total_amount', 0),
+        status=order['status'],
+        eta=estimate_eta(order['created_at'], preparation),
+        created_at=order['created_at'],
+        updated_at=order['updated_at'],
+    )
+    upsert_summaries([summary])
+    if is_new:
+        record_order_created(order['restaurant_id'], order['created_at'])
+    return summary
+
+
+async def aapply_status_change(order):
+    return await OrderSummary.objects.filter(order_id=order.id).aupdate(
+        status=order.status, updated_at=order.updated_at
+    )
+
+
+def rebuild_summaries(queryset, chunk_size=2000):
+    """Пересобирает OrderSummary для queryset заказов, читая его чанками."""
+    rows = queryset.order_by('pk').values(
+        'id', 'user_id', 'restaurant_id', 'restaurant__name', 'status',
+        'total_amount', 'created_at', 'updated_at',
+    ).annotate(
+        item_count=Sum('items__quantity'),
+        preparation=Max('items__menu_item__preparation_time'),
+    )
+
+    batch, total = [], 0
+    for row in rows.iterator(chunk_size=chunk_size):
+        batch.append(OrderSummary(
+            order_id=row['id'],
+            user_id=row['user_id'],
+            restaurant_id=row['restaurant_id'],
+            restaurant_name=row['restaurant__name'],
+            item_count=row['item_count'] or 0,
+            total_amount=row['total_amount'],
+            status=row['status'],
+            eta=estimate_eta(row['created_at'], row['preparation']),
+            created_at=row['created_at'],
+            updated_at=row['updated_at'],
+        ))
+        if len(batch) >= chunk_size:
+            upsert_summaries(batch, SUMMARY_UPSERT_FIELDS + ['status', 'updated_at'])
+            total += len(batch)
+            batch = []
+    if batch:
+        upsert_summaries(batch, SUMMARY_UPSERT_FIELDS + ['status', 'updated_at'])
+        total += len(batch)
+    return total
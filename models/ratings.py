@@ -0,0 +1,129 @@
+"""
+Рейтинги ресторанов и курьеров.
+
+Каждая оценка - строка в Rating, а агрегаты (rating_sum, rating_count и
+среднее) обновляются в той же транзакции одним UPDATE через F(): без AVG
+по истории и без потерянных обновлений при параллельных оценках.
+Периодическая сверка по окну и полный пересчет чинят дрейф (ручные
+правки, удаленные оценки).
+"""
+import logging
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import Cast
+
+from .models import Courier, Rating, Restaurant
+
+logger = logging.getLogger(__name__)
+
+# Модель -> (FK в Rating, поле оценки, поле среднего)
+RATED_MODELS = {
+    Restaurant: ('restaurant_id', 'restaurant_score', 'rating'),
+    Courier: ('courier_id', 'courier_score', 'average_rating'),
+}
+
+
+class RatingError(Exception):
+    pass
+
+
+def _increment(model, pk, score):
+    _, _, average_field = RATED_MODELS[model]
+    # В SET все F() ссылаются на старые значения строки, поэтому среднее
+    # считается по уже увеличенным sum/count
+    return model.objects.filter(pk=pk).update(
+        rating_sum=F('rating_sum') + score,
+        rating_count=F('rating_count') + 1,
+        **{average_field: Cast(F('rating_sum') + score, FloatField()) / (F('rating_count') + 1)},
+    )
+
+
+def submit_rating(order, restaurant_score, courier_score=None, comment=''):
+    if order.status != 'DELIVERED':
+        raise RatingError("Only delivered orders can be rated")
+    if courier_score is not None and order.courier_id is None:
+        raise RatingError("Order has no courier to rate")
+    try:
+        with transaction.atomic():
+            rating = Rating.objects.create(
+                order_id=order.id,
+                user_id=order.user_id,
+                restaurant_id=order.restaurant_id,
+                courier_id=order.courier_id,
+                restaurant_score=restaurant_score,
+                courier_score=courier_score,
+                comment=comment,
+            )
+            _increment(Restaurant, order.restaurant_id, restaurant_score)
+            if courier_score is not None:
+                _increment(Courier, order.courier_id, courier_score)
+    except IntegrityError:
+        raise RatingError("Order has already been rated")
+    return rating
+
+
+def recompute_ratings(model, ids):
+    """
+    Пересчитывает агрегаты для ids из Rating, возвращает число исправленных строк.
+
+    Строки блокируются до подсчета: оценка, пришедшая во время пересчета,
+    либо уже видна в SUM, либо ждет блокировку и прибавится поверх.
+    """
+    fk, score_field, average_field = RATED_MODELS[model]
+    with transaction.atomic():
+        objects = list(
+            model.objects.select_for_update()
+            .filter(pk__in=ids)
+            .order_by('pk')
+            .only('id', 'rating_sum', 'rating_count', average_field)
+        )
+        totals = {
+            row[fk]: row
+            for row in Rating.objects.filter(**{f'{fk}__in': ids, f'{score_field}__isnull': False})
+            .values(fk)
+            .annotate(total=Sum(score_field), count=Count(score_field))
+            .order_by()
+        }
+        drifted = []
+        for obj in objects:
+            row = totals.get(obj.pk)
+            total, count = (row['total'], row['count']) if row else (0, 0)
+            average = total / count if count else 0.0
+            if (obj.rating_sum, obj.rating_count, getattr(obj, average_field)) != (total, count, average):
+                obj.rating_sum, obj.rating_count = total, count
+                setattr(obj, average_field, average)
+                drifted.append(obj)
+        model.objects.bulk_update(drifted, ['rating_sum', 'rating_count', average_field])
+    if drifted:
+        logger.warning(f"Fixed rating drift for {len(drifted)} {model.__name__} rows")
+    return len(drifted)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def reconcile_recent_ratings(since, chunk_size=500):
+    """Сверка только тех ресторанов/курьеров, у которых есть оценки после since."""
+    fixed = {}
+    for model, (fk, _, _) in RATED_MODELS.items():
+        ids = (
+            Rating.objects.filter(created_at__gte=since, **{f'{fk}__isnull': False})
+            .values_list(fk, flat=True)
+            .distinct()
+            .order_by()
+        )
+        fixed[model.__name__] = sum(recompute_ratings(model, chunk) for chunk in _chunks(ids, chunk_size))
+    return fixed
+
+
+def recompute_all_ratings(chunk_size=500):
+    fixed = {}
+    for model in RATED_MODELS:
+        ids = model.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=chunk_size)
+        fixed[model.__name__] = sum(recompute_ratings(model, chunk) for chunk in _chunks(ids, chunk_size))
+    return fixed
@@ -0,0 +1,93 @@
+"""
+Read-only пути для list-эндпоинтов на основе QuerySet.values().
+
+ValuesReader один раз "компилирует" ModelSerializer в список колонок
+(ключ в values() + функция преобразования) и дальше собирает обычные dict
+без создания моделей и без per-field get_attribute. Результат совпадает с
+serializer.data байт в байт после рендеринга.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import fields as drf_fields
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+
+# Поля, у которых to_representation не меняет значение, пришедшее из values()
+_PASSTHROUGH = (drf_fields.IntegerField, drf_fields.CharField)
+
+
+def _passthrough_converter(field):
+    if type(field) in _PASSTHROUGH:
+        return None
+    if type(field) is drf_fields.JSONField and not field.binary:
+        return None
+    if type(field) is PrimaryKeyRelatedField and field.pk_field is None:
+        return None
+    return field.to_representation
+
+
+class ValuesReader:
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._compiled = None
+
+    def _compile(self):
+        serializer_class = self.serializer_class
+        if serializer_class.to_representation is not serializers.Serializer.to_representation:
+            raise ImproperlyConfigured(
+                f"{serializer_class.__name__} overrides to_representation() and cannot be read via values()"
+            )
+
+        model = serializer_class.Meta.model
+        columns = []
+        nested = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            source = field.source
+            if '.' in source or source == '*':
+                raise ImproperlyConfigured(f"{serializer_class.__name__}.{name}: source '{source}' is not supported")
+
+            if isinstance(field, serializers.ListSerializer):
+                relation = model._meta.get_field(source)
+                reader = ValuesReader(type(field.child))
+                nested.append((name, relation.related_model, relation.field.attname, reader))
+                columns.append((name, None, None))
+            elif isinstance(field, PrimaryKeyRelatedField):
+                columns.append((name, model._meta.get_field(source).attname, _passthrough_converter(field)))
+            else:
+                columns.append((name, source, _passthrough_converter(field)))
+
+        value_keys = [key for _, key, _ in columns if key is not None]
+        pk_name = model._meta.pk.attname
+        if nested and pk_name not in value_keys:
+            value_keys.append(pk_name)
+        self._compiled = (columns, nested, value_keys, pk_name)
+        return self._compiled
+
+    def read(self, queryset):
+        return [row for _, row in self._read(queryset)]
+
+    def _read(self, queryset, group_by=None):
+        columns, nested, value_keys, pk_name = self._compiled or self._compile()
+        queryset = queryset.prefetch_related(None)
+        keys = value_keys + [group_by] if group_by and group_by not in value_keys else value_keys
+
+        children = {}
+        for name, related_model, fk_attname, reader in nested:
+            grouped = {}
+            related = related_model._default_manager.filter(**{f'{fk_attname}__in': queryset.values(pk_name)})
+            for parent_id, child in reader._read(related, group_by=fk_attname):
+                grouped.setdefault(parent_id, []).append(child)
+            children[name] = grouped
+
+        result = []
+        for values in queryset.values(*keys):
+            row = {}
+            for name, key, convert in columns:
+                if key is None:
+                    row[name] = children[name].get(values[pk_name], [])
+                    continue
+                value = values[key]
+                row[name] = value if value is None or convert is None else convert(value)
+            result.append((values[group_by] if group_by else None, row))
+        return result
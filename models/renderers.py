@@ -0,0 +1,53 @@
+"""
+Быстрые JSON renderer/parser на orjson для тяжелых эндпоинтов.
+
+Подключаются на уровне view (renderer_classes / parser_classes). Вывод
+совпадает с DRF JSONRenderer байт в байт: типы, которые orjson не знает
+(Decimal, lazy-строки, QuerySet, timedelta ...), кодируются тем же
+encoders.JSONEncoder.default, что и в DRF. Если orjson не установлен,
+классы ведут себя как стандартные JSONRenderer / JSONParser.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_default = encoders.JSONEncoder().default
+
+if orjson is not None:
+    # OPT_UTC_Z: '+00:00' -> 'Z', как в DRF; OPT_NON_STR_KEYS: int-ключи, как json.dumps
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Отступы (?indent=, BrowsableAPI) - редкий отладочный путь, оставляем стандартный
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
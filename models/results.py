@@ -0,0 +1,30 @@
+"""
+Очистка результатов Celery (django-db) по TTL.
+
+Встроенный celery.backend_cleanup удаляет все просроченные строки одним
+DELETE; здесь удаление идет чанками по id, каждый чанк - своя короткая
+транзакция, поэтому таблица не блокируется надолго.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django_celery_results.models import GroupResult, TaskResult
+
+
+def delete_expired_results(ttl=None, chunk_size=None):
+    """Удаляет TaskResult/GroupResult старше ttl секунд и возвращает число удаленных по моделям."""
+    ttl = settings.TASK_RESULT_TTL if ttl is None else ttl
+    chunk_size = chunk_size or settings.TASK_RESULT_CLEANUP_CHUNK_SIZE
+    expired_before = timezone.now() - timedelta(seconds=ttl)
+    deleted = {}
+    for model in (TaskResult, GroupResult):
+        expired = model.objects.filter(date_done__lt=expired_before).order_by('id')
+        total = 0
+        while True:
+            ids = list(expired.values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+            total += model.objects.filter(id__in=ids).delete()[0]
+        deleted[model.__name__] = total
+    return deleted
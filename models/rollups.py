@@ -0,0 +1,139 @@
+"""
+Почасовые и дневные агрегаты выручки и числа заказов по ресторанам.
+
+Счетчики увеличиваются на событиях order_created (consumer) и перехода в
+DELIVERED, поэтому дашборд читает несколько десятков строк по индексу
+(restaurant, hour/day) вместо сканирования orders. backfill_rollups
+пересобирает историю по дням, каждый день - отдельной транзакцией.
+"""
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncHour
+from django.utils import timezone
+
+from .models import Order, RestaurantDailyStats, RestaurantHourlyStats
+
+STATS_FIELDS = ['orders_created', 'orders_delivered', 'revenue']
+
+
+def _buckets(restaurant_id, at):
+    local = timezone.localtime(at)
+    return (
+        (RestaurantHourlyStats, {'restaurant_id': restaurant_id, 'hour': local.replace(minute=0, second=0, microsecond=0)}),
+        (RestaurantDailyStats, {'restaurant_id': restaurant_id, 'day': local.date()}),
+    )
+
+
+def _increment(model, key, deltas):
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Строку часа/дня успел создать параллельный процесс
+        model.objects.filter(**key).update(**updates)
+
+
+def record_order_created(restaurant_id, created_at):
+    for model, key in _buckets(restaurant_id, created_at):
+        _increment(model, key, {'orders_created': 1})
+
+
+def record_order_delivered(restaurant_id, delivered_at, amount):
+    for model, key in _buckets(restaurant_id, delivered_at):
+        _increment(model, key, {'orders_delivered': 1, 'revenue': amount})
+
+
+arecord_order_delivered = sync_to_async(record_order_delivered)
+
+
+def _upsert(model, rows, unique_fields):
+    model.objects.bulk_create(
+        [model(**row) for row in rows],
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=STATS_FIELDS,
+    )
+
+
+def _rebuild_day(day, restaurant_id=None):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(day, time.min), tz)
+    end = start + timedelta(days=1)
+
+    orders = Order.objects.all()
+    if restaurant_id is not None:
+        orders = orders.filter(restaurant_id=restaurant_id)
+    hours = {}
+    created = (
+        orders.filter(created_at__gte=start, created_at__lt=end)
+        .annotate(bucket=TruncHour('created_at', tzinfo=tz))
+        .values('restaurant_id', 'bucket')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    for row in created:
+        stats = hours.setdefault((row['restaurant_id'], row['bucket']), dict.fromkeys(STATS_FIELDS, 0))
+        stats['orders_created'] = row['count']
+    delivered = (
+        orders.filter(status='DELIVERED')
+        .annotate(delivered_at=Coalesce('status_changed_at', 'updated_at'))
+        .filter(delivered_at__gte=start, delivered_at__lt=end)
+        .annotate(bucket=TruncHour('delivered_at', tzinfo=tz))
+        .values('restaurant_id', 'bucket')
+        .annotate(count=Count('id'), revenue=Sum('total_amount'))
+        .order_by()
+    )
+    for row in delivered:
+        stats = hours.setdefault((row['restaurant_id'], row['bucket']), dict.fromkeys(STATS_FIELDS, 0))
+        stats['orders_delivered'] = row['count']
+        stats['revenue'] = row['revenue']
+
+    days = {}
+    for (restaurant, _), stats in hours.items():
+        totals = days.setdefault(restaurant, dict.fromkeys(STATS_FIELDS, 0))
+        for field in STATS_FIELDS:
+            totals[field] += stats[field]
+
+    hourly = RestaurantHourlyStats.objects.filter(hour__gte=start, hour__lt=end)
+    daily = RestaurantDailyStats.objects.filter(day=day)
+    if restaurant_id is not None:
+        hourly, daily = hourly.filter(restaurant_id=restaurant_id), daily.filter(restaurant_id=restaurant_id)
+    with transaction.atomic():
+        hourly.delete()
+        daily.delete()
+        _upsert(RestaurantHourlyStats, [
+            {'restaurant_id': restaurant, 'hour': hour, **stats} for (restaurant, hour), stats in hours.items()
+        ], ['restaurant', 'hour'])
+        _upsert(RestaurantDailyStats, [
+            {'restaurant_id': restaurant, 'day': day, **stats} for restaurant, stats in days.items()
+        ], ['restaurant', 'day'])
+    return len(hours)
+
+
+def backfill_rollups(since, until, restaurant_id=None):
+    """
+    Пересобирает агрегаты за дни [since, until) из orders и возвращает их по одному.
+
+    Текущий день лучше не трогать: инкременты, пришедшие во время пересборки
+    дня, перезапишутся.
+    """
+    day = since
+    while day < until:
+        yield day, _rebuild_day(day, restaurant_id)
+        day += timedelta(days=1)
+
+
+def read_stats(restaurant_id, granularity, since, until):
+    if granularity == 'hourly':
+        rows = RestaurantHourlyStats.objects.filter(restaurant_id=restaurant_id, hour__gte=since, hour__lt=until)
+        bucket = 'hour'
+    else:
+        rows = RestaurantDailyStats.objects.filter(restaurant_id=restaurant_id, day__gte=since, day__lt=until)
+        bucket = 'day'
+    return list(rows.order_by(bucket).values(bucket, *STATS_FIELDS))
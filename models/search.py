@@ -0,0 +1,409 @@
+"""
+Поиск по меню и ресторанам в памяти процесса (typeahead).
+
+Обратный индекс token -> {ресторан: {документ: вес}} плюс две вспомогательные таблицы:
+отсортированный список токенов для префиксов (bisect) и trigram -> токены
+для опечаток. Запрос "plof cent" - пересечение документов по всем словам,
+последнее слово ищется как префикс. Ранжирование - вес совпадения
+(название важнее описания, точное важнее префикса и опечатки), деленный на
+штраф за расстояние до ресторана. Рестораны обходятся от ближних к дальним,
+и обход останавливается, как только дальние не могут попасть в топ.
+
+Индекс строится лениво при первом запросе, обновляется сигналами
+post_save/post_delete (после коммита) и целиком пересобирается в фоне раз
+в SEARCH_INDEX_REFRESH секунд - так подхватываются изменения из других
+процессов и bulk-операций без сигналов.
+"""
+import heapq
+import logging
+import math
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import MenuItem, Restaurant
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r'\w+')
+
+NAME_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.8
+FUZZY_MATCH = 0.6
+FUZZY_MIN_SIMILARITY = 0.35
+FUZZY_MIN_LENGTH = 4
+PREFIX_EXPANSIONS = 64
+# Расстояние (км), на котором релевантность падает вдвое
+DISTANCE_DECAY_KM = 5.0
+
+
+def tokenize(text):
+    words = _WORD.findall((text or '').casefold().replace('ё', 'е'))
+    return [word for word in words if len(word) > 1 or word.isdigit()]
+
+
+def _trigrams(token):
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _Document:
+    __slots__ = ('kind', 'id', 'name', 'restaurant_id', 'price', 'tokens')
+
+    def __init__(self, kind, id, name, restaurant_id, price, tokens):
+        self.kind = kind
+        self.id = id
+        self.name = name
+        self.restaurant_id = restaurant_id
+        self.price = price
+        self.tokens = tokens
+
+
+class SearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._bulk = False
+        self._reset()
+
+    def _reset(self):
+        self._documents = {}     # (kind, id) -> _Document
+        self._postings = {}      # token -> {restaurant_id: {(kind, id): weight}}
+        self._trigrams = {}      # trigram -> {token}
+        self._tokens = []        # отсортированные токены для префиксов
+        self._restaurants = {}   # id -> (name, latitude, longitude в радианах, is_active)
+
+    def __len__(self):
+        return len(self._documents)
+
+    # Запись
+
+    def add_restaurant(self, id, name, description, latitude, longitude, is_active):
+        with self._lock:
+            self._restaurants[id] = (name, math.radians(latitude), math.radians(longitude), is_active)
+            self._add(('restaurant', id), name, description, id, None)
+
+    def add_menu_item(self, id, name, description, restaurant_id, price):
+        # Цена строкой, как DecimalField в сериализаторах
+        with self._lock:
+            self._add(('menu_item', id), name, description, restaurant_id, f'{Decimal(price):.2f}')
+
+    def has_restaurant(self, id):
+        return id in self._restaurants
+
+    def remove(self, kind, id):
+        with self._lock:
+            document = self._documents.pop((kind, id), None)
+            if document is not None:
+                self._unlink(document)
+            if kind == 'restaurant':
+                self._restaurants.pop(id, None)
+
+    def _add(self, key, name, description, restaurant_id, price):
+        weights = {}
+        for token in tokenize(description):
+            weights[token] = DESCRIPTION_WEIGHT
+        for token in tokenize(name):
+            weights[token] = NAME_WEIGHT
+
+        previous = self._documents.get(key)
+        if previous is not None:
+            self._unlink(previous)
+        self._documents[key] = _Document(key[0], key[1], name, restaurant_id, price, tuple(weights))
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                if self._bulk:
+                    self._tokens.append(token)
+                else:
+                    insort(self._tokens, token)
+                for trigram in _trigrams(token):
+                    self._trigrams.setdefault(trigram, set()).add(token)
+            postings.setdefault(restaurant_id, {})[key] = weight
+
+    def _unlink(self, document):
+        key = (document.kind, document.id)
+        for token in document.tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            documents = postings.get(document.restaurant_id)
+            if documents is not None:
+                documents.pop(key, None)
+                if not documents:
+                    del postings[document.restaurant_id]
+            if not postings:
+                del self._postings[token]
+                if self._bulk:
+                    self._tokens.remove(token)
+                else:
+                    del self._tokens[bisect_left(self._tokens, token)]
+                for trigram in _trigrams(token):
+                    tokens = self._trigrams[trigram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._trigrams[trigram]
+
+    @contextmanager
+    def bulk(self):
+        """Массовая загрузка: токены сортируются один раз в конце, а не insort на каждый."""
+        with self._lock:
+            self._bulk = True
+            try:
+                yield self
+            finally:
+                self._bulk = False
+                self._tokens.sort()
+
+    def replace_with(self, other):
+        with self._lock:
+            self._documents, self._postings, self._trigrams = other._documents, other._postings, other._trigrams
+            self._tokens, self._restaurants = other._tokens, other._restaurants
+
+    # Чтение
+
+    def _expand(self, token, prefix):
+        """Токены индекса, подходящие под слово запроса, с оценкой совпадения."""
+        matches = {}
+        if token in self._postings:
+            matches[token] = EXACT_MATCH
+        if prefix:
+            position = bisect_left(self._tokens, token)
+            for candidate in self._tokens[position:position + PREFIX_EXPANSIONS]:
+                if not candidate.startswith(token):
+                    break
+                # Чем ближе длина к запросу, тем выше: "плов" выше "пловный" на запрос "пло"
+                matches.setdefault(candidate, PREFIX_MATCH * (0.5 + 0.5 * len(token) / len(candidate)))
+        if not matches and len(token) >= FUZZY_MIN_LENGTH:
+            query_trigrams = _trigrams(token)
+            shared = Counter()
+            for trigram in query_trigrams:
+                shared.update(self._trigrams.get(trigram, ()))
+            for candidate, count in shared.items():
+                similarity = count / (len(query_trigrams) + len(_trigrams(candidate)) - count)
+                if similarity >= FUZZY_MIN_SIMILARITY:
+                    matches[candidate] = FUZZY_MATCH * similarity
+        return matches
+
+    def _restaurant_scores(self, restaurant_id, expansions, kind):
+        """Оценки документов одного ресторана: сумма по словам запроса, все слова обязательны."""
+        scores = None
+        for matches in expansions:
+            word_scores = {}
+            for candidate, match in matches.items():
+                documents = self._postings[candidate].get(restaurant_id)
+                if not documents:
+                    continue
+                for key, weight in documents.items():
+                    score = match * weight
+                    if score > word_scores.get(key, 0.0):
+                        word_scores[key] = score
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {key: score + word_scores[key] for key, score in scores.items() if key in word_scores}
+            if not scores:
+                return {}
+        if kind is not None:
+            scores = {key: score for key, score in scores.items() if key[0] == kind}
+        return scores
+
+    def search(self, query, latitude=None, longitude=None, kind=None, limit=10):
+        words = tokenize(query)
+        if not words:
+            return []
+        with self._lock:
+            expansions = [self._expand(word, prefix=i == len(words) - 1) for i, word in enumerate(words)]
+            if not all(expansions):
+                return []
+            # Рестораны, где встречаются все слова запроса
+            restaurant_sets = sorted(
+                (set().union(*(self._postings[candidate].keys() for candidate in matches)) for matches in expansions),
+                key=len,
+            )
+            # Ресторан, созданный в другом процессе, может еще не попасть в индекс
+            # до фоновой пересборки - его блюда пропускаются, а не роняют поиск
+            candidates = {
+                restaurant_id for restaurant_id in restaurant_sets[0].intersection(*restaurant_sets[1:])
+                if restaurant_id in self._restaurants
+            }
+
+            ranked = []
+            if latitude is None or longitude is None:
+                ranked = [(1.0, None, restaurant_id) for restaurant_id in candidates]
+            else:
+                # Равнопромежуточная проекция: в пределах города точнее, чем нужно для ранжирования
+                origin_latitude, origin_longitude = math.radians(latitude), math.radians(longitude)
+                scale = math.cos(origin_latitude)
+                for restaurant_id in candidates:
+                    _, restaurant_latitude, restaurant_longitude, _ = self._restaurants[restaurant_id]
+                    distance = 6371.0 * math.hypot(
+                        (restaurant_longitude - origin_longitude) * scale, restaurant_latitude - origin_latitude
+                    )
+                    ranked.append((1.0 / (1.0 + distance / DISTANCE_DECAY_KM), distance, restaurant_id))
+                ranked.sort(reverse=True)
+
+            # Верхняя граница текстовой оценки: все слова совпали в названии с лучшей оценкой
+            best_text_score = sum(max(matches.values()) for matches in expansions) * NAME_WEIGHT
+            top = []
+            for factor, distance, restaurant_id in ranked:
+                if len(top) >= limit and top[0][0] >= best_text_score * factor:
+                    break  # ближе ресторанов не осталось, дальние не могут обогнать текущий топ
+                if not self._restaurants[restaurant_id][3]:
+                    continue
+                for key, score in self._restaurant_scores(restaurant_id, expansions, kind).items():
+                    item = (score * factor, key, distance)
+                    if len(top) < limit:
+                        heapq.heappush(top, item)
+                    elif item > top[0]:
+                        heapq.heapreplace(top, item)
+
+            results = []
+            for score, key, distance in sorted(top, reverse=True):
+                document = self._documents[key]
+                results.append({
+                    'type': document.kind,
+                    'id': document.id,
+                    'name': document.name,
+                    'restaurant_id': document.restaurant_id,
+                    'restaurant_name': self._restaurants[document.restaurant_id][0],
+                    'price': document.price,
+                    'distance_km': None if distance is None else round(distance, 2),
+                    'score': round(score, 4),
+                })
+        return results
+
+
+def load_index(index=None):
+    """Строит индекс из БД (values(), без моделей)."""
+    if index is None:
+        index = SearchIndex()
+    with index.bulk():
+        for row in Restaurant.objects.values('id', 'name', 'description', 'latitude', 'longitude', 'is_active'):
+            index.add_restaurant(
+                row['id'], row['name'], row['description'], row['latitude'], row['longitude'], row['is_active']
+            )
+        items = MenuItem.objects.filter(is_available=True).values(
+            'id', 'name', 'description', 'restaurant_id', 'price'
+        )
+        for row in items.iterator(chunk_size=5000):
+            index.add_menu_item(row['id'], row['name'], row['description'], row['restaurant_id'], row['price'])
+    return index
+
+
+class _IndexHolder:
+    """Ленивая сборка и периодическая фоновая пересборка индекса процесса."""
+
+    def __init__(self):
+        self.index = SearchIndex()
+        self.built_at = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def get(self):
+        if self.built_at is None:
+            with self._lock:
+                if self.built_at is None:
+                    load_index(self.index)
+                    self.built_at = time.monotonic()
+        elif time.monotonic() - self.built_at > settings.SEARCH_INDEX_REFRESH and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh, name='search-index-refresh', daemon=True).start()
+        return self.index
+
+    def _refresh(self):
+        try:
+            close_old_connections()
+            self.index.replace_with(load_index())
+            self.built_at = time.monotonic()
+        except Exception as e:
+            logger.error(f"Search index refresh failed: {e}")
+        finally:
+            self._refreshing = False
+            close_old_connections()
+
+    def is_built(self):
+        return self.built_at is not None
+
+
+_holder = _IndexHolder()
+
+
+def get_search_index():
+    return _holder.get()
+
+
+def _ensure_restaurant(index, restaurant_id):
+    # Блюдо ресторана, которого нет в индексе процесса (создан в другом процессе)
+    if index.has_restaurant(restaurant_id):
+        return
+    row = Restaurant.objects.filter(pk=restaurant_id).values(
+        'id', 'name', 'description', 'latitude', 'longitude', 'is_active'
+    ).first()
+    if row is not None:
+        index.add_restaurant(
+            row['id'], row['name'], row['description'], row['latitude'], row['longitude'], row['is_active']
+        )
+
+
+def reindex_restaurant_menu(restaurant_id):
+    """После bulk-операций над меню (сигналы не срабатывают)."""
+    if not _holder.is_built():
+        return
+    index = _holder.index
+    _ensure_restaurant(index, restaurant_id)
+    items = MenuItem.objects.filter(restaurant_id=restaurant_id).values(
+        'id', 'name', 'description', 'restaurant_id', 'price', 'is_available'
+    )
+    for row in items.iterator(chunk_size=5000):
+        if row['is_available']:
+            index.add_menu_item(row['id'], row['name'], row['description'], row['restaurant_id'], row['price'])
+        else:
+            index.remove('menu_item', row['id'])
+
+
+def _on_restaurant_saved(sender, instance, **kwargs):
+    if _holder.is_built():
+        transaction.on_commit(lambda: _holder.index.add_restaurant(
+            instance.id, instance.name, instance.description,
+            instance.latitude, instance.longitude, instance.is_active,
+        ))
+
+
+def _add_menu_item(instance):
+    _ensure_restaurant(_holder.index, instance.restaurant_id)
+    _holder.index.add_menu_item(
+        instance.id, instance.name, instance.description, instance.restaurant_id, instance.price,
+    )
+
+
+def _on_menu_item_saved(sender, instance, **kwargs):
+    if not _holder.is_built():
+        return
+    if instance.is_available:
+        transaction.on_commit(lambda: _add_menu_item(instance))
+    else:
+        transaction.on_commit(lambda: _holder.index.remove('menu_item', instance.id))
+
+
+def _on_deleted(sender, instance, **kwargs):
+    if _holder.is_built():
+        kind = 'restaurant' if sender is Restaurant else 'menu_item'
+        transaction.on_commit(lambda: _holder.index.remove(kind, instance.id))
+
+
+def connect_signals():
+    post_save.connect(_on_restaurant_saved, sender=Restaurant, dispatch_uid='search.restaurant_saved')
+    post_save.connect(_on_menu_item_saved, sender=MenuItem, dispatch_uid='search.menu_item_saved')
+    post_delete.connect(_on_deleted, sender=Restaurant, dispatch_uid='search.restaurant_deleted')
+    post_delete.connect(_on_deleted, sender=MenuItem, dispatch_uid='search.menu_item_deleted')
@@ -5,8 +5,11 @@ from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
-from .models import Order, OrderItem, MenuItem, Address, Restaurant, CustomUser, Courier
-from .tasks import send_user_data_to_queue
+from .models import Order, OrderItem, MenuItem, Address, Restaurant, CustomUser, Courier, Rating
+from .outbox import dispatch
+from .tasks import build_order_message, build_user_message, send_user_data_to_queue
+from .instrumentation import track_broker_publish
+from .transitions import log_initial_status
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,12 +38,17 @@ class RegisterSerializer(serializers.ModelSerializer):
         )
 
         # Celery queue'ga yuborish
-        send_user_data_to_queue.delay({
+        user_data = {
             "id": user.id,
             "phone_number": user.phone_number,
             "first_name": user.first_name,
             "last_name": user.last_name,
-        })
+        }
+        with track_broker_publish():
+            dispatch(
+                send_user_data_to_queue, [user_data], 'defood.users.created',
+                lambda: build_user_message(user_data),
+            )
 
         return user
 
@@ -134,17 +142,18 @@ class OrderSerializer(serializers.ModelSerializer):
 
             # Создаем элементы заказа и считаем общую сумму
             total_amount = 0
+            order_items = []
             for item_data in items_data:
                 menu_item = item_data['menu_item']
                 quantity = item_data['quantity']
                 price_at_time = menu_item.price
                 
-                OrderItem.objects.create(
+                order_items.append(OrderItem.objects.create(
                     order=order,
                     menu_item=menu_item,
                     quantity=quantity,
                     price_at_time=price_at_time
-                )
+                ))
                 total_amount += price_at_time * quantity
 
             # Обновляем детали заказа с общей суммой
@@ -168,6 +177,11 @@ class OrderSerializer(serializers.ModelSerializer):
             # Сохраняем заказ с обновленными деталями и суммой
             order.total_amount = total_amount
             order.save()
+            log_initial_status(order)
+
+            # Событие order_created из уже загруженных данных: воркер публикует
+            # его как есть, без повторного чтения заказа из БД
+            self.event = build_order_message(order, order_items)
             
             return order
             
@@ -178,6 +192,13 @@ class OrderSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Ошибка при создании заказа: {str(e)}")
 
 
+class RatingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Rating
+        fields = ['id', 'order', 'restaurant_score', 'courier_score', 'comment', 'created_at']
+        read_only_fields = ['id', 'order', 'created_at']
+
+
 class AddressSerializer(serializers.ModelSerializer):
     class Meta:
         model = Address
@@ -187,11 +208,7 @@ class AddressSerializer(serializers.ModelSerializer):
 class RestaurantSerializer(serializers.ModelSerializer):
     class Meta:
         model = Restaurant
-        fields = ['id', 'name', 'address', 'phone', 'description', 'delivery_radius', 'min_order_amount', 'working_hours', 'created_at']
-        
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        return representation
+        fields = ['id', 'name', 'address', 'phone', 'description', 'delivery_radius', 'min_order_amount', 'working_hours', 'rating', 'rating_count', 'created_at']
 
 
 class MenuItemSerializer(serializers.ModelSerializer):
@@ -0,0 +1,319 @@
+"""
+Синтетические данные масштаба продакшена: пользователи, адреса, рестораны,
+меню, заказы и их позиции.
+
+Каждый чанк генерируется своим random.Random(f'{seed}:{таблица}:{чанк}'),
+поэтому при тех же seed и chunk_size данные одинаковы при любом числе
+процессов. Id задаются явно от max(id) + 1 (кроме order items), а связи
+считаются арифметикой по id без чтения БД. На Postgres строки пишутся COPY
+в параллельных процессах, на остальных БД - executemany в одном процессе.
+"""
+import bisect
+import itertools
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import DateField, DecimalField, JSONField, Max
+
+from .models import Address, CustomUser, MenuItem, Order, OrderItem, Restaurant
+
+PASSWORD = 'synthetic'
+
+# Ташкент: центр и границы города
+CENTER = (41.3111, 69.2797)
+BOUNDS = ((41.20, 41.42), (69.12, 69.45))
+
+FIRST_NAMES = ['Aziz', 'Bekzod', 'Dilshod', 'Jasur', 'Sardor', 'Timur', 'Gulnora', 'Dilnoza', 'Madina', 'Nodira', 'Shahnoza', 'Zarina']
+LAST_NAMES = ['Karimov', 'Rahimov', 'Yusupov', 'Aliyev', 'Tursunov', 'Saidov', 'Ismoilov', 'Nazarov', 'Usmonov', 'Qodirov']
+STREETS = ['Amir Temur', 'Navoi', 'Shota Rustaveli', 'Bobur', 'Mirzo Ulugbek', 'Chilonzor', 'Yunusobod', 'Sergeli', 'Olmazor', 'Mustaqillik']
+CUISINES = ['Milliy', 'Osh Markazi', 'Kafe', 'Pizza', 'Burger', 'Sushi', 'Grill', 'Lavash', 'Somsa', 'Choyxona']
+DISHES = [
+    'Плов', 'Лагман', 'Самса', 'Манты', 'Шашлык', 'Чучвара', 'Нарын', 'Шурпа', 'Димлама', 'Казан кабоб',
+    'Pizza Margherita', 'Pizza Pepperoni', 'Burger', 'Cheeseburger', 'Caesar salad', 'Lavash', 'Hot-dog', 'Sushi set',
+    'Achichuk', 'Non', 'Chuchvara', 'Mastava', 'Tandir gosht', 'Kompot', 'Choy',
+]
+
+# Накопленные доли: число позиций в заказе, количество, итоговый статус
+ITEMS_PER_ORDER = ([1, 2, 3, 4, 5], [35, 65, 83, 93, 100])
+QUANTITIES = ([1, 2, 3], [75, 93, 100])
+FINAL_STATUSES = (['DELIVERED', 'CANCELLED'], [92, 100])
+# Пики в обед и вечером
+HOUR_WEIGHTS = [1, 1, 0, 0, 0, 0, 1, 2, 4, 5, 6, 9, 14, 13, 9, 6, 6, 8, 12, 14, 12, 8, 4, 2]
+HOURS = (range(24), list(itertools.accumulate(HOUR_WEIGHTS)))
+
+PHASES = ('users', 'addresses', 'restaurants', 'menu_items', 'orders')
+
+
+def _pick(rnd, table):
+    values, cumulative_weights = table
+    return rnd.choices(values, cum_weights=cumulative_weights)[0]
+
+
+def _zipf_cumulative(count, exponent, rnd):
+    """Накопленные веса Zipf в случайном порядке: немногие строки получают большую часть выборок."""
+    weights = [1 / (rank + 1) ** exponent for rank in range(count)]
+    rnd.shuffle(weights)
+    return list(itertools.accumulate(weights))
+
+
+@dataclass
+class Plan:
+    seed: int
+    users: int
+    restaurants: int
+    orders: int
+    chunk_size: int
+    until: datetime
+    days: int
+    password: str = ''
+    base: dict = field(default_factory=dict)
+    menu_offsets: list = field(default_factory=list)
+    user_weights: list = field(default_factory=list)
+    restaurant_weights: list = field(default_factory=list)
+
+    @classmethod
+    def build(cls, seed, users, restaurants, orders, chunk_size, until, days, menu_size=30):
+        plan = cls(seed, users, restaurants, orders, chunk_size, until, days, password=make_password(PASSWORD))
+        for name, model in (('users', CustomUser), ('addresses', Address), ('restaurants', Restaurant),
+                            ('menu_items', MenuItem), ('orders', Order)):
+            plan.base[name] = (model.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+        rnd = random.Random(f'{seed}:plan')
+        # Размер меню - логнормальный вокруг menu_size
+        sizes = [min(max(int(rnd.lognormvariate(0, 0.5) * menu_size), 3), menu_size * 5) for _ in range(restaurants)]
+        plan.menu_offsets = [0, *itertools.accumulate(sizes)]
+        plan.user_weights = _zipf_cumulative(users, 0.7, rnd)
+        plan.restaurant_weights = _zipf_cumulative(restaurants, 1.05, rnd)
+        return plan
+
+    def chunks(self, phase):
+        if phase == 'menu_items':
+            # Чанк меню - группа ресторанов примерно на chunk_size позиций
+            total, step = len(self.menu_offsets) - 1, max(self.chunk_size * self.restaurants // max(self.menu_offsets[-1], 1), 1)
+        else:
+            total = {'users': self.users, 'addresses': self.users, 'restaurants': self.restaurants, 'orders': self.orders}[phase]
+            step = self.chunk_size
+        return [(phase, index, start, min(start + step, total)) for index, start in enumerate(range(0, total, step))]
+
+    def menu_item(self, restaurant, position):
+        """id, название и цена позиции меню вычисляются без обращения к БД."""
+        item_id = self.base['menu_items'] + self.menu_offsets[restaurant] + position
+        name = f'{DISHES[(restaurant * 7 + position) % len(DISHES)]} {position + 1}'
+        price = Decimal(((item_id * 2654435761 + self.seed) % 160 + 8) * 1000)
+        return item_id, name, price
+
+
+def _coordinates(rnd, spread):
+    latitude = min(max(rnd.gauss(CENTER[0], spread), BOUNDS[0][0]), BOUNDS[0][1])
+    longitude = min(max(rnd.gauss(CENTER[1], spread * 1.3), BOUNDS[1][0]), BOUNDS[1][1])
+    return Decimal(f'{latitude:.6f}'), Decimal(f'{longitude:.6f}')
+
+
+def _moment(plan, rnd, recent_bias=1.0):
+    """Момент в окне [until - days, until): чем больше recent_bias, тем чаще недавние дни."""
+    days_back = int(plan.days * rnd.random() ** recent_bias)
+    hour = _pick(rnd, HOURS)
+    day = plan.until - timedelta(days=days_back + 1)
+    return day.replace(hour=hour, minute=rnd.randrange(60), second=rnd.randrange(60))
+
+
+def _users(plan, rnd, start, end):
+    base = plan.base['users']
+    for i in range(start, end):
+        yield {
+            'id': base + i,
+            'password': plan.password,
+            'phone_number': f'995{base + i:09d}',
+            'first_name': rnd.choice(FIRST_NAMES),
+            'last_name': rnd.choice(LAST_NAMES),
+            'created_at': _moment(plan, rnd),
+        }
+
+
+def _addresses(plan, rnd, start, end):
+    for i in range(start, end):
+        latitude, longitude = _coordinates(rnd, 0.045)
+        yield {
+            'id': plan.base['addresses'] + i,
+            'user_id': plan.base['users'] + i,
+            'street': rnd.choice(STREETS),
+            'house_number': str(rnd.randrange(1, 200)),
+            'apartment': str(rnd.randrange(1, 120)) if rnd.random() < 0.7 else '',
+            'city': 'Tashkent',
+            'postal_code': f'100{rnd.randrange(200):03d}',
+            'latitude': latitude,
+            'longitude': longitude,
+            'is_default': True,
+            'address_label': rnd.choice(['HOME', 'HOME', 'WORK', 'OTHER']),
+        }
+
+
+def _restaurants(plan, rnd, start, end):
+    for i in range(start, end):
+        latitude, longitude = _coordinates(rnd, 0.03)
+        yield {
+            'id': plan.base['restaurants'] + i,
+            'name': f'{rnd.choice(CUISINES)} {rnd.choice(DISHES)} {i + 1}',
+            'description': ', '.join(rnd.sample(DISHES, 3)),
+            'address': f'{rnd.choice(STREETS)} {rnd.randrange(1, 200)}, Tashkent',
+            'latitude': latitude,
+            'longitude': longitude,
+            'phone': f'99871{rnd.randrange(10 ** 7):07d}',
+            'is_active': rnd.random() < 0.95,
+            'delivery_radius': rnd.choice([3, 5, 5, 7, 10]),
+            'min_order_amount': Decimal(rnd.choice([0, 20000, 30000, 50000])),
+            'working_hours': {'monday': '09:00-23:00', 'sunday': '10:00-23:00'},
+            'menu_version': 1,
+            'created_at': _moment(plan, rnd),
+        }
+
+
+def _menu_items(plan, rnd, start, end):
+    for restaurant in range(start, end):
+        restaurant_id = plan.base['restaurants'] + restaurant
+        for position in range(plan.menu_offsets[restaurant + 1] - plan.menu_offsets[restaurant]):
+            item_id, name, price = plan.menu_item(restaurant, position)
+            yield {
+                'id': item_id,
+                'restaurant_id': restaurant_id,
+                'name': name,
+                'description': ', '.join(rnd.sample(DISHES, 2)),
+                'price': price,
+                'is_available': rnd.random() < 0.93,
+                'preparation_time': rnd.randrange(5, 45),
+            }
+
+
+def _orders(plan, rnd, start, end, items):
+    """Заказы чанка; позиции заказов складываются в items."""
+    user_total, restaurant_total = plan.user_weights[-1], plan.restaurant_weights[-1]
+    for i in range(start, end):
+        order_id = plan.base['orders'] + i
+        user = min(bisect.bisect(plan.user_weights, rnd.random() * user_total), plan.users - 1)
+        restaurant = min(bisect.bisect(plan.restaurant_weights, rnd.random() * restaurant_total), plan.restaurants - 1)
+        menu_size = plan.menu_offsets[restaurant + 1] - plan.menu_offsets[restaurant]
+        # Популярные позиции меню чаще: начало меню
+        positions = {int(menu_size * rnd.random() ** 2) for _ in range(_pick(rnd, ITEMS_PER_ORDER))}
+        details, total = [], Decimal(0)
+        for position in sorted(positions):
+            item_id, name, price = plan.menu_item(restaurant, position)
+            quantity = _pick(rnd, QUANTITIES)
+            total += price * quantity
+            details.append({'menu_item_id': str(item_id), 'name': name, 'quantity': quantity, 'price': str(price)})
+            items.append({'order_id': order_id, 'menu_item_id': item_id, 'quantity': quantity, 'price_at_time': price})
+        created_at = _moment(plan, rnd, recent_bias=1.6)
+        changed_at = created_at + timedelta(minutes=rnd.randrange(20, 75))
+        yield {
+            'id': order_id,
+            'user_id': plan.base['users'] + user,
+            'restaurant_id': plan.base['restaurants'] + restaurant,
+            'address_id': plan.base['addresses'] + user,
+            'total_amount': total,
+            'details': {'items': details},
+            'status': _pick(rnd, FINAL_STATUSES),
+            'status_changed_at': changed_at,
+            'created_at': created_at,
+            'updated_at': changed_at,
+        }
+
+
+class _Table:
+    """Колонки модели, значения по умолчанию и адаптация значений под текущую БД."""
+
+    def __init__(self, model, with_id=True):
+        self.fields = [f for f in model._meta.concrete_fields if with_id or not f.primary_key]
+        self.defaults = [f.get_default() for f in self.fields]
+        self.table = model._meta.db_table
+        self.columns = [f.column for f in self.fields]
+        # Даты, Decimal и JSON - через адаптеры бэкенда, остальное как есть
+        self.adapted = [isinstance(f, (DateField, DecimalField, JSONField)) for f in self.fields]
+
+    def rows(self, dicts):
+        # connection - прокси на asgiref.Local: берем реальное соединение один раз, а не на каждое значение
+        db = connections[connection.alias]
+        prepare = [
+            (lambda value, f=f: f.get_db_prep_save(value, db)) if adapted else None
+            for f, adapted in zip(self.fields, self.adapted)
+        ]
+        columns = list(zip([f.attname for f in self.fields], self.defaults, prepare))
+        for values in dicts:
+            yield tuple(
+                convert(values.get(name, default)) if convert else values.get(name, default)
+                for name, default, convert in columns
+            )
+
+    def write(self, dicts):
+        db = connections[connection.alias]
+        quote = db.ops.quote_name
+        columns = ', '.join(quote(column) for column in self.columns)
+        count = 0
+        with db.cursor() as cursor:
+            if db.vendor == 'postgresql' and hasattr(cursor.cursor, 'copy'):
+                with cursor.cursor.copy(f'COPY {quote(self.table)} ({columns}) FROM STDIN') as copy:
+                    for row in self.rows(dicts):
+                        copy.write_row(row)
+                        count += 1
+            else:
+                rows = list(self.rows(dicts))
+                placeholders = ', '.join(['%s'] * len(self.columns))
+                cursor.executemany(f'INSERT INTO {quote(self.table)} ({columns}) VALUES ({placeholders})', rows)
+                count = len(rows)
+        return count
+
+
+GENERATORS = {
+    'users': (CustomUser, _users),
+    'addresses': (Address, _addresses),
+    'restaurants': (Restaurant, _restaurants),
+    'menu_items': (MenuItem, _menu_items),
+}
+
+# План для процессов пула: наследуется при fork
+_plan = None
+
+
+def _write_chunk(chunk):
+    phase, index, start, end = chunk
+    rnd = random.Random(f'{_plan.seed}:{phase}:{index}')
+    with transaction.atomic():
+        if phase == 'orders':
+            items = []
+            written = _Table(Order).write(list(_orders(_plan, rnd, start, end, items)))
+            _Table(OrderItem, with_id=False).write(items)
+            return phase, written
+        model, generator = GENERATORS[phase]
+        return phase, _Table(model).write(generator(_plan, rnd, start, end))
+
+
+def generate(plan, workers=1):
+    """Пишет все таблицы по фазам и возвращает итератор (фаза, число строк) по чанкам."""
+    global _plan
+    _plan = plan
+    # SQLite не пишет параллельно
+    if connection.vendor != 'postgresql':
+        workers = 1
+    for phase in PHASES:
+        chunks = plan.chunks(phase)
+        if workers > 1:
+            # Соединение родителя не должно достаться дочерним процессам
+            connections.close_all()
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as pool:
+                yield from pool.map(_write_chunk, chunks)
+        else:
+            yield from map(_write_chunk, chunks)
+
+    # Явные id: последовательности Postgres продолжаются после сгенерированных строк
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [CustomUser, Address, Restaurant, MenuItem, Order]):
+            cursor.execute(sql)
+
+
+def default_until(tz):
+    """Полночь сегодняшнего дня: тот же seed в тот же день дает те же даты."""
+    return datetime.combine(datetime.now(tz).date(), time.min, tzinfo=tz)
@@ -1,129 +1,184 @@
 from celery import shared_task
-from datetime import datetime
+from datetime import datetime, timedelta
 import pika
-import json
 import logging
-import time
-from celery.exceptions import MaxRetriesExceededError
-from django.db import transaction
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .breaker import CircuitOpenError, broker_breaker
+from .broker import EXCHANGE, connection_parameters, retry_countdown
+from .codec import encode
 from .models import Order
+from .instrumentation import track_broker_publish
+from .metrics import PUBLISH_FAILURES, PUBLISH_LATENCY
+from .outbox import relay_outbox
+from .ratings import reconcile_recent_ratings
+from .results import delete_expired_results
 
 logger = logging.getLogger(__name__)
 
 class RabbitMQPublisher:
-    def __init__(self, max_retries=5, retry_delay=5):
-        self.exchange_name = 'defood_exchange'
+    """
+    Одна попытка подключения и публикации, без sleep: повтор с задержкой -
+    забота вызывающего (self.retry(countdown=...) в задаче), воркер не
+    простаивает, пока брокер недоступен.
+    """
+    def __init__(self):
+        self.exchange_name = EXCHANGE
         self.connection = None
         self.channel = None
-        self.max_retries = max_retries
-        self.retry_delay = retry_delay
 
     def connect(self):
-        retries = 0
-        last_error = None
-        while retries < self.max_retries:
-            try:
-                if not self.connection or self.connection.is_closed:
-                    self.connection = pika.BlockingConnection(
-                        pika.ConnectionParameters(
-                            host='localhost',
-                            port=5672,
-                            credentials=pika.PlainCredentials('guest', 'guest'),
-                            heartbeat=600,
-                            connection_attempts=3,
-                            socket_timeout=5
-                        )
-                    )
-                    self.channel = self.connection.channel()
-                    self.channel.exchange_declare(
-                        exchange=self.exchange_name,
-                        exchange_type='topic',
-                        durable=True
-                    )
-                    return True
-            except pika.exceptions.AMQPConnectionError as e:
-                last_error = e
-                retries += 1
-                if retries < self.max_retries:
-                    logger.warning(f"RabbitMQ connection attempt {retries} failed, retrying in {self.retry_delay} seconds...")
-                    time.sleep(self.retry_delay)
-        
-        logger.error(f"Failed to connect to RabbitMQ after {self.max_retries} attempts: {last_error}")
-        return False
-
-    def publish(self, routing_key, message, max_retries=3):
-        for attempt in range(max_retries):
+        if self.connection and not self.connection.is_closed:
+            return True
+        try:
+            self.connection = pika.BlockingConnection(connection_parameters())
+            self.channel = self.connection.channel()
+            self.channel.exchange_declare(
+                exchange=self.exchange_name,
+                exchange_type='topic',
+                durable=True
+            )
+            return True
+        except pika.exceptions.AMQPConnectionError as e:
+            logger.error(f"Failed to connect to RabbitMQ: {e}")
+            self.close()
+            return False
+
+    def close(self):
+        if self.connection and not self.connection.is_closed:
+            self.connection.close()
+        self.connection = None
+        self.channel = None
+
+    def publish(self, routing_key, message):
+        with track_broker_publish(), PUBLISH_LATENCY.time(routing_key=routing_key):
+            # Открытый breaker - отказ сразу, без попытки подключения
+            if not broker_breaker.allow():
+                PUBLISH_FAILURES.inc(routing_key=routing_key)
+                raise CircuitOpenError("RabbitMQ circuit breaker is open")
             try:
-                if self.connect():
-                    self.channel.basic_publish(
-                        exchange=self.exchange_name,
-                        routing_key=routing_key,
-                        body=json.dumps(message),
-                        properties=pika.BasicProperties(
-                            delivery_mode=2,
-                            content_type='application/json'
-                        )
+                if not self.connect():
+                    raise pika.exceptions.AMQPConnectionError("Failed to establish connection")
+                body, content_type = encode(message)
+                self.channel.basic_publish(
+                    exchange=self.exchange_name,
+                    routing_key=routing_key,
+                    body=body,
+                    properties=pika.BasicProperties(
+                        delivery_mode=2,
+                        content_type=content_type
                     )
-                    return True
-                raise Exception("Failed to establish connection")
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise
-                logger.warning(f"Publish attempt {attempt + 1} failed, retrying...")
-                time.sleep(2)
-        return False
-
-@shared_task(bind=True, max_retries=3)
-def send_order_to_queue(self, order_id):
-    try:
-        with transaction.atomic():
-            order = Order.objects.get(id=order_id)
-            message = {
-                'order_id': str(order.id),
-                'event_type': 'order_created',
-                'timestamp': datetime.now().isoformat(),
-                'data': {
-                    'user_id': str(order.user.id),
-                    'restaurant_id': str(order.restaurant.id),
-                    'total_amount': str(order.total_amount),
-                    'status': order.status,
-                    'items': [{
-                        'menu_item_id': str(item.menu_item.id),
-                        'quantity': item.quantity,
-                        'price': str(item.price_at_time)
-                    } for item in order.items.all()]
-                }
-            }
-            
-            publisher = RabbitMQPublisher()
-            if not publisher.publish('defood.orders.created', message):
-                order.delete()
-                raise Exception("Failed to publish order to queue")
-                
-            logger.info(f"Order message sent to queue: {message}")
-            return message
-    except Exception as e:
-        logger.error(f"Failed to process order {order_id}: {str(e)}")
+                )
+            except Exception:
+                broker_breaker.record_failure()
+                PUBLISH_FAILURES.inc(routing_key=routing_key)
+                # Битое соединение не переиспользуется следующей публикацией
+                self.close()
+                raise
+            broker_breaker.record_success()
+            return True
+
+
+def build_order_message(order, items=None):
+    """
+    items - уже загруженные OrderItem (OrderSerializer.create), иначе
+    order.items.all(). *_id вместо order.user.id / item.menu_item.id: без
+    запросов за связанными объектами.
+    """
+    if items is None:
+        items = order.items.all()
+    return {
+        'order_id': str(order.id),
+        'event_type': 'order_created',
+        'timestamp': datetime.now().isoformat(),
+        'data': {
+            'user_id': str(order.user_id),
+            'restaurant_id': str(order.restaurant_id),
+            'total_amount': str(order.total_amount),
+            'status': order.status,
+            'items': [{
+                'menu_item_id': str(item.menu_item_id),
+                'quantity': item.quantity,
+                'price': str(item.price_at_time)
+            } for item in items]
+        }
+    }
+
+
+def build_user_message(user_data):
+    return {
+        'event_type': 'user_created',
+        'timestamp': datetime.now().isoformat(),
+        'data': user_data
+    }
+
+
+def get_publisher():
+    # RABBITMQ_PUBLISHER_CLASS=models.testing.InMemoryPublisher - без брокера (нагрузочные прогоны)
+    return import_string(settings.RABBITMQ_PUBLISHER_CLASS)()
+
+
+# Публикации - fire-and-forget: task_id отдается клиенту, но результат никто
+# не читает, и TaskResult на каждый заказ не пишется.
+# При недоступном брокере - повтор через BROKER_RETRY_DELAYS без sleep в воркере;
+# заказ при этом не удаляется: он уже создан и оплачен клиентом
+@shared_task(bind=True, max_retries=len(settings.BROKER_RETRY_DELAYS), ignore_result=True)
+def send_order_to_queue(self, order_id, message=None):
+    # message собирается при создании заказа (OrderSerializer.create); без него -
+    # задачи, поставленные до этого изменения: событие строится из БД
+    if message is None:
         try:
             order = Order.objects.get(id=order_id)
-            order.delete()
-        except:
-            pass
-        raise self.retry(exc=e, countdown=5)
+        except Order.DoesNotExist:
+            logger.warning(f"Order {order_id} not found, nothing to publish")
+            return None
+        message = build_order_message(order)
+    try:
+        get_publisher().publish('defood.orders.created', message)
+    except Exception as e:
+        logger.error(f"Failed to publish order {order_id} (attempt {self.request.retries + 1}): {e}")
+        raise self.retry(exc=e, countdown=retry_countdown(self.request.retries))
+    logger.info(f"Order message sent to queue: {message}")
+    return message
 
-@shared_task(name='models.tasks.send_user_data_to_queue')
-def send_user_data_to_queue(user_data):
+@shared_task(
+    bind=True, name='models.tasks.send_user_data_to_queue',
+    max_retries=len(settings.BROKER_RETRY_DELAYS), ignore_result=True,
+)
+def send_user_data_to_queue(self, user_data):
+    message = build_user_message(user_data)
     try:
-        message = {
-            'event_type': 'user_created',
-            'timestamp': datetime.now().isoformat(),
-            'data': user_data
-        }
-        
-        publisher = RabbitMQPublisher()
-        publisher.publish('defood.users.created', message)
-        logger.info(f"User message sent to queue: {message}")
-        return message
+        get_publisher().publish('defood.users.created', message)
     except Exception as e:
-        logger.error(f"Failed to send user data to queue: {e}")
-        raise
+        logger.error(f"Failed to send user data to queue (attempt {self.request.retries + 1}): {e}")
+        raise self.retry(exc=e, countdown=retry_countdown(self.request.retries))
+    logger.info(f"User message sent to queue: {message}")
+    return message
+
+
+@shared_task(name='models.tasks.reconcile_rating_aggregates')
+def reconcile_rating_aggregates():
+    since = timezone.now() - timedelta(minutes=settings.RATING_RECONCILE_WINDOW_MINUTES)
+    fixed = reconcile_recent_ratings(since)
+    logger.info(f"Rating aggregates reconciled since {since.isoformat()}: {fixed}")
+    return fixed
+
+
+@shared_task(name='models.tasks.cleanup_task_results', ignore_result=True)
+def cleanup_task_results():
+    deleted = delete_expired_results()
+    logger.info(f"Expired task results deleted: {deleted}")
+    return deleted
+
+
+@shared_task(name='models.tasks.relay_outbox_messages', ignore_result=True)
+def relay_outbox_messages():
+    publisher = get_publisher()
+    try:
+        relayed = relay_outbox(publisher)
+    finally:
+        publisher.close()
+    if relayed:
+        logger.info(f"Outbox events relayed: {relayed}")
+    return relayed
@@ -0,0 +1,55 @@
+from collections import deque
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from .codec import encode
+from .instrumentation import get_query_budget, track_broker_publish
+from .metrics import PUBLISH_LATENCY
+
+
+class QueryBudgetTestMixin:
+    """
+    Mixin для TestCase: выполняет запрос тестовым клиентом и падает,
+    если эндпоинт выдал больше SQL-запросов, чем объявлено в его query_budget.
+    """
+
+    def assertQueryBudget(self, method, path, *args, using='default', **kwargs):
+        match = resolve(path.split('?', 1)[0])
+        budget = get_query_budget(match.func, method)
+        if budget is None:
+            self.fail(f"{method.upper()} {path} has no declared query budget")
+
+        with CaptureQueriesContext(connections[using]) as context:
+            response = getattr(self.client, method.lower())(path, *args, **kwargs)
+
+        if len(context) > budget:
+            queries = '\n'.join(
+                f"{i}. {query['sql']}" for i, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(
+                f"{method.upper()} {path} executed {len(context)} queries, "
+                f"budget is {budget}:\n{queries}"
+            )
+        return response
+
+
+class InMemoryPublisher:
+    """
+    Заменитель RabbitMQPublisher (RABBITMQ_PUBLISHER_CLASS) для нагрузочных
+    прогонов и тестов: сообщение кодируется как для брокера (models.codec)
+    и остается в памяти процесса (последние MAX_MESSAGES) как
+    (routing_key, body, content_type) - читать через codec.decode(body, content_type).
+    """
+    MAX_MESSAGES = 10000
+    messages = deque(maxlen=MAX_MESSAGES)
+
+    def publish(self, routing_key, message):
+        with track_broker_publish(), PUBLISH_LATENCY.time(routing_key=routing_key):
+            body, content_type = encode(message)
+            self.messages.append((routing_key, body, content_type))
+        return True
+
+    def close(self):
+        pass
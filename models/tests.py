@@ -1,3 +1,1028 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import tempfile
+import threading
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from celery.exceptions import Retry
+
+from django.core import signing
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ModelSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from config.schema import cached_schema, schema_view
+
+from . import codec
+from .breaker import CircuitBreaker, CircuitOpenError
+from .broker import RETRY_HEADER, replay_dead_letters, retry_countdown
+from .events import (
+    OrderStatusFeed, OrderStatusHub, hub_event, order_status_feed, order_status_hub, publish_order_status,
+)
+from .health import DEPENDENCY_UP, HealthProber
+from .metrics import (
+    BREAKER_STATE, REQUEST_LATENCY, REQUESTS_TOTAL, TRANSITION_LOG_DROPPED, Counter, Gauge, Histogram, Registry,
+)
+from .models import (
+    Address, CustomUser, MenuItem, Order, OrderItem, OrderStatusTransition, OutboxMessage, Restaurant,
+    RestaurantDailyStats,
+)
+from .outbox import relay_outbox
+from .projections import rebuild_summaries
+from .ratings import recompute_all_ratings
+from .readers import ValuesReader
+from .renderers import ORJSONParser, ORJSONRenderer
+from .rollups import backfill_rollups
+from .results import delete_expired_results
+from .search import SearchIndex, load_index
+from .serializers import MenuItemSerializer, OrderItemSerializer, OrderSerializer, RestaurantSerializer
+from .tasks import build_order_message, send_order_to_queue
+from .testing import InMemoryPublisher, QueryBudgetTestMixin
+from .transitions import (
+    InvalidTransition, TransitionLogWriter, stage_durations, transition_log, transition_order,
+)
+from .views import order_status_stream
+
+
+class OrderFixturesMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(phone_number='998901234567', password='test123')
+        cls.restaurant = Restaurant.objects.create(
+            name='Plov Center',
+            description='Plov',
+            address='Tashkent',
+            phone='998711234567',
+            delivery_radius=5,
+            min_order_amount=Decimal('10000.00'),
+            working_hours={'monday': '09:00-21:00'},
+        )
+        cls.address = Address.objects.create(
+            user=cls.user,
+            street='Amir Temur',
+            house_number='1',
+            city='Tashkent',
+            postal_code='100000',
+            address_label='HOME',
+        )
+        cls.menu_items = [
+            MenuItem.objects.create(
+                restaurant=cls.restaurant,
+                name=f'Dish {i}',
+                description='',
+                price=Decimal('25000.00'),
+                preparation_time=15,
+            )
+            for i in range(3)
+        ]
+        cls.orders = []
+        for _ in range(3):
+            order = Order.objects.create(
+                user=cls.user,
+                restaurant=cls.restaurant,
+                address=cls.address,
+                total_amount=Decimal('75000.00'),
+            )
+            for menu_item in cls.menu_items:
+                OrderItem.objects.create(
+                    order=order, menu_item=menu_item, quantity=1, price_at_time=menu_item.price
+                )
+            cls.orders.append(order)
+
+    def auth_headers(self):
+        token = RefreshToken.for_user(self.user).access_token
+        return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+
+class QueryBudgetTests(OrderFixturesMixin, QueryBudgetTestMixin, TestCase):
+    def test_internal_order_detail(self):
+        response = self.assertQueryBudget('get', f'/internal/order/{self.orders[0].id}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_order_list(self):
+        response = self.assertQueryBudget('get', '/api/orders/', **self.auth_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+
+    def test_order_history(self):
+        rebuild_summaries(Order.objects.all())
+        response = self.assertQueryBudget('get', '/api/orders/history/', **self.auth_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['item_count'] for row in response.json()], [3, 3, 3])
+        response = self.client.get('/api/orders/history/', {'limit': -5, 'offset': 1}, **self.auth_headers())
+        self.assertEqual(len(response.json()), 1)
+
+
+@mock.patch.object(transition_log, 'flush_interval', 0)
+class OrderTransitionTests(OrderFixturesMixin, QueryBudgetTestMixin, TestCase):
+    def test_transition_chain_is_logged(self):
+        order = self.orders[0]
+        # Строки агрегатов текущего часа уже есть - бюджет считается для установившегося режима
+        for status in ('CONFIRMED', 'PREPARING', 'DELIVERING', 'DELIVERED'):
+            transition_order(self.orders[2], status)
+        for status in ('CONFIRMED', 'PREPARING', 'DELIVERING'):
+            transition_order(order, status)
+        response = self.assertQueryBudget(
+            'post', f'/internal/order/{order.id}/complete/',
+            data={'status': 'DELIVERED'}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'DELIVERED')
+        self.assertEqual(
+            list(order.status_transitions.order_by('created_at').values_list('to_status', flat=True)),
+            ['CONFIRMED', 'PREPARING', 'DELIVERING', 'DELIVERED'],
+        )
+        stages = {row['from_status']: row['count'] for row in stage_durations(self.restaurant.id)}
+        self.assertEqual(stages, {'PENDING': 2, 'CONFIRMED': 2, 'PREPARING': 2, 'DELIVERING': 2})
+
+    def test_invalid_transition_rejected(self):
+        order = self.orders[1]
+        with self.assertRaises(InvalidTransition):
+            transition_order(order, 'DELIVERING')
+        response = self.client.post(
+            f'/internal/order/{order.id}/complete/', data={'status': 'bogus'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 409)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'PENDING')
+        self.assertFalse(order.status_transitions.exists())
+
+    def test_stage_durations_filters(self):
+        transition_order(self.orders[0], 'CONFIRMED')
+        CustomUser.objects.filter(pk=self.user.pk).update(is_staff=True)
+        path = '/api/analytics/stage-durations/'
+        response = self.client.get(path, {'restaurant': self.restaurant.id}, **self.auth_headers())
+        self.assertEqual([row['status'] for row in response.json()], ['PENDING'])
+        for params in ({'restaurant': 'abc'}, {'since': 'yesterday'}):
+            self.assertEqual(self.client.get(path, params, **self.auth_headers()).status_code, 400, params)
+
+    def test_complete_with_default_body_delivers_pending_order(self):
+        # Как вызывают Go-сервисы: POST без тела, статус по умолчанию - delivered
+        order = self.orders[1]
+        response = self.client.post(f'/internal/order/{order.id}/complete/')
+        self.assertEqual(response.status_code, 200)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'DELIVERED')
+        self.assertEqual(
+            list(order.status_transitions.order_by('id').values_list('from_status', 'to_status', 'duration')),
+            [
+                ('PENDING', 'CONFIRMED', order.status_changed_at - order.created_at),
+                ('CONFIRMED', 'PREPARING', None),
+                ('PREPARING', 'DELIVERING', None),
+                ('DELIVERING', 'DELIVERED', None),
+            ],
+        )
+        self.assertEqual(RestaurantDailyStats.objects.get(restaurant=self.restaurant).orders_delivered, 1)
+
+        # Повторное завершение и lowercase-статус из старых клиентов
+        response = self.client.post(
+            f'/internal/order/{self.orders[0].id}/complete/', data={'status': 'delivered'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(f'/internal/order/{order.id}/complete/')
+        self.assertEqual(response.status_code, 409)
+
+
+class TransitionLogWriterTests(OrderFixturesMixin, TestCase):
+    def row(self, order, to_status='CONFIRMED'):
+        return OrderStatusTransition(
+            order_id=order.id, restaurant_id=order.restaurant_id,
+            from_status='PENDING', to_status=to_status, created_at=timezone.now(),
+        )
+
+    def test_poison_row_is_dropped_after_max_attempts(self):
+        writer = TransitionLogWriter(batch_size=10, flush_interval=3600, max_attempts=2)
+        writer._thread = object()  # без фонового потока: flush() вызывается вручную
+        poison = self.row(self.orders[0])
+        poison.from_status = None  # NOT NULL
+        dropped = TRANSITION_LOG_DROPPED.value(reason='failed')
+        with self.assertLogs('models.transitions', 'ERROR'):
+            writer.add(self.row(self.orders[0]), poison, self.row(self.orders[1]))
+            self.assertEqual(writer.flush(), 2)
+            writer.add(self.row(self.orders[2]))
+            self.assertEqual(writer.flush(), 1)
+        self.assertEqual(writer.flush(), 0)
+        self.assertEqual(TRANSITION_LOG_DROPPED.value(reason='failed'), dropped + 1)
+        self.assertEqual(OrderStatusTransition.objects.count(), 3)
+
+    def test_buffer_is_capped(self):
+        writer = TransitionLogWriter(batch_size=10, flush_interval=3600, max_pending=2)
+        writer._thread = object()
+        dropped = TRANSITION_LOG_DROPPED.value(reason='overflow')
+        with self.assertLogs('models.transitions', 'ERROR'):
+            writer.add(*(self.row(order, status) for order, status in zip(self.orders, ('A', 'B', 'C'))))
+        self.assertEqual(TRANSITION_LOG_DROPPED.value(reason='overflow'), dropped + 1)
+        self.assertEqual(writer.flush(), 2)
+        self.assertEqual(sorted(OrderStatusTransition.objects.values_list('to_status', flat=True)), ['B', 'C'])
+
+
+class InternalOrderEndpointTests(OrderFixturesMixin, TestCase):
+    async def complete(self, id, body=None, **extra):
+        return await self.async_client.post(
+            f'/internal/order/{id}/complete/', data=body, content_type='application/json', **extra,
+        )
+
+    async def test_bad_json_is_400(self):
+        order = self.orders[0]
+        for body in ('{"status": ', '[1]', '"DELIVERED"', '{"status": 5}'):
+            response = await self.complete(order.id, body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('detail', response.json())
+        await order.arefresh_from_db()
+        self.assertEqual(order.status, 'PENDING')
+
+    async def test_unknown_order_is_404(self):
+        missing = max(order.id for order in self.orders) + 1
+        for id in (missing, 'abc'):
+            response = await self.async_client.get(f'/internal/order/{id}/')
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.json(), {'detail': 'No Order matches the given query.'})
+            response = await self.complete(id, {'status': 'DELIVERED'})
+            self.assertEqual(response.status_code, 404)
+
+    async def test_backward_transition_is_409(self):
+        order = self.orders[0]
+        response = await self.complete(order.id, {'status': 'PREPARING'})
+        self.assertEqual(response.status_code, 200)
+        for status in ('CONFIRMED', 'PENDING', 'PREPARING'):
+            response = await self.complete(order.id, {'status': status})
+            self.assertEqual(response.status_code, 409, status)
+            self.assertIn('detail', response.json())
+        await order.arefresh_from_db()
+        self.assertEqual(order.status, 'PREPARING')
+        self.assertEqual(await order.status_transitions.acount(), 2)
+
+
+class RatingTests(OrderFixturesMixin, TestCase):
+    def test_ratings_update_aggregates(self):
+        Order.objects.filter(pk__in=[o.pk for o in self.orders]).update(status='DELIVERED')
+        for order, score in zip(self.orders, (5, 4)):
+            response = self.client.post(
+                f'/api/orders/{order.id}/rate/', data={'restaurant_score': score},
+                content_type='application/json', **self.auth_headers(),
+            )
+            self.assertEqual(response.status_code, 201)
+        response = self.client.post(
+            f'/api/orders/{self.orders[0].id}/rate/', data={'restaurant_score': 1},
+            content_type='application/json', **self.auth_headers(),
+        )
+        self.assertEqual(response.status_code, 400)
+
+        self.restaurant.refresh_from_db()
+        self.assertEqual((self.restaurant.rating_sum, self.restaurant.rating_count), (9, 2))
+        self.assertEqual(self.restaurant.rating, 4.5)
+
+        Restaurant.objects.filter(pk=self.restaurant.pk).update(rating_sum=0, rating=0.0)
+        self.assertEqual(recompute_all_ratings()['Restaurant'], 1)
+        self.restaurant.refresh_from_db()
+        self.assertEqual((self.restaurant.rating_sum, self.restaurant.rating), (9, 4.5))
+
+    def test_undelivered_order_cannot_be_rated(self):
+        response = self.client.post(
+            f'/api/orders/{self.orders[2].id}/rate/', data={'restaurant_score': 5},
+            content_type='application/json', **self.auth_headers(),
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@mock.patch.object(transition_log, 'flush_interval', 0)
+class RestaurantStatsTests(OrderFixturesMixin, QueryBudgetTestMixin, TestCase):
+    def test_rollups_follow_delivery_and_match_backfill(self):
+        Restaurant.objects.filter(pk=self.restaurant.pk).update(owner=self.user)
+        for order in self.orders[:2]:
+            for status in ('CONFIRMED', 'PREPARING', 'DELIVERING', 'DELIVERED'):
+                transition_order(order, status)
+
+        response = self.assertQueryBudget(
+            'get', f'/api/restaurants/{self.restaurant.id}/stats/', **self.auth_headers()
+        )
+        self.assertEqual(response.status_code, 200)
+        [today] = response.json()
+        self.assertEqual((today['orders_delivered'], Decimal(today['revenue'])), (2, Decimal('150000.00')))
+
+        live = list(RestaurantDailyStats.objects.values('day', 'orders_delivered', 'revenue'))
+        day = live[0]['day']
+        list(backfill_rollups(day, day + timedelta(days=1)))
+        rebuilt = RestaurantDailyStats.objects.get()
+        self.assertEqual(rebuilt.orders_created, 3)
+        self.assertEqual([{k: getattr(rebuilt, k) for k in live[0]}], live)
+
+    def test_stats_require_owner(self):
+        response = self.client.get(f'/api/restaurants/{self.restaurant.id}/stats/', **self.auth_headers())
+        self.assertEqual(response.status_code, 403)
+
+
+class OrderExportTests(OrderFixturesMixin, TestCase):
+    def test_streams_csv_and_ndjson(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(is_staff=True)
+        response = self.client.get(
+            '/api/exports/orders.csv', {'level': 'items', 'restaurant': self.restaurant.id}, **self.auth_headers()
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['order_id', 'created_at'])
+        self.assertEqual(len(lines), 1 + 9)
+
+        response = self.client.get('/api/exports/orders.ndjson', {'since': '2000-01-01'}, **self.auth_headers())
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['item_count'] for row in rows], [3, 3, 3])
+        self.assertEqual(rows[0]['total_amount'], '75000.00')
+
+    def test_item_count_matches_read_model(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(is_staff=True)
+        OrderItem.objects.filter(pk=self.orders[0].items.first().pk).update(quantity=4)
+        rebuild_summaries(Order.objects.all())
+        history = {row['order_id']: row['item_count'] for row in self.client.get(
+            '/api/orders/history/', **self.auth_headers()
+        ).json()}
+        response = self.client.get('/api/exports/orders.ndjson', **self.auth_headers())
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual({row['order_id']: row['item_count'] for row in rows}, history)
+        self.assertEqual(history[self.orders[0].id], 6)
+
+    def test_requires_staff(self):
+        response = self.client.get('/api/exports/orders.csv', **self.auth_headers())
+        self.assertEqual(response.status_code, 403)
+
+
+class MenuImportTests(OrderFixturesMixin, TestCase):
+    def test_csv_upsert_bumps_menu_version_once(self):
+        Restaurant.objects.filter(pk=self.restaurant.pk).update(owner=self.user)
+        upload = SimpleUploadedFile('menu.csv', (
+            'name,description,price,is_available,preparation_time\n'
+            'Dish 0,Updated,30000.00,false,20\n'
+            'Lagman,,45000,true,25\n'
+        ).encode())
+        response = self.client.post(
+            f'/api/restaurants/{self.restaurant.id}/menu/import/', {'file': upload}, **self.auth_headers()
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'imported': 2, 'menu_version': 1})
+        self.assertEqual(MenuItem.objects.filter(restaurant=self.restaurant).count(), 4)
+        dish = MenuItem.objects.get(pk=self.menu_items[0].pk)
+        self.assertEqual((dish.price, dish.is_available, dish.preparation_time), (Decimal('30000.00'), False, 20))
+
+    def test_invalid_rows_import_nothing(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(is_staff=True)
+        response = self.client.post(
+            f'/api/restaurants/{self.restaurant.id}/menu/import/',
+            data=[
+                {'name': 'Somsa', 'price': '8000', 'preparation_time': 10},
+                {'name': '', 'price': '-1', 'preparation_time': 5000},
+            ],
+            content_type='application/json', **self.auth_headers(),
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['row'], 2)
+        self.assertEqual(len(response.json()['errors'][0]['errors']), 3)
+        self.assertFalse(MenuItem.objects.filter(name='Somsa').exists())
+
+    def test_non_utf8_csv_is_rejected(self):
+        Restaurant.objects.filter(pk=self.restaurant.pk).update(owner=self.user)
+        upload = SimpleUploadedFile('menu.csv', 'name,price,preparation_time\nПлов,30000,20\n'.encode('cp1251'))
+        response = self.client.post(
+            f'/api/restaurants/{self.restaurant.id}/menu/import/', {'file': upload}, **self.auth_headers()
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(response.json()['errors'][0]['row'])
+        self.assertIn('UTF-8', response.json()['errors'][0]['errors'][0])
+
+
+class MenuSearchTests(OrderFixturesMixin, TestCase):
+    def setUp(self):
+        self.index = load_index()
+
+    def test_prefix_typo_and_distance_ranking(self):
+        far = Restaurant.objects.create(
+            name='Lagman House', description='', address='Samarkand', phone='998661234567',
+            latitude=Decimal('39.654'), longitude=Decimal('66.959'),
+            delivery_radius=5, min_order_amount=Decimal('10000.00'), working_hours={},
+        )
+        MenuItem.objects.create(restaurant=far, name='Dish 0 special', description='', price=1, preparation_time=5)
+        MenuItem.objects.create(
+            restaurant=self.restaurant, name='Lagman', description='Uyghur noodles', price=1, preparation_time=5
+        )
+        index = load_index()
+
+        self.assertEqual([r['name'] for r in index.search('lagm', kind='menu_item')], ['Lagman'])
+        self.assertEqual([r['name'] for r in index.search('lagmna', kind='menu_item')], ['Lagman'])
+        self.assertEqual(index.search('uyghur')[0]['name'], 'Lagman')
+
+        results = index.search('dish 0', latitude=41.2995, longitude=69.2401)
+        self.assertEqual([r['restaurant_id'] for r in results], [self.restaurant.id, far.id])
+        self.assertEqual(results[0]['distance_km'], 0)
+
+    def test_incremental_updates(self):
+        with mock.patch('models.search._holder', index=self.index, built_at=0.0) as holder:
+            holder.is_built.return_value = True
+            with self.captureOnCommitCallbacks(execute=True):
+                item = MenuItem.objects.create(
+                    restaurant=self.restaurant, name='Somsa', description='', price=1, preparation_time=5
+                )
+            self.assertEqual(self.index.search('soms')[0]['id'], item.id)
+            with self.captureOnCommitCallbacks(execute=True):
+                item.is_available = False
+                item.save()
+            self.assertEqual(self.index.search('soms'), [])
+            with self.captureOnCommitCallbacks(execute=True):
+                Restaurant.objects.filter(pk=self.restaurant.pk).update(is_active=False)
+                self.restaurant.refresh_from_db()
+                self.restaurant.save()
+            self.assertEqual(self.index.search('dish'), [])
+
+
+    def test_unknown_restaurant_is_skipped_or_loaded(self):
+        index = SearchIndex()
+        index.add_restaurant(1, 'Osh Markazi', '', 41.3, 69.2, True)
+        index.add_menu_item(10, 'Plov', '', 2, 1)
+        index.add_menu_item(11, 'Plov', '', 1, 1)
+        self.assertEqual([r['id'] for r in index.search('plov', kind='menu_item')], [11])
+        self.assertEqual([r['id'] for r in index.search('plov', latitude=41.3, longitude=69.2)], [11])
+
+        # Блюдо из сигнала этого процесса, ресторан создан в другом
+        with mock.patch('models.search._holder', index=index) as holder:
+            holder.is_built.return_value = True
+            with self.captureOnCommitCallbacks(execute=True):
+                item = MenuItem.objects.create(
+                    restaurant=self.restaurant, name='Plov', description='', price=1, preparation_time=5
+                )
+        self.assertIn(item.id, [r['id'] for r in index.search('plov', kind='menu_item')])
+
+
+class CachedSchemaTests(TestCase):
+    def setUp(self):
+        cached_schema.reset()
+        self.addCleanup(cached_schema.reset)
+
+    def test_cached_schema_matches_live(self):
+        live = schema_view.without_ui(cache_timeout=0)(RequestFactory().get('/swagger.json'), format='.json')
+        live.render()
+        response = self.client.get('/swagger.json/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, live.content)
+        self.assertEqual(self.client.get('/swagger/?format=openapi').content, response.content)
+
+        response = self.client.get('/swagger.json/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_schema_file_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = f'{directory}/openapi.json'
+            call_command('generate_openapi_schema', output=path, stdout=io.StringIO())
+            call_command('generate_openapi_schema', output=path, check=True, stdout=io.StringIO())
+            with self.settings(OPENAPI_SCHEMA_FILE=path):
+                response = self.client.get('/swagger.yaml/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'DeFood API', response.content)
+
+
+class InMemoryPublisherTests(OrderFixturesMixin, TestCase):
+    def test_order_event_published_without_broker(self):
+        InMemoryPublisher.messages.clear()
+        with self.settings(RABBITMQ_PUBLISHER_CLASS='models.testing.InMemoryPublisher'):
+            send_order_to_queue.apply(args=[str(self.orders[0].id)]).get()
+        routing_key, body, content_type = InMemoryPublisher.messages.pop()
+        self.assertEqual(routing_key, 'defood.orders.created')
+        self.assertEqual(codec.decode(body, content_type)['order_id'], str(self.orders[0].id))
+        self.assertTrue(Order.objects.filter(pk=self.orders[0].pk).exists())
+
+    @override_settings(BROKER_MESSAGE_FORMAT='msgpack')
+    def test_stores_content_type_of_encoded_body(self):
+        InMemoryPublisher.messages.clear()
+        message = build_order_message(self.orders[0])
+        InMemoryPublisher().publish('defood.orders.created', message)
+        routing_key, body, content_type = InMemoryPublisher.messages.pop()
+        self.assertEqual(content_type, codec.ORDER_CREATED_MSGPACK_V1)
+        self.assertEqual(codec.decode(body, content_type), message)
+
+    def test_order_create_publishes_eagerly(self):
+        # config.settings_test: Celery eager + InMemoryPublisher
+        InMemoryPublisher.messages.clear()
+        response = self.client.post('/api/orders/', {
+            'restaurant': self.restaurant.id,
+            'address': self.address.id,
+            'items': [{'menu_item': self.menu_items[0].id, 'quantity': 2}],
+        }, content_type='application/json', **self.auth_headers())
+        self.assertEqual(response.status_code, 201)
+        routing_key, body, content_type = InMemoryPublisher.messages.pop()
+        self.assertEqual(codec.decode(body, content_type)['order_id'], str(response.json()['order']['id']))
+
+
+class SyntheticDataTests(TestCase):
+    def generate(self):
+        call_command(
+            'generate_synthetic_data', users=40, restaurants=5, menu_size=6, orders=120, chunk_size=25,
+            until='2026-01-01', stdout=io.StringIO(),
+        )
+        return list(Order.objects.order_by('id').values_list(
+            'id', 'user_id', 'restaurant_id', 'address_id', 'total_amount', 'status', 'created_at', 'details',
+        ))
+
+    def test_same_seed_same_data(self):
+        orders = self.generate()
+        self.assertEqual(len(orders), 120)
+        restaurants = Restaurant.objects.values_list('latitude', 'longitude')
+        self.assertTrue(all(Decimal('41.2') <= lat <= Decimal('41.42') for lat, _ in restaurants))
+        for item in OrderItem.objects.select_related('menu_item', 'order')[:50]:
+            self.assertEqual(item.price_at_time, item.menu_item.price)
+            self.assertEqual(item.menu_item.restaurant_id, item.order.restaurant_id)
+
+        OrderItem.objects.all().delete()
+        Order.objects.all().delete()
+        MenuItem.objects.all().delete()
+        Restaurant.objects.all().delete()
+        Address.objects.all().delete()
+        CustomUser.objects.all().delete()
+        self.assertEqual(self.generate(), orders)
+
+
+class TaskResultCleanupTests(TestCase):
+    def test_expired_results_deleted_in_chunks(self):
+        from django_celery_results.models import TaskResult
+
+        old = timezone.now() - timedelta(days=3)
+        TaskResult.objects.bulk_create([TaskResult(task_id=f'old-{i}', status='SUCCESS') for i in range(5)])
+        TaskResult.objects.filter(task_id__startswith='old-').update(date_done=old)
+        TaskResult.objects.create(task_id='fresh', status='SUCCESS')
+
+        with self.assertNumQueries(2 * 3 + 1 + 1):  # 3 чанка по 2 (select + delete), пустой select, GroupResult
+            deleted = delete_expired_results(ttl=24 * 3600, chunk_size=2)
+        self.assertEqual(deleted, {'TaskResult': 5, 'GroupResult': 0})
+        self.assertEqual(list(TaskResult.objects.values_list('task_id', flat=True)), ['fresh'])
+        self.assertTrue(send_order_to_queue.ignore_result)
+
+
+class BrokerRetryTests(OrderFixturesMixin, TestCase):
+    class Channel:
+        def __init__(self):
+            self.published, self.acked, self.nacked, self.queued = [], [], [], []
+
+        def basic_publish(self, exchange, routing_key, body, properties, mandatory=False):
+            self.published.append((exchange, routing_key, body, properties))
+
+        def basic_ack(self, delivery_tag):
+            self.acked.append(delivery_tag)
+
+        def basic_nack(self, delivery_tag):
+            self.nacked.append(delivery_tag)
+
+        def basic_get(self, queue):
+            if not self.queued:
+                return None, None, None
+            return self.queued.pop(0)
+
+    def process(self, consumer, channel, body, headers=None):
+        method = SimpleNamespace(routing_key='defood.orders.created', delivery_tag=len(channel.acked) + 1)
+        consumer.process_message(channel, method, SimpleNamespace(headers=headers, content_type='application/json'), body)
+        return channel.published[-1]
+
+    @override_settings(BROKER_RETRY_DELAYS=[1, 5])
+    def test_failures_go_through_retry_queues_to_dlq(self):
+        from RabbitMQ import RabbitMQConsumer
+
+        consumer, channel = RabbitMQConsumer(), self.Channel()
+        body = json.dumps({'order_id': '1', 'event_type': 'order_created', 'data': {}})
+        with mock.patch.object(consumer, 'project_order', side_effect=ValueError('boom')), \
+                self.assertLogs('RabbitMQ', 'ERROR'):
+            _, target, _, properties = self.process(consumer, channel, body)
+            self.assertEqual((target, properties.headers[RETRY_HEADER]), ('orders_queue.retry.1', 1))
+            _, target, _, properties = self.process(consumer, channel, body, properties.headers)
+            self.assertEqual(target, 'orders_queue.retry.2')
+            _, target, _, properties = self.process(consumer, channel, body, properties.headers)
+            self.assertEqual(target, 'orders_queue.dlq')
+        self.assertIn('boom', properties.headers['x-last-error'])
+        self.assertEqual((len(channel.acked), channel.nacked), (3, []))
+
+        with self.assertLogs('RabbitMQ', 'ERROR'):
+            _, target, _, _ = self.process(consumer, channel, b'not json')
+        self.assertEqual(target, 'orders_queue.dlq')
+
+        channel.queued.append((SimpleNamespace(delivery_tag=99), properties, body))
+        self.assertEqual(replay_dead_letters(channel, 'orders_queue'), 1)
+        exchange, routing_key, _, replayed = channel.published[-1]
+        self.assertEqual((exchange, routing_key, replayed.headers), ('defood_exchange', 'defood.orders.created', None))
+        self.assertEqual(channel.acked[-1], 99)
+
+    def test_publish_failure_retries_without_deleting_order(self):
+        order = self.orders[0]
+        with mock.patch.object(InMemoryPublisher, 'publish', side_effect=ConnectionError('down')), \
+                mock.patch.object(send_order_to_queue, 'retry', side_effect=Retry()) as retry:
+            with self.assertRaises(Retry), self.assertLogs('models.tasks', 'ERROR'):
+                send_order_to_queue.run(str(order.id))
+        self.assertEqual(retry.call_args.kwargs['countdown'], retry_countdown(0))
+        self.assertTrue(Order.objects.filter(pk=order.pk).exists())
+
+
+class CircuitBreakerTests(OrderFixturesMixin, TestCase):
+    def test_opens_fails_fast_and_closes_after_trial(self):
+        now = [0.0]
+        breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+        failing = mock.Mock(side_effect=ConnectionError('down'))
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                breaker.call(failing)
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(failing)
+        self.assertEqual((breaker.state, failing.call_count), ('open', 2))
+
+        now[0] = 10
+        self.assertTrue(breaker.allow())  # единственный пробный вызов
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+        now[0] = 20
+        self.assertEqual(breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(breaker.state, 'closed')
+        self.assertEqual(BREAKER_STATE.value(breaker='test'), 0)
+
+    def test_open_breaker_stores_event_in_outbox_until_relayed(self):
+        breaker = CircuitBreaker('test-outbox', failure_threshold=1, reset_timeout=3600)
+        breaker.record_failure()
+        InMemoryPublisher.messages.clear()
+        with mock.patch('models.outbox.broker_breaker', breaker):
+            response = self.client.post('/api/orders/', {
+                'restaurant': self.restaurant.id,
+                'address': self.address.id,
+                'items': [{'menu_item': self.menu_items[0].id, 'quantity': 2}],
+            }, content_type='application/json', **self.auth_headers())
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.json()['task_id'])
+        self.assertEqual(len(InMemoryPublisher.messages), 0)
+        stored = OutboxMessage.objects.get()
+        self.assertEqual(stored.payload['order_id'], str(response.json()['order']['id']))
+
+        self.assertEqual(relay_outbox(InMemoryPublisher(), batch_size=1), 1)
+        routing_key, body, content_type = InMemoryPublisher.messages.pop()
+        self.assertEqual((routing_key, codec.decode(body, content_type)), ('defood.orders.created', stored.payload))
+        self.assertFalse(OutboxMessage.objects.exists())
+
+
+class MessageCodecTests(OrderFixturesMixin, TestCase):
+    def test_msgpack_round_trip_and_json_fallback(self):
+        message = build_order_message(self.orders[0])
+        body, content_type = codec.encode(message, 'msgpack')
+        self.assertEqual(content_type, codec.ORDER_CREATED_MSGPACK_V1)
+        self.assertEqual(codec.decode(body, content_type), message)
+        self.assertLess(len(body), len(codec.encode(message, 'json')[0]) / 2)
+
+        message['data']['note'] = 'не в схеме v1'
+        body, content_type = codec.encode(message, 'msgpack')
+        self.assertEqual((content_type, codec.decode(body, content_type)), (codec.JSON, message))
+        with self.assertRaises(ValueError):
+            codec.decode(b'{}', 'application/x-unknown')
+
+    def test_consumer_reads_msgpack_events(self):
+        from RabbitMQ import RabbitMQConsumer
+
+        body, content_type = codec.encode(build_order_message(self.orders[1]), 'msgpack')
+        consumer = RabbitMQConsumer()
+        channel = mock.Mock()
+        with mock.patch.object(consumer, 'project_order') as project:
+            consumer.process_message(
+                channel, SimpleNamespace(routing_key='defood.orders.created', delivery_tag=1),
+                SimpleNamespace(content_type=content_type, headers=None), body,
+            )
+        self.assertEqual(project.call_args.args[0]['order_id'], str(self.orders[1].id))
+        channel.basic_ack.assert_called_once_with(delivery_tag=1)
+
+
+class OrderEventTests(OrderFixturesMixin, TestCase):
+    def test_event_built_at_creation_is_published_without_queries(self):
+        InMemoryPublisher.messages.clear()
+        serializer = OrderSerializer(data={
+            'restaurant': self.restaurant.id,
+            'address': self.address.id,
+            'items': [{'menu_item': item.id, 'quantity': 2} for item in self.menu_items],
+        }, context={'request': SimpleNamespace(user=self.user)})
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save()
+        event = serializer.event
+        self.assertEqual(event['data'], build_order_message(Order.objects.get(pk=order.pk))['data'])
+
+        with self.assertNumQueries(0):
+            send_order_to_queue.run(str(order.id), event)
+        routing_key, body, content_type = InMemoryPublisher.messages.pop()
+        self.assertEqual(codec.decode(body, content_type), event)
+
+
+class ValuesReaderTests(OrderFixturesMixin, TestCase):
+    def assertSameBytes(self, path, serializer_class, queryset):
+        response = self.client.get(path, **self.auth_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, JSONRenderer().render(serializer_class(queryset, many=True).data))
+
+    def test_list_endpoints_match_serializers(self):
+        # Decimal с нулями, дробные координаты, юникод и вложенный JSON, заказ без позиций
+        MenuItem.objects.create(
+            restaurant=self.restaurant, name='Самса «тандыр»', description='', price=Decimal('8000.50'),
+            preparation_time=10,
+        )
+        Order.objects.create(
+            user=self.user, restaurant=self.restaurant, address=self.address,
+            total_amount=Decimal('0.10'), details={'note': 'без лука', 'nested': [1, {'a': None}]},
+        )
+        self.assertSameBytes('/api/orders/', OrderSerializer, Order.objects.filter(user=self.user))
+        self.assertSameBytes('/api/restaurants/', RestaurantSerializer, Restaurant.objects.all())
+        self.assertSameBytes('/api/menu-items/', MenuItemSerializer, MenuItem.objects.all())
+
+    def test_nullable_fields_and_datetimes(self):
+        class OrderCourierSerializer(ModelSerializer):
+            items = OrderItemSerializer(many=True)
+
+            class Meta:
+                model = Order
+                fields = ['id', 'courier', 'status_changed_at', 'created_at', 'updated_at', 'total_amount', 'items']
+
+        transition_order(self.orders[0], 'CONFIRMED')  # status_changed_at: одна строка с датой, остальные null
+        queryset = Order.objects.order_by('id')
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(ValuesReader(OrderCourierSerializer).read(queryset)),
+            renderer.render(OrderCourierSerializer(queryset.prefetch_related('items'), many=True).data),
+        )
+
+
+class MetricsTests(TestCase):
+    def test_exposition_format(self):
+        registry = Registry()
+        requests = Counter('t_requests_total', 'Requests', ['view', 'method'], registry=registry)
+        latency = Histogram('t_latency_seconds', 'Latency', ['view'], buckets=(0.1, 1.0), registry=registry)
+        up = Gauge('t_up', 'Up', registry=registry)
+        requests.inc(view='a"b\n', method='GET')
+        requests.inc(2, view='a"b\n', method='GET')
+        for value in (0.05, 0.5, 5):
+            latency.observe(value, view='x')
+        up.set(1)
+        self.assertEqual(registry.render(), (
+            '# HELP t_requests_total Requests\n'
+            '# TYPE t_requests_total counter\n'
+            't_requests_total{view="a\\"b\\n",method="GET"} 3\n'
+            '# HELP t_latency_seconds Latency\n'
+            '# TYPE t_latency_seconds histogram\n'
+            't_latency_seconds_bucket{view="x",le="0.1"} 1\n'
+            't_latency_seconds_bucket{view="x",le="1.0"} 2\n'
+            't_latency_seconds_bucket{view="x",le="+Inf"} 3\n'
+            't_latency_seconds_sum{view="x"} 5.55\n'
+            't_latency_seconds_count{view="x"} 3\n'
+            '# HELP t_up Up\n'
+            '# TYPE t_up gauge\n'
+            't_up 1\n'
+        ))
+
+    def test_dead_thread_shards_are_folded(self):
+        registry = Registry()
+        counter = Counter('t_total', 'Total', registry=registry)
+        histogram = Histogram('t_seconds', 'Seconds', buckets=(1.0,), registry=registry)
+
+        def work():
+            counter.inc()
+            histogram.observe(0.5)
+
+        for _ in range(20):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        counter.inc()
+        self.assertEqual(counter.value(), 21)
+        self.assertEqual(histogram.count(), 20)
+        self.assertEqual((len(counter._shards), len(histogram._shards)), (1, 0))
+
+    def test_middleware_counts_requests(self):
+        before = REQUESTS_TOTAL.value(view='health-live', method='GET', status=200)
+        self.client.get('/health/live/')
+        self.assertEqual(REQUESTS_TOTAL.value(view='health-live', method='GET', status=200), before + 1)
+        self.assertGreater(REQUEST_LATENCY.count(view='health-live', method='GET'), 0)
+
+    def test_endpoint_restricted_to_internal_network_or_token(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)  # тестовый клиент - 127.0.0.1
+        self.assertIn(b'# TYPE defood_http_requests_total counter', response.content)
+
+        with self.settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.5').status_code, 403)
+            self.assertEqual(self.client.get(
+                '/metrics', REMOTE_ADDR='203.0.113.5', HTTP_AUTHORIZATION='Bearer wrong',
+            ).status_code, 403)
+            self.assertEqual(self.client.get(
+                '/metrics', REMOTE_ADDR='203.0.113.5', HTTP_AUTHORIZATION='Bearer secret',
+            ).status_code, 200)
+
+
+class HealthTests(TestCase):
+    def make_prober(self, database=True, broker=True):
+        prober = HealthProber(interval=10)
+        prober.check_database = lambda: {'ok': database, 'latency_ms': 1.0}
+        prober.check_broker = lambda: {'ok': broker, 'latency_ms': 1.0}
+        prober.ensure_started = lambda: None  # без фонового потока: probe() вызывается вручную
+        return prober
+
+    def get(self, prober, path):
+        with mock.patch('models.views.prober', prober):
+            return self.client.get(path)
+
+    def get_unavailable(self, prober, path):
+        # django.request пишет каждый 5xx в ERROR - ожидаемые 503 не засоряют вывод тестов
+        with self.assertLogs('django.request', 'ERROR'):
+            response = self.get(prober, path)
+        self.assertEqual(response.status_code, 503)
+        return response.json()['status']
+
+    def test_readiness_follows_snapshot(self):
+        prober = self.make_prober()
+        self.assertEqual(self.get_unavailable(prober, '/health/'), 'starting')
+
+        prober.probe()
+        response = self.get(prober, '/health/ready/')
+        self.assertEqual((response.status_code, response.json()['status']), (200, 'healthy'))
+        self.assertEqual(DEPENDENCY_UP.value(dependency='rabbitmq'), 1)
+
+        prober.snapshot['checked_at'] -= 3 * prober.interval + 1
+        self.assertEqual(self.get_unavailable(prober, '/health/'), 'stale')
+
+    def test_failed_dependency_fails_readiness_not_liveness(self):
+        for database, broker in ((False, True), (True, False)):
+            prober = self.make_prober(database=database, broker=broker)
+            prober.probe()
+            self.assertEqual(self.get_unavailable(prober, '/health/'), 'error')
+            self.assertEqual(self.get(prober, '/health/live/').status_code, 200)
+
+    def test_broker_probe_goes_through_breaker(self):
+        prober = HealthProber(interval=10)
+        breaker = CircuitBreaker('test-health', failure_threshold=1, reset_timeout=3600)
+        with mock.patch('models.health.broker_breaker', breaker), \
+                mock.patch('models.tasks.RabbitMQPublisher.connect', return_value=False) as connect:
+            self.assertFalse(prober.check_broker()['ok'])
+            self.assertEqual(prober.check_broker()['error'], 'circuit breaker open')
+        self.assertEqual(connect.call_count, 1)
+
+
+class OrderStatusHubTests(TestCase):
+    async def test_publish_reaches_only_subscribers_of_user(self):
+        hub = OrderStatusHub()
+        first, second, other = hub.subscribe(1), hub.subscribe('1'), hub.subscribe(2)
+        self.assertEqual(hub.subscriber_count(), 3)
+
+        # publish() из другого потока, как из consumer'а
+        thread = threading.Thread(target=hub.publish, args=(1, {'status': 'CONFIRMED'}))
+        thread.start()
+        thread.join()
+        self.assertEqual(await asyncio.wait_for(first.get(), 1), {'status': 'CONFIRMED'})
+        self.assertEqual(await asyncio.wait_for(second.get(), 1), {'status': 'CONFIRMED'})
+        self.assertTrue(other.queue.empty())
+
+        hub.unsubscribe(first)
+        hub.unsubscribe(first)
+        self.assertEqual(hub.publish(1, {'status': 'PREPARING'}), 1)
+        hub.unsubscribe(second)
+        hub.unsubscribe(other)
+        self.assertEqual((hub.subscriber_count(), hub.publish(1, {})), (0, 0))
+
+    async def test_full_queue_drops_newest_events(self):
+        hub = OrderStatusHub(queue_size=2)
+        subscription = hub.subscribe(1)
+        with self.assertLogs('models.events', 'WARNING') as logs:
+            for status in ('CONFIRMED', 'PREPARING', 'DELIVERING'):
+                hub.publish(1, {'status': status})
+            await asyncio.sleep(0)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual([subscription.queue.get_nowait()['status'] for _ in range(2)], ['CONFIRMED', 'PREPARING'])
+        self.assertTrue(subscription.queue.empty())
+
+
+class OrderStatusFeedTests(OrderFixturesMixin, TestCase):
+    async def test_feed_only_publishes_order_events_to_hub(self):
+        hub = OrderStatusHub()
+        feed = OrderStatusFeed(hub)
+        subscription = hub.subscribe(self.user.id)
+        message = build_order_message(self.orders[0], items=[])
+        body, content_type = codec.encode(message)
+        # Сообщение Celery-задачи с тем же routing key и битое тело пропускаются
+        feed.handle(None, None, SimpleNamespace(headers={'task': 'x'}, content_type=content_type), body)
+        with self.assertLogs('models.events', 'WARNING'):
+            feed.handle(None, None, SimpleNamespace(headers=None, content_type='text/plain'), b'?')
+        feed.handle(None, None, SimpleNamespace(headers=None, content_type=content_type), body)
+        event = await asyncio.wait_for(subscription.get(), 1)
+        self.assertEqual(event, {
+            'event': 'order_created', 'order_id': str(self.orders[0].id),
+            'status': 'PENDING', 'updated_at': message['timestamp'],
+        })
+        self.assertTrue(subscription.queue.empty())
+
+    def test_status_change_goes_through_broker_when_feed_is_connected(self):
+        order = self.orders[0]
+        connection = mock.Mock(is_closed=False)
+        with mock.patch.object(order_status_feed, '_connection', connection), \
+                mock.patch.object(order_status_feed, '_channel', mock.Mock()) as channel, \
+                mock.patch.object(order_status_hub, 'publish') as local:
+            publish_order_status(order)
+            local.assert_not_called()
+            connection.add_callback_threadsafe.call_args.args[0]()
+        kwargs = channel.basic_publish.call_args.kwargs
+        self.assertEqual(kwargs['routing_key'], 'defood.orders.status_changed')
+        self.assertEqual(
+            hub_event(codec.decode(kwargs['body'], kwargs['properties'].content_type)),
+            (str(self.user.id), {
+                'event': 'status_changed', 'order_id': str(order.id),
+                'status': 'PENDING', 'updated_at': order.updated_at.isoformat(),
+            }),
+        )
+
+        # Без ленты (один процесс) - сразу в локальный хаб
+        with mock.patch.object(order_status_hub, 'publish') as local:
+            publish_order_status(order)
+        local.assert_called_once()
+
+
+class OrderStatusStreamTests(OrderFixturesMixin, TestCase):
+    def open_stream(self, **params):
+        return order_status_stream(AsyncRequestFactory().get('/api/orders/stream/', params))
+
+    def issue_ticket(self):
+        response = self.client.post('/api/orders/stream/ticket/', **self.auth_headers())
+        self.assertEqual(response.status_code, 200)
+        return response.json()['ticket']
+
+    async def test_requires_stream_ticket(self):
+        access = await sync_to_async(lambda: str(RefreshToken.for_user(self.user).access_token))()
+        ticket = await sync_to_async(self.issue_ticket)()
+        # access JWT в query string не принимается, тикет с другой солью - тоже
+        for params in ({'token': access}, {'ticket': access}, {'ticket': signing.dumps(self.user.pk)}):
+            response = await self.open_stream(**params)
+            self.assertEqual(response.status_code, 401, params)
+        with override_settings(ORDER_STREAM_TICKET_TTL=-1):
+            self.assertEqual((await self.open_stream(ticket=ticket)).status_code, 401)
+        self.assertEqual((await self.async_client.post('/api/orders/stream/ticket/')).status_code, 401)
+
+    @override_settings(ORDER_STREAM_HEARTBEAT=0.01)
+    async def test_stream_sends_snapshot_then_events(self):
+        await Order.objects.filter(id=self.orders[0].id).aupdate(status='DELIVERED')
+        ticket = await sync_to_async(self.issue_ticket)()
+        hub = OrderStatusHub()
+        response = await self.open_stream(ticket=ticket)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        # Генератор подписывается на хаб при первом чтении, а не в view
+        stream = response.streaming_content
+        try:
+            with mock.patch('models.views.order_status_hub', hub):
+                frames = [await anext(stream) for _ in range(2)]
+            self.assertEqual({json.loads(frame.split(b'data: ')[1])['order_id'] for frame in frames},
+                             {str(order.id) for order in self.orders[1:]})
+            self.assertTrue(all(frame.startswith(b'event: snapshot\n') for frame in frames))
+
+            self.assertEqual(await anext(stream), b': keepalive\n\n')
+            hub.publish(self.user.id + 1, {'event': 'status_changed', 'order_id': 'other'})
+            hub.publish(self.user.id, {'event': 'status_changed', 'order_id': str(self.orders[1].id)})
+            frame = await anext(stream)
+            while frame == b': keepalive\n\n':
+                frame = await anext(stream)
+            self.assertTrue(frame.startswith(b'event: status_changed\n'))
+            self.assertEqual(json.loads(frame.split(b'data: ')[1])['order_id'], str(self.orders[1].id))
+        finally:
+            await stream.aclose()
+
+
+class ORJSONTests(OrderFixturesMixin, TestCase):
+    def payload(self):
+        moment = timezone.now().replace(microsecond=123456)
+        return {
+            'orders': OrderSerializer(Order.objects.prefetch_related('items'), many=True).data,
+            'total': Decimal('1250.50'),
+            'id': uuid.UUID(int=7),
+            'aware': moment,
+            'naive': timezone.make_naive(moment),
+            'offset': moment.astimezone(timezone.get_fixed_timezone(300)),
+            'date': moment.date(),
+            'duration': timedelta(minutes=5),
+            'nested': [[1, 2.5, None, True], [], [{'name': 'Плов\u2028\u2029'}]],
+            3: 'int key',
+        }
+
+    def test_renderer_matches_json_renderer(self):
+        data = self.payload()
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        context = {'indent': 2}
+        self.assertEqual(ORJSONRenderer().render(data, renderer_context=context),
+                         JSONRenderer().render(data, renderer_context=context))
+
+    def test_parser_matches_json_parser(self):
+        body = JSONRenderer().render(self.payload())
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+        for parser in (ORJSONParser(), JSONParser()):
+            with self.assertRaises(ParseError):
+                parser.parse(io.BytesIO(b'{"status": '))
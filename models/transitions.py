@@ -0,0 +1,271 @@
+"""
+Машина состояний заказа и журнал переходов.
+
+Допустимые переходы компилируются в frozenset пар (from, to), проверка -
+одна операция membership. Строки журнала копятся в памяти и пишутся
+bulk_create'ом пачками в фоновом потоке, поэтому смена статуса в запросе
+стоит одного условного UPDATE.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Avg, Count, Max
+from django.utils import timezone
+
+from .metrics import TRANSITION_LOG_DROPPED
+from .models import Order, OrderStatusTransition
+from .rollups import arecord_order_delivered, record_order_delivered
+
+logger = logging.getLogger(__name__)
+
+ORDER_STATUSES = frozenset(value for value, _ in Order._meta.get_field('status').choices)
+
+_TRANSITIONS = {
+    'PENDING': ('CONFIRMED', 'CANCELLED'),
+    'CONFIRMED': ('PREPARING', 'CANCELLED'),
+    'PREPARING': ('DELIVERING', 'CANCELLED'),
+    'DELIVERING': ('DELIVERED', 'CANCELLED'),
+    'DELIVERED': (),
+    'CANCELLED': (),
+}
+
+ALLOWED_TRANSITIONS = frozenset(
+    (from_status, to_status)
+    for from_status, targets in _TRANSITIONS.items()
+    for to_status in targets
+)
+
+# Основная цепочка: advance_order может пройти ее вперед через несколько этапов
+_FLOW = ('PENDING', 'CONFIRMED', 'PREPARING', 'DELIVERING', 'DELIVERED')
+
+
+class InvalidTransition(Exception):
+    pass
+
+
+def validate_transition(from_status, to_status):
+    if to_status not in ORDER_STATUSES:
+        raise InvalidTransition(f"Unknown order status '{to_status}'")
+    if (from_status, to_status) not in ALLOWED_TRANSITIONS:
+        raise InvalidTransition(f"Invalid status transition {from_status} -> {to_status}")
+
+
+def forward_path(from_status, to_status):
+    """
+    Статусы от from_status до to_status включительно: прямой переход или
+    движение вперед по _FLOW с пропуском промежуточных этапов.
+    """
+    if from_status in _FLOW and to_status in _FLOW:
+        start, end = _FLOW.index(from_status), _FLOW.index(to_status)
+        if start < end:
+            return list(_FLOW[start:end + 1])
+    validate_transition(from_status, to_status)
+    return [from_status, to_status]
+
+
+class TransitionLogWriter:
+    """
+    Буфер журнала переходов: flush по размеру пачки или по таймеру.
+    flush_interval <= 0 - запись сразу в вызывающем потоке (тесты, отладка).
+
+    Если пачка не записалась, строки пишутся по одной: битая строка (FK на
+    удаленный заказ, строка из откаченной транзакции) не блокирует остальные.
+    Строка, не записанная max_attempts раз, отбрасывается; при переполнении
+    буфера (max_pending) вытесняются самые старые строки.
+    """
+
+    def __init__(self, batch_size, flush_interval, max_pending=10000, max_attempts=3):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._pending = []  # [(попытка, строка)]
+        self._lock = threading.Lock()
+        self._thread = None
+        self._wakeup = threading.Event()
+
+    def add(self, *transitions):
+        if self.flush_interval <= 0:
+            OrderStatusTransition.objects.bulk_create(transitions)
+            return
+        with self._lock:
+            self._pending.extend((0, transition) for transition in transitions)
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                del self._pending[:overflow]
+            full = len(self._pending) >= self.batch_size
+        if overflow > 0:
+            TRANSITION_LOG_DROPPED.inc(overflow, reason='overflow')
+            logger.error(f"Transition log buffer is full, dropped {overflow} oldest rows")
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    async def aadd(self, *transitions):
+        if self.flush_interval <= 0:
+            await OrderStatusTransition.objects.abulk_create(transitions)
+            return
+        self.add(*transitions)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        try:
+            with transaction.atomic():
+                OrderStatusTransition.objects.bulk_create([row for _, row in pending], batch_size=self.batch_size)
+            return len(pending)
+        except Exception as e:
+            logger.error(f"Failed to write {len(pending)} order status transitions, retrying row by row: {e}")
+
+        written, retry = 0, []
+        for attempt, row in pending:
+            try:
+                with transaction.atomic():
+                    row.save(force_insert=True)
+                written += 1
+            except Exception as e:
+                if attempt + 1 < self.max_attempts:
+                    retry.append((attempt + 1, row))
+                else:
+                    TRANSITION_LOG_DROPPED.inc(reason='failed')
+                    logger.error(
+                        f"Dropping order status transition {row.from_status} -> {row.to_status} "
+                        f"of order {row.order_id} after {self.max_attempts} attempts: {e}"
+                    )
+        if retry:
+            with self._lock:
+                self._pending[:0] = retry
+        return written
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='transition-log', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                logger.error(f"Transition log flush failed: {e}")
+
+
+transition_log = TransitionLogWriter(
+    batch_size=settings.ORDER_TRANSITION_LOG_BATCH_SIZE,
+    flush_interval=settings.ORDER_TRANSITION_LOG_FLUSH_INTERVAL,
+    max_pending=settings.ORDER_TRANSITION_LOG_MAX_PENDING,
+    max_attempts=settings.ORDER_TRANSITION_LOG_MAX_ATTEMPTS,
+)
+
+
+def log_initial_status(order):
+    transition_log.add(OrderStatusTransition(
+        order_id=order.id,
+        restaurant_id=order.restaurant_id,
+        from_status='',
+        to_status=order.status,
+        created_at=order.created_at,
+    ))
+
+
+def _prepare(order, path):
+    now = timezone.now()
+    # Пропущенные этапы пишутся в журнал с duration=None: в stage_durations
+    # они не попадают, время целиком относится к исходному статусу
+    transitions = [
+        OrderStatusTransition(
+            order_id=order.id,
+            restaurant_id=order.restaurant_id,
+            from_status=from_status,
+            to_status=to_status,
+            duration=now - (order.status_changed_at or order.created_at) if index == 0 else None,
+            created_at=now,
+        )
+        for index, (from_status, to_status) in enumerate(zip(path, path[1:]))
+    ]
+    # Условный UPDATE: параллельная смена статуса не пройдет незамеченной
+    queryset = Order.objects.filter(pk=order.pk, status=order.status)
+    values = {'status': path[-1], 'status_changed_at': now, 'updated_at': now}
+    return transitions, queryset, values
+
+
+def _single_step(order, to_status):
+    to_status = (to_status or '').upper()
+    validate_transition(order.status, to_status)
+    return [order.status, to_status]
+
+
+def _forward(order, to_status):
+    return forward_path(order.status, (to_status or '').upper())
+
+
+def _apply(order, updated, values):
+    if not updated:
+        raise InvalidTransition(f"Order {order.pk} status changed concurrently")
+    for field, value in values.items():
+        setattr(order, field, value)
+
+
+def _change_status(order, path):
+    transitions, queryset, values = _prepare(order, path)
+    _apply(order, queryset.update(**values), values)
+    transition_log.add(*transitions)
+    if order.status == 'DELIVERED':
+        record_order_delivered(order.restaurant_id, order.status_changed_at, order.total_amount)
+    return transitions
+
+
+async def _achange_status(order, path):
+    transitions, queryset, values = _prepare(order, path)
+    _apply(order, await queryset.aupdate(**values), values)
+    await transition_log.aadd(*transitions)
+    if order.status == 'DELIVERED':
+        await arecord_order_delivered(order.restaurant_id, order.status_changed_at, order.total_amount)
+    return transitions
+
+
+def transition_order(order, to_status):
+    """Один шаг машины состояний."""
+    return _change_status(order, _single_step(order, to_status))[0]
+
+
+async def atransition_order(order, to_status):
+    return (await _achange_status(order, _single_step(order, to_status)))[0]
+
+
+def advance_order(order, to_status):
+    """
+    Переход с пропуском этапов вперед по цепочке (PENDING -> DELIVERED для
+    internal complete) или прямой переход (-> CANCELLED). Возвращает строки журнала.
+    """
+    return _change_status(order, _forward(order, to_status))
+
+
+async def aadvance_order(order, to_status):
+    return await _achange_status(order, _forward(order, to_status))
+
+
+def stage_durations(restaurant_id=None, since=None):
+    """Среднее/максимальное время в каждом статусе - только по журналу, без orders."""
+    transitions = OrderStatusTransition.objects.filter(duration__isnull=False)
+    if restaurant_id is not None:
+        transitions = transitions.filter(restaurant_id=restaurant_id)
+    if since is not None:
+        transitions = transitions.filter(created_at__gte=since)
+    return list(
+        transitions.values('from_status')
+        .annotate(count=Count('id'), avg_duration=Avg('duration'), max_duration=Max('duration'))
+        .order_by('from_status')
+    )
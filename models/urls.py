@@ -6,7 +6,8 @@ from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     RegisterView, LoginView, ProfileView,
     OrderViewSet, RestaurantViewSet, AddressViewSet, MenuItemViewSet,
-    internal_order_detail, internal_order_complete, health_check,
+    internal_order_detail, internal_order_complete, health_check, health_live, metrics,
+    order_status_stream, order_stream_ticket, order_stage_durations, order_export, search,
 )
 
 router = DefaultRouter()
@@ -22,6 +23,19 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('profile/', ProfileView.as_view(), name='profile'),
 
+    # SSE-поток статусов заказов (должен стоять до router: orders/<pk>/)
+    path('api/orders/stream/', order_status_stream, name='order-status-stream'),
+    path('api/orders/stream/ticket/', order_stream_ticket, name='order-stream-ticket'),
+
+    # Аналитика по журналу статусов
+    path('api/analytics/stage-durations/', order_stage_durations, name='order-stage-durations'),
+
+    # Потоковая выгрузка для финансов: orders.csv / orders.ndjson
+    path('api/exports/orders.<str:export_format>', order_export, name='order-export'),
+
+    # Поиск по меню и ресторанам
+    path('api/search/', search, name='search'),
+
     # API endpoints (using router)
     path('api/', include(router.urls)),
 
@@ -29,8 +43,13 @@ urlpatterns = [
     path('internal/order/<str:id>/', internal_order_detail, name='internal-order-detail'),
     path('internal/order/<str:id>/complete/', internal_order_complete, name='internal-order-complete'),
 
-    # Health check endpoint
+    # Health check endpoints
     path('health/', health_check, name='health-check'),
+    path('health/live/', health_live, name='health-live'),
+    path('health/ready/', health_check, name='health-ready'),
+
+    # Prometheus
+    path('metrics', metrics, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -1,18 +1,39 @@
+import asyncio
+import hmac
+import io
+import ipaddress
+import json
 import logging
+from datetime import datetime, time, timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.core import signing
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
 from rest_framework import generics, views, status
 from rest_framework import viewsets, permissions
-from rest_framework.decorators import action, api_view, permission_classes, schema
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.decorators import action, api_view, permission_classes, renderer_classes
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
-from rest_framework.schemas import AutoSchema
 from rest_framework import serializers
 from rest_framework.viewsets import ModelViewSet
-from .models import Restaurant, Address, MenuItem, Order, Courier
+from .docs import openapi, swagger_auto_schema
+from .models import Restaurant, Address, MenuItem, Order, OrderSummary, Courier
+from .exports import EXPORT_FORMATS, export_rows, parse_bound, stream_export
+from .menu_import import MenuImportError, import_menu, parse_menu
+from .projections import aapply_status_change
+from .ratings import RatingError, submit_rating
+from .rollups import read_stats
+from .search import get_search_index
+from .transitions import InvalidTransition, aadvance_order, stage_durations
 from .serializers import (
     RestaurantSerializer,
     AddressSerializer,
@@ -21,11 +42,20 @@ from .serializers import (
     RegisterSerializer,
     LoginSerializer,
     UserSerializer,
-    OrderCreateSerializer
+    OrderCreateSerializer,
+    RatingSerializer,
 )
+from .outbox import dispatch
 from .tasks import send_user_data_to_queue, send_order_to_queue
+from .instrumentation import query_budget, track_broker_publish
+from .events import order_status_hub, publish_order_status
+from .health import prober
+from .readers import ValuesReader
+from .renderers import ORJSONParser, ORJSONRenderer
+from .metrics import ORDER_CREATE_LATENCY, REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
 
 logger = logging.getLogger(__name__)
 
@@ -69,10 +99,28 @@ class ProfileView(generics.RetrieveAPIView):
         return self.request.user
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class ValuesListMixin:
+    """list() через ValuesReader: dict из values() вместо ModelSerializer на каждую строку."""
+    values_reader = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(self.values_reader.read(queryset))
+
+
+class OrderViewSet(ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = OrderSerializer
+    values_reader = ValuesReader(OrderSerializer)
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [JWTAuthentication]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    parser_classes = [ORJSONParser, FormParser, MultiPartParser]
+    # auth user + orders + prefetched items
+    query_budgets = {'list': 3, 'retrieve': 3, 'history': 2}
 
     @swagger_auto_schema(
         operation_description="Создание нового заказа",
@@ -102,23 +150,29 @@ class OrderViewSet(viewsets.ModelViewSet):
         }
     )
     def create(self, request, *args, **kwargs):
+        with ORDER_CREATE_LATENCY.time():
+            return self._create(request, *args, **kwargs)
+
+    def _create(self, request, *args, **kwargs):
         try:
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
             order = serializer.save()
+            event = serializer.event
             
-            # Немедленно отправляем задачу
-            task_result = send_order_to_queue.apply_async(
-                args=[str(order.id)],
-                routing_key='defood.orders.created'
-            )
-            logger.info(f"Task sent: {task_result.id}")
+            # Немедленно отправляем задачу с готовым событием; при открытом breaker - событие в outbox
+            with track_broker_publish():
+                task_id = dispatch(
+                    send_order_to_queue, [str(order.id), event], 'defood.orders.created',
+                    lambda: event,
+                )
+            logger.info(f"Task sent: {task_id}")
             
             return Response({
                 'status': 'success',
                 'message': 'Заказ успешно создан',
                 'order': OrderSerializer(order).data,
-                'task_id': task_result.id
+                'task_id': task_id
             }, status=status.HTTP_201_CREATED)
             
         except serializers.ValidationError as e:
@@ -141,11 +195,54 @@ class OrderViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        operation_description="История заказов из плоской read-модели (без join'ов)",
+        manual_parameters=[
+            openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter('offset', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+    )
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        summaries = OrderSummary.objects.filter(user=request.user).order_by('-created_at')
+        if request.query_params.get('status'):
+            summaries = summaries.filter(status=request.query_params['status'])
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 200)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            return Response({'detail': 'limit and offset must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = summaries.values(
+            'order_id', 'restaurant_id', 'restaurant_name', 'item_count',
+            'total_amount', 'status', 'eta', 'created_at', 'updated_at',
+        )[offset:offset + limit]
+        return Response(list(rows))
+
+    @swagger_auto_schema(
+        operation_description="Оценка доставленного заказа (ресторан и курьер)",
+        request_body=RatingSerializer,
+        responses={201: RatingSerializer, 400: 'Заказ нельзя оценить'},
+    )
+    @action(detail=True, methods=['post'])
+    def rate(self, request, pk=None):
+        order = self.get_object()
+        serializer = RatingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            rating = submit_rating(order, **serializer.validated_data)
+        except RatingError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(RatingSerializer(rating).data, status=status.HTTP_201_CREATED)
+
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return Order.objects.none()
         if self.request.user.is_authenticated:
-            return Order.objects.filter(user=self.request.user)
+            if self.action == 'rate':
+                return Order.objects.filter(user=self.request.user)
+            return Order.objects.filter(user=self.request.user).prefetch_related('items')
         return Order.objects.none()
 
 
@@ -162,17 +259,42 @@ class CourierActivateView(views.APIView):
             return Response({'error': 'Not a courier'}, status=status.HTTP_403_FORBIDDEN)
 
 
-class CustomAutoSchema(AutoSchema):
-    def get_operation_id(self, path, method):
-        return f"{method.lower()}_{path}"
+# Внутренние эндпоинты для Go-сервисов: нативные async view (ASGI + async ORM),
+# без DRF, чтобы конкурентные вызовы не занимали по потоку на запрос
+_internal_renderer = ORJSONRenderer()
 
 
-@api_view(['GET'])
-@schema(CustomAutoSchema())
-@permission_classes([AllowAny])
-def internal_order_detail(request, id):
-    order = get_object_or_404(Order, id=id)
-    return Response({
+def _internal_response(data, status=200):
+    return HttpResponse(_internal_renderer.render(data), status=status, content_type='application/json')
+
+
+def _order_not_found():
+    return _internal_response({'detail': 'No Order matches the given query.'}, status=404)
+
+
+async def _aget_order(id, *related):
+    try:
+        return await Order.objects.select_related(*related).aget(id=id)
+    except (Order.DoesNotExist, ValueError):
+        return None
+
+
+def _request_payload(request):
+    if request.content_type != 'application/json':
+        return request.POST
+    payload = ORJSONParser().parse(io.BytesIO(request.body or b'{}'))
+    if not isinstance(payload, dict):
+        raise ParseError('Expected a JSON object.')
+    return payload
+
+
+@query_budget(1)
+@require_GET
+async def internal_order_detail(request, id):
+    order = await _aget_order(id, 'restaurant', 'address')
+    if order is None:
+        return _order_not_found()
+    return _internal_response({
         'order_id': str(order.id),
         'restaurant_latitude': float(order.restaurant.latitude),
         'restaurant_longitude': float(order.restaurant.longitude),
@@ -182,45 +304,303 @@ def internal_order_detail(request, id):
     })
 
 
+# Журнал переходов при синхронной записи (ORDER_TRANSITION_LOG_FLUSH_INTERVAL <= 0) - +1 запрос,
+# переход в DELIVERED - +2 (почасовой и дневной агрегаты).
+# Как и раньше, status по умолчанию - DELIVERED: активный заказ доводится до
+# него с пропуском промежуточных этапов (они пишутся в журнал)
+@query_budget(6)
+@csrf_exempt
+@require_POST
+async def internal_order_complete(request, id):
+    try:
+        payload = _request_payload(request)
+    except ParseError as e:
+        return _internal_response({'detail': str(e.detail)}, status=400)
+    to_status = payload.get('status', 'DELIVERED')
+    if not isinstance(to_status, str):
+        return _internal_response({'detail': 'status must be a string.'}, status=400)
+
+    order = await _aget_order(id)
+    if order is None:
+        return _order_not_found()
+    try:
+        await aadvance_order(order, to_status)
+    except InvalidTransition as e:
+        return _internal_response({'detail': str(e)}, status=409)
+    await aapply_status_change(order)
+    publish_order_status(order)
+    return _internal_response({'message': 'Order updated'})
+
+
+FINAL_ORDER_STATUSES = ('DELIVERED', 'CANCELLED')
+
+
+# Тикет для EventSource: браузер не шлет заголовки, а access JWT в query
+# string попадал бы в логи доступа, прокси и Referer. Тикет подписан
+# отдельной солью (годится только для потока) и живет ORDER_STREAM_TICKET_TTL секунд
+_STREAM_TICKET_SALT = 'models.order-status-stream'
+
+
+@swagger_auto_schema(
+    method='post',
+    operation_description="Короткоживущий тикет для /api/orders/stream/?ticket=... (EventSource)",
+)
 @api_view(['POST'])
-@schema(CustomAutoSchema())
-@permission_classes([AllowAny])
-def internal_order_complete(request, id):
-    order = get_object_or_404(Order, id=id)
-    order.status = request.data.get('status', 'delivered')
-    order.save()
-    return Response({'message': 'Order updated'})
+@permission_classes([IsAuthenticated])
+def order_stream_ticket(request):
+    return Response({
+        'ticket': signing.dumps(request.user.pk, salt=_STREAM_TICKET_SALT),
+        'expires_in': settings.ORDER_STREAM_TICKET_TTL,
+    })
+
+
+def _authenticate_stream(request):
+    # Клиенты с заголовками - обычный Bearer JWT, EventSource - ?ticket=
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    if result is not None:
+        return result[0]
+    ticket = request.GET.get('ticket')
+    if not ticket:
+        return None
+    try:
+        user_id = signing.loads(ticket, salt=_STREAM_TICKET_SALT, max_age=settings.ORDER_STREAM_TICKET_TTL)
+    except signing.BadSignature:
+        return None
+    return User.objects.filter(pk=user_id, is_active=True).first()
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _order_status_events(user_id):
+    subscription = order_status_hub.subscribe(user_id)
+    try:
+        active = Order.objects.filter(user_id=user_id).exclude(status__in=FINAL_ORDER_STATUSES)
+        async for order in active.values('id', 'status', 'updated_at'):
+            yield _sse('snapshot', {
+                'order_id': str(order['id']),
+                'status': order['status'],
+                'updated_at': order['updated_at'].isoformat(),
+            })
+
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=settings.ORDER_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield _sse(event.get('event', 'status_changed'), event)
+    finally:
+        order_status_hub.unsubscribe(subscription)
+
+
+async def order_status_stream(request):
+    """SSE-поток статусов активных заказов пользователя (только под ASGI)."""
+    user = await sync_to_async(_authenticate_stream)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    response = StreamingHttpResponse(_order_status_events(user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
 def health_check(request):
+    ready, payload = prober.readiness()
+    return JsonResponse(payload, status=200 if ready else 503)
+
+
+def health_live(request):
+    # Процесс жив и отвечает - зависимости не проверяем
+    return JsonResponse({'status': 'alive'})
+
+
+def _metrics_allowed(request):
+    token = settings.METRICS_TOKEN
+    if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
     try:
-        # Проверяем подключение к базе данных
-        from django.db import connection
-        connection.cursor()
-        
-        # Проверяем RabbitMQ
-        publisher = RabbitMQPublisher()
-        rabbitmq_ok = publisher.connect()
-        
-        if not rabbitmq_ok:
-            return Response(
-                {"status": "error", "message": "RabbitMQ connection failed"}, 
-                status=503
-            )
-            
-        return Response({"status": "healthy"}, status=200)
-    except Exception as e:
-        return Response(
-            {"status": "error", "message": str(e)}, 
-            status=503
-        )
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(net) for net in settings.METRICS_ALLOWED_NETS)
+
+
+def metrics(request):
+    if not _metrics_allowed(request):
+        return HttpResponse('Forbidden\n', status=403, content_type='text/plain')
+    return HttpResponse(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Среднее и максимальное время заказов в каждом статусе (по журналу переходов)",
+    manual_parameters=[
+        openapi.Parameter('restaurant', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        openapi.Parameter('since', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+    ],
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def order_stage_durations(request):
+    since = request.query_params.get('since')
+    if since:
+        since = parse_datetime(since) or parse_date(since)
+        if since is None:
+            return Response({'detail': 'since must be an ISO date or datetime'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        restaurant = request.query_params.get('restaurant')
+        restaurant = int(restaurant) if restaurant else None
+    except ValueError:
+        return Response({'detail': 'restaurant must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response([
+        {
+            'status': row['from_status'],
+            'count': row['count'],
+            'avg_seconds': row['avg_duration'].total_seconds(),
+            'max_seconds': row['max_duration'].total_seconds(),
+        }
+        for row in stage_durations(restaurant, since)
+    ])
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Потоковая выгрузка заказов (orders.csv / orders.ndjson) для финансов",
+    manual_parameters=[
+        openapi.Parameter('level', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['orders', 'items']),
+        openapi.Parameter('since', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        openapi.Parameter('until', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        openapi.Parameter('restaurant', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+    ],
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def order_export(request, export_format):
+    if export_format not in EXPORT_FORMATS:
+        return Response({'detail': 'Unknown export format'}, status=status.HTTP_404_NOT_FOUND)
+    level = request.query_params.get('level', 'orders')
+    if level not in ('orders', 'items'):
+        return Response({'detail': 'level must be orders or items'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        since = parse_bound(request.query_params.get('since'))
+        until = parse_bound(request.query_params.get('until'))
+        restaurant = request.query_params.get('restaurant')
+        restaurant = int(restaurant) if restaurant else None
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    headers, rows = export_rows(level, since, until, restaurant)
+    response = StreamingHttpResponse(
+        stream_export(export_format, headers, rows), content_type=EXPORT_FORMATS[export_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="orders-{level}.{export_format}"'
+    return response
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Typeahead-поиск блюд и ресторанов (префиксы, опечатки, ранжирование по расстоянию)",
+    manual_parameters=[
+        openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True),
+        openapi.Parameter('type', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['menu_item', 'restaurant']),
+        openapi.Parameter('lat', openapi.IN_QUERY, type=openapi.TYPE_NUMBER),
+        openapi.Parameter('lon', openapi.IN_QUERY, type=openapi.TYPE_NUMBER),
+        openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+    ],
+)
+@api_view(['GET'])
+@renderer_classes([ORJSONRenderer])
+def search(request):
+    params = request.query_params
+    kind = params.get('type') or None
+    if kind not in (None, 'menu_item', 'restaurant'):
+        return Response({'detail': 'type must be menu_item or restaurant'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        latitude = float(params['lat']) if params.get('lat') else None
+        longitude = float(params['lon']) if params.get('lon') else None
+        limit = min(max(int(params.get('limit', 10)), 1), 50)
+    except ValueError:
+        return Response({'detail': 'lat, lon and limit must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+    results = get_search_index().search(params.get('q', ''), latitude, longitude, kind=kind, limit=limit)
+    return Response(results)
 
 
-class RestaurantViewSet(ModelViewSet):
+class RestaurantViewSet(ValuesListMixin, ModelViewSet):
     queryset = Restaurant.objects.all()
     serializer_class = RestaurantSerializer
+    values_reader = ValuesReader(RestaurantSerializer)
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    parser_classes = [ORJSONParser, FormParser, MultiPartParser]
+    # auth user + restaurant + rollup rows
+    query_budgets = {'stats': 3}
+
+    # Максимальный период одного запроса к дашборду
+    STATS_MAX_RANGE = {'hourly': timedelta(days=7), 'daily': timedelta(days=366)}
+
+    @swagger_auto_schema(
+        operation_description="Выручка и число заказов ресторана из почасовых/дневных агрегатов",
+        manual_parameters=[
+            openapi.Parameter('granularity', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['hourly', 'daily']),
+            openapi.Parameter('from', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+            openapi.Parameter('to', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+        ],
+    )
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def stats(self, request, pk=None):
+        restaurant = self.get_object()
+        if not self._is_owner(restaurant):
+            return Response({'detail': 'Only the restaurant owner can view stats'}, status=status.HTTP_403_FORBIDDEN)
+
+        granularity = request.query_params.get('granularity', 'daily')
+        if granularity not in self.STATS_MAX_RANGE:
+            return Response({'detail': 'granularity must be hourly or daily'}, status=status.HTTP_400_BAD_REQUEST)
+        today = timezone.localdate()
+        try:
+            until = parse_date(request.query_params.get('to', '')) or today + timedelta(days=1)
+            since = parse_date(request.query_params.get('from', '')) or until - timedelta(days=7)
+        except ValueError:
+            return Response({'detail': 'from and to must be ISO dates'}, status=status.HTTP_400_BAD_REQUEST)
+        if not since < until <= since + self.STATS_MAX_RANGE[granularity]:
+            return Response({'detail': 'Invalid or too long date range'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if granularity == 'hourly':
+            tz = timezone.get_current_timezone()
+            since = timezone.make_aware(datetime.combine(since, time.min), tz)
+            until = timezone.make_aware(datetime.combine(until, time.min), tz)
+        return Response(read_stats(restaurant.id, granularity, since, until))
+
+    @swagger_auto_schema(
+        operation_description="Массовый импорт меню: JSON-список позиций или CSV-файл (поле file). "
+                              "Upsert по названию, всё или ничего",
+        responses={200: 'Импортировано', 400: 'Ошибки валидации по строкам'},
+    )
+    @action(detail=True, methods=['post'], url_path='menu/import', permission_classes=[IsAuthenticated])
+    def menu_import(self, request, pk=None):
+        restaurant = self.get_object()
+        if not self._is_owner(restaurant):
+            return Response({'detail': 'Only the restaurant owner can import the menu'}, status=status.HTTP_403_FORBIDDEN)
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                import_format = 'csv' if upload.name.lower().endswith('.csv') else 'json'
+                rows = parse_menu(upload.read(), import_format)
+            else:
+                rows = request.data.get('items') if isinstance(request.data, dict) else request.data
+                if not isinstance(rows, list):
+                    raise MenuImportError([{'row': None, 'errors': ["Expected a list of menu items"]}])
+            result = import_menu(restaurant.id, rows)
+        except MenuImportError as e:
+            return Response({'detail': str(e), 'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+    def _is_owner(self, restaurant):
+        return self.request.user.is_staff or restaurant.owner_id == self.request.user.id
 
 
 class AddressViewSet(ModelViewSet):
@@ -228,6 +608,9 @@ class AddressViewSet(ModelViewSet):
     serializer_class = AddressSerializer
 
 
-class MenuItemViewSet(ModelViewSet):
+class MenuItemViewSet(ValuesListMixin, ModelViewSet):
     queryset = MenuItem.objects.all()
-    serializer_class = MenuItemSerializer
\ No newline at end of file
+    serializer_class = MenuItemSerializer
+    values_reader = ValuesReader(MenuItemSerializer)
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    parser_classes = [ORJSONParser, FormParser, MultiPartParser]
\ No newline at end of file